@@ -0,0 +1,105 @@
+# Connection Leak Check
+"""
+Checks that find_leaks() names the application line that checked out a
+leaked connection, for a sync Session and for an AsyncSession (whose
+checkout runs inside SQLAlchemy's greenlet), with and without
+DB_LEAK_CAPTURE_STACKS.
+
+Usage (from backend/):
+    python -m benchmarks.pool_leak_check
+"""
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from database import pool
+from database.pool import (
+    InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool,
+    find_leaks, instrument_engine, pool_stats
+)
+
+
+class LeakRecorder(logging.Handler):
+    """Collects the leak reports logged by find_leaks()"""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record: logging.LogRecord):
+        self.messages.append(record.getMessage())
+
+
+def leak_sync_session(engine) -> tuple:
+    session = Session(engine)
+    line = sys._getframe().f_lineno + 1
+    session.execute(text("SELECT 1"))
+    return session, line
+
+
+async def leak_async_session(engine) -> tuple:
+    session = AsyncSession(engine)
+    line = sys._getframe().f_lineno + 1
+    await session.execute(text("SELECT 1"))
+    return session, line
+
+
+def reported(recorder: LeakRecorder, pool_name: str, function: str, line: int) -> bool:
+    location = f'File "{__file__}", line {line}, in {function}'
+    return any(f"pool {pool_name} " in m and location in m for m in recorder.messages)
+
+
+async def check(capture_stacks: bool) -> bool:
+    pool.pool_config.CAPTURE_STACKS = capture_stacks
+    pool_stats.clear()
+
+    sync_engine = create_engine("sqlite://", poolclass=InstrumentedQueuePool, pool_logging_name='sync')
+    async_engine = create_async_engine(
+        "sqlite+aiosqlite://", poolclass=InstrumentedAsyncAdaptedQueuePool, pool_logging_name='async'
+    )
+    instrument_engine(sync_engine, 'sync')
+    instrument_engine(async_engine, 'async')
+
+    sync_session, sync_line = leak_sync_session(sync_engine)
+    async_session, async_line = await leak_async_session(async_engine)
+
+    recorder = LeakRecorder()
+    logging.getLogger(pool.__name__).addHandler(recorder)
+    try:
+        find_leaks(threshold_seconds=0)
+    finally:
+        logging.getLogger(pool.__name__).removeHandler(recorder)
+
+    ok = True
+    for name, function, line in (
+        ('sync', 'leak_sync_session', sync_line),
+        ('async', 'leak_async_session', async_line)
+    ):
+        found = reported(recorder, name, function, line)
+        ok = ok and found
+        print(f"  {name:<6} capture_stacks={capture_stacks!s:<5} {'ok' if found else 'MISSING caller'}")
+    if not ok:
+        print('\n'.join(recorder.messages))
+
+    sync_session.close()
+    await async_session.close()
+    sync_engine.dispose()
+    await async_engine.dispose()
+    return ok
+
+
+async def main() -> int:
+    print("Leaked session reported with its caller")
+    results = [await check(capture_stacks) for capture_stacks in (False, True)]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
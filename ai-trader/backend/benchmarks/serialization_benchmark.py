@@ -0,0 +1,130 @@
+# Serialization Benchmark
+"""
+Per-row cost of serializing dashboard responses and WebSocket broadcasts.
+
+Compares the previous path (isoformat()/.value per field, FastAPI's
+jsonable_encoder and the stdlib encoder, send_json once per connection)
+with the orjson layer in common.serialization.
+
+Usage (from backend/):
+    python -m benchmarks.serialization_benchmark [--rows 1000] [--connections 100]
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+
+from common.serialization import dumps, dumps_str
+from database.models import Signal, SignalStatus, TradeDirection
+from webhook.app import signal_to_dict
+
+
+def legacy_signal_to_dict(s: Signal) -> dict:
+    """Row serializer as it was before the orjson layer"""
+    return {
+        "id": s.id,
+        "symbol": s.symbol,
+        "direction": s.direction.value,
+        "timestamp": s.timestamp.isoformat(),
+        "status": s.status.value,
+        "entry_price": s.entry_price,
+        "stop_loss": s.stop_loss,
+        "take_profit": s.take_profit,
+        "strategy": s.strategy_name,
+        "timeframe": s.timeframe,
+        "targets": s.targets or [s.take_profit],
+        "confidence": s.confidence or [],
+        "volatility": s.volatility or "Medium",
+        "winProbability": s.win_probability or 75
+    }
+
+
+def stdlib_render(content) -> bytes:
+    """starlette.responses.JSONResponse.render"""
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def make_signals(count: int) -> list:
+    """Transient Signal rows resembling real traffic"""
+    start = datetime(2024, 1, 1)
+    return [
+        Signal(
+            id=i,
+            timestamp=start + timedelta(seconds=i),
+            symbol="EURUSD",
+            direction=TradeDirection.BUY if i % 2 else TradeDirection.SELL,
+            timeframe="1h",
+            strategy_name="Breakout",
+            entry_price=1.0850 + i * 1e-5,
+            stop_loss=1.0800,
+            take_profit=1.0950,
+            status=SignalStatus.EXECUTED,
+            targets=[1.0950, 1.1000, 1.1050],
+            confidence=["Trend aligned", "Volume spike", "RSI divergence"],
+            volatility="Medium",
+            win_probability=72.5
+        )
+        for i in range(count)
+    ]
+
+
+def best_of(func, repeat: int) -> float:
+    """Fastest of `repeat` runs, in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialization benchmark")
+    parser.add_argument('--rows', type=int, default=1000, help="Rows per /signals page")
+    parser.add_argument('--connections', type=int, default=100, help="WebSocket clients per room")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    signals = make_signals(args.rows)
+
+    def legacy_http():
+        content = {"count": len(signals), "signals": [legacy_signal_to_dict(s) for s in signals], "next_cursor": None}
+        return stdlib_render(jsonable_encoder(content))
+
+    def fast_http():
+        content = {"count": len(signals), "signals": [signal_to_dict(s) for s in signals], "next_cursor": None}
+        return dumps(content)
+
+    assert json.loads(legacy_http()) == json.loads(fast_http()), "Wire format changed"
+
+    event = {"type": "signal", "data": legacy_signal_to_dict(signals[0]), "timestamp": datetime.utcnow()}
+
+    def legacy_ws():
+        message = dict(event, timestamp=event["timestamp"].isoformat())
+        for _ in range(args.connections):
+            json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+    def fast_ws():
+        dumps_str(event)
+
+    print(f"HTTP /signals page ({args.rows} rows)")
+    for name, func in (("stdlib + jsonable_encoder", legacy_http), ("orjson", fast_http)):
+        elapsed = best_of(func, args.repeat)
+        print(f"  {name:<26} {elapsed * 1000:8.2f} ms/page  {elapsed / args.rows * 1e6:6.2f} µs/row")
+
+    print(f"WebSocket broadcast ({args.connections} connections)")
+    for name, func in (("send_json per connection", legacy_ws), ("orjson once per room", fast_ws)):
+        elapsed = best_of(func, args.repeat * 10)
+        print(f"  {name:<26} {elapsed * 1e6:8.2f} µs/message")
+
+
+if __name__ == "__main__":
+    main()
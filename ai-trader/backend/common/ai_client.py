@@ -1,7 +1,8 @@
-from typing import Dict
+from typing import Dict, Optional
 import random
 import sys
 import os
+import time
 
 # Add backend to path to allow imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -11,12 +12,38 @@ from backend.model.llm_validator import llm_validator
 class AIClient:
     def __init__(self):
         self.validator = llm_validator
+        # Latest prediction per (symbol, direction, timeframe): (monotonic time, prediction)
+        self.recent_predictions: Dict[tuple, tuple] = {}
+
+    @staticmethod
+    def _prediction_key(signal_data: Dict) -> tuple:
+        return (
+            signal_data.get('symbol'),
+            signal_data.get('direction', 'buy').lower(),
+            signal_data.get('timeframe')
+        )
+
+    def get_cached_prediction(self, signal_data: Dict, max_age_seconds: float = 300) -> Optional[Dict]:
+        """
+        Most recent prediction for the same symbol/direction/timeframe
+        (fallback when there is no time budget left for inference)
+        """
+        cached = self.recent_predictions.get(self._prediction_key(signal_data))
+        if cached and time.monotonic() - cached[0] <= max_age_seconds:
+            return cached[1]
+        return None
 
     async def get_prediction(self, signal_data: Dict) -> Dict:
         """
         Get prediction from AI Inference Service.
         For now, we mock this as the ML service might not be running.
         """
+        prediction = await self._predict(signal_data)
+        self.recent_predictions[self._prediction_key(signal_data)] = (time.monotonic(), prediction)
+        return prediction
+
+    async def _predict(self, signal_data: Dict) -> Dict:
+        """Mock inference"""
         # Mock logic based on signal direction and random factors
         direction = signal_data.get('direction', 'buy')
         is_buy = direction.lower() == 'buy'
@@ -41,12 +68,11 @@ class AIClient:
     async def validate_signal(self, signal_data: Dict, prediction: Dict, risk_assessment: Dict) -> Dict:
         """
         Validate using LLM
-        """
-        # Run in thread pool to avoid blocking
-        import asyncio
         
-        approved, reasoning, confidence = await asyncio.to_thread(
-            self.validator.validate_signal,
+        Async HTTP (not a worker thread), so cancelling it on a deadline
+        really ends the LLM call.
+        """
+        approved, reasoning, confidence = await self.validator.validate_signal_async(
             signal_data, prediction, risk_assessment
         )
         
@@ -56,4 +82,7 @@ class AIClient:
             'confidence': confidence
         }
 
+    async def close(self):
+        await self.validator.close()
+
 ai_client = AIClient()
@@ -0,0 +1,158 @@
+# Provider Circuit Breakers
+"""
+Fail-fast protection for external price providers.
+
+A breaker is closed while its provider answers. After
+PRICE_BREAKER_FAILURE_THRESHOLD consecutive failures (transport errors,
+timeouts, 429/5xx) it opens: callers skip the request instead of waiting
+out the timeout again. After a backoff it lets one trial request through
+(half-open); success closes it, failure re-opens it with the backoff
+doubled (up to PRICE_BREAKER_MAX_BACKOFF_SECONDS) and jittered, so
+providers that recover are not hit by every client at once.
+
+Usage:
+    if not breaker.allow():
+        return None          # fail fast, serve the cached price
+    try:
+        price = fetch()
+    except asyncio.CancelledError:
+        breaker.record_cancelled()   # no verdict on the provider
+        raise
+    except Exception as e:
+        breaker.record_failure(str(e))
+    else:
+        breaker.record_success()
+"""
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class BreakerConfig:
+    """Circuit breaker configuration"""
+
+    def __init__(self):
+        self.FAILURE_THRESHOLD = int(os.getenv('PRICE_BREAKER_FAILURE_THRESHOLD', '3'))
+        # Open duration: base * 2^(consecutive opens - 1), capped, +/- jitter fraction
+        self.BASE_BACKOFF_SECONDS = float(os.getenv('PRICE_BREAKER_BASE_BACKOFF_SECONDS', '2'))
+        self.MAX_BACKOFF_SECONDS = float(os.getenv('PRICE_BREAKER_MAX_BACKOFF_SECONDS', '60'))
+        self.JITTER = float(os.getenv('PRICE_BREAKER_JITTER', '0.2'))
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker of one provider"""
+
+    def __init__(self, name: str, config: Optional[BreakerConfig] = None):
+        self.name = name
+        self.config = config or BreakerConfig()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        # Opens since the provider last answered (drives the backoff)
+        self.opens = 0
+        self.open_until = 0.0
+        self.trial_in_flight = False
+
+        self.last_error: Optional[str] = None
+        self.last_success_at: Optional[float] = None
+        self.last_failure_at: Optional[float] = None
+        self.stats = {"calls": 0, "failures": 0, "short_circuits": 0, "opened": 0}
+        # Sync fetchers may run in worker threads
+        self.lock = threading.Lock()
+
+    def _backoff(self) -> float:
+        backoff = min(
+            self.config.BASE_BACKOFF_SECONDS * (2 ** (self.opens - 1)),
+            self.config.MAX_BACKOFF_SECONDS
+        )
+        return backoff * random.uniform(1 - self.config.JITTER, 1 + self.config.JITTER)
+
+    def allow(self) -> bool:
+        """
+        Whether a request may be sent now
+
+        Returns:
+            True if closed, or if the backoff has elapsed and this caller is
+            the half-open trial; False while open (the call is short-circuited)
+        """
+        with self.lock:
+            if self.state == OPEN and time.monotonic() >= self.open_until:
+                self.state = HALF_OPEN
+                self.trial_in_flight = False
+                logger.info("Circuit %s half-open, sending a trial request", self.name)
+
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self.trial_in_flight):
+                if self.state == HALF_OPEN:
+                    self.trial_in_flight = True
+                self.stats["calls"] += 1
+                return True
+
+            self.stats["short_circuits"] += 1
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.last_success_at = time.monotonic()
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                logger.info("Circuit %s closed, provider recovered", self.name)
+            self.state = CLOSED
+            self.opens = 0
+            self.trial_in_flight = False
+
+    def record_failure(self, error: str):
+        with self.lock:
+            self.last_failure_at = time.monotonic()
+            self.last_error = error
+            self.consecutive_failures += 1
+            self.stats["failures"] += 1
+            if self.state == HALF_OPEN or (
+                self.state == CLOSED and self.consecutive_failures >= self.config.FAILURE_THRESHOLD
+            ):
+                self.opens += 1
+                self.stats["opened"] += 1
+                backoff = self._backoff()
+                self.open_until = time.monotonic() + backoff
+                self.state = OPEN
+                self.trial_in_flight = False
+                logger.warning(
+                    "Circuit %s open for %.1fs after %d consecutive failures: %s",
+                    self.name, backoff, self.consecutive_failures, error
+                )
+
+    def record_cancelled(self):
+        """
+        A request was cut off by its caller (deadline, shutdown) before the provider answered
+
+        Not a failure: a slow but healthy provider must not open its breaker.
+        A cancelled half-open trial goes back to open so the next caller
+        can send a new trial.
+        """
+        with self.lock:
+            if self.state == HALF_OPEN and self.trial_in_flight:
+                self.state = OPEN
+                self.trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.state != CLOSED
+
+    def get_stats(self) -> Dict:
+        now = time.monotonic()
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in_seconds": round(max(0.0, self.open_until - now), 1) if self.state == OPEN else None,
+            "last_error": self.last_error,
+            "last_success_age_seconds": round(now - self.last_success_at, 1) if self.last_success_at else None,
+            "last_failure_age_seconds": round(now - self.last_failure_at, 1) if self.last_failure_at else None,
+            **self.stats
+        }
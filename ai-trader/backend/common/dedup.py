@@ -0,0 +1,182 @@
+# Webhook Deduplication Cache
+"""
+Idempotency layer for webhook ingestion.
+
+TradingView retries alerts it considers undelivered. Each request is keyed
+on a client supplied idempotency key or a hash of the raw body; the first
+request reserves the key, and once it succeeds its response is stored so
+retries within the TTL get the original response back without touching
+the database or the pipeline.
+
+Backends:
+- InMemoryDedupCache: TTL'd LRU, per process
+- RedisDedupCache: shared across worker processes
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+
+class DedupConfig:
+    """Deduplication cache configuration"""
+
+    def __init__(self):
+        # Backend: 'redis' or 'memory'
+        self.BACKEND = os.getenv('WEBHOOK_DEDUP_BACKEND', 'redis').lower()
+        self.REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        self.KEY_PREFIX = os.getenv('WEBHOOK_DEDUP_KEY_PREFIX', 'trading:webhook_dedup:')
+
+        # How long a processed request is remembered
+        self.TTL_SECONDS = int(os.getenv('WEBHOOK_DEDUP_TTL_SECONDS', '300'))
+        # How long a reservation blocks retries if the first request never finishes
+        self.PENDING_TTL_SECONDS = int(os.getenv('WEBHOOK_DEDUP_PENDING_TTL_SECONDS', '30'))
+        # In-memory LRU capacity
+        self.MAX_ENTRIES = int(os.getenv('WEBHOOK_DEDUP_MAX_ENTRIES', '10000'))
+
+
+def dedup_key(raw_body: bytes, idempotency_key: Optional[str] = None) -> str:
+    """
+    Build the dedup key for a webhook request
+
+    Args:
+        raw_body: Raw request body
+        idempotency_key: Optional client supplied key (Idempotency-Key header)
+
+    Returns:
+        Hex digest identifying the request
+    """
+    if idempotency_key:
+        return hashlib.sha256(b'key:' + idempotency_key.encode('utf-8')).hexdigest()
+    return hashlib.sha256(b'body:' + raw_body).hexdigest()
+
+
+class DedupCache:
+    """Interface shared by all dedup backends"""
+
+    async def reserve(self, key: str) -> bool:
+        """Reserve a key; False if it is already reserved or completed"""
+        raise NotImplementedError
+
+    async def get(self, key: str) -> Optional[Dict]:
+        """Stored response for a completed key (None if missing or still pending)"""
+        raise NotImplementedError
+
+    async def store(self, key: str, response: Dict):
+        """Store the response of a completed request"""
+        raise NotImplementedError
+
+    async def release(self, key: str):
+        """Drop a reservation after a failed request so retries are processed"""
+        raise NotImplementedError
+
+    async def close(self):
+        """Release backend resources"""
+        pass
+
+
+class InMemoryDedupCache(DedupCache):
+    """Per-process TTL'd LRU"""
+
+    PENDING = object()
+
+    def __init__(self, ttl_seconds: int = 300, pending_ttl_seconds: int = 30, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.pending_ttl_seconds = pending_ttl_seconds
+        self.max_entries = max_entries
+        # {key: (expires_at_monotonic, response or PENDING)}
+        self._entries: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+
+    def _lookup(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put(self, key: str, value, ttl_seconds: int):
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def reserve(self, key: str) -> bool:
+        if self._lookup(key) is not None:
+            return False
+        self._put(key, self.PENDING, self.pending_ttl_seconds)
+        return True
+
+    async def get(self, key: str) -> Optional[Dict]:
+        value = self._lookup(key)
+        return None if value is self.PENDING else value
+
+    async def store(self, key: str, response: Dict):
+        self._put(key, response, self.ttl_seconds)
+
+    async def release(self, key: str):
+        self._entries.pop(key, None)
+
+
+class RedisDedupCache(DedupCache):
+    """Redis-backed cache shared by all webhook workers"""
+
+    PENDING = '__pending__'
+
+    def __init__(self, client: redis.Redis, key_prefix: str, ttl_seconds: int = 300, pending_ttl_seconds: int = 30):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.ttl_seconds = ttl_seconds
+        self.pending_ttl_seconds = pending_ttl_seconds
+
+    async def reserve(self, key: str) -> bool:
+        reserved = await self.client.set(
+            self.key_prefix + key, self.PENDING,
+            nx=True, ex=self.pending_ttl_seconds
+        )
+        return bool(reserved)
+
+    async def get(self, key: str) -> Optional[Dict]:
+        value = await self.client.get(self.key_prefix + key)
+        if value is None or value == self.PENDING:
+            return None
+        return json.loads(value)
+
+    async def store(self, key: str, response: Dict):
+        await self.client.set(self.key_prefix + key, json.dumps(response), ex=self.ttl_seconds)
+
+    async def release(self, key: str):
+        await self.client.delete(self.key_prefix + key)
+
+    async def close(self):
+        await self.client.close()
+
+
+async def create_dedup_cache(config: Optional[DedupConfig] = None) -> DedupCache:
+    """
+    Create the configured dedup backend
+
+    Falls back to the in-memory cache if Redis is unreachable.
+    """
+    config = config or DedupConfig()
+
+    if config.BACKEND == 'redis':
+        try:
+            client = redis.from_url(config.REDIS_URL, encoding="utf-8", decode_responses=True)
+            await client.ping()
+            logger.info("Webhook dedup cache connected to Redis")
+            return RedisDedupCache(client, config.KEY_PREFIX, config.TTL_SECONDS, config.PENDING_TTL_SECONDS)
+        except Exception as e:
+            logger.warning("Redis dedup cache unavailable, using in-memory cache: %s", e)
+
+    return InMemoryDedupCache(config.TTL_SECONDS, config.PENDING_TTL_SECONDS, config.MAX_ENTRIES)
@@ -1,9 +1,12 @@
 # User Settings Encryption Helper
 from cryptography.fernet import Fernet
+import logging
 import os
 import base64
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
 class SettingsEncryption:
     """Handles encryption/decryption of sensitive user settings"""
     
@@ -21,8 +24,10 @@ class SettingsEncryption:
         
         # Generate new key (in production, this should be set in env)
         key = Fernet.generate_key()
-        print(f"⚠️  WARNING: Generated new encryption key. Add to .env:")
-        print(f"SETTINGS_ENCRYPTION_KEY={base64.urlsafe_b64encode(key).decode()}")
+        logger.warning(
+            "Generated new encryption key. Add to .env: SETTINGS_ENCRYPTION_KEY=%s",
+            base64.urlsafe_b64encode(key).decode()
+        )
         return key
     
     def encrypt(self, plaintext: str) -> str:
@@ -43,7 +48,7 @@ class SettingsEncryption:
             decrypted = self.cipher.decrypt(encrypted)
             return decrypted.decode()
         except Exception as e:
-            print(f"Decryption error: {e}")
+            logger.error("Decryption failed: %s", e)
             return None
 
 
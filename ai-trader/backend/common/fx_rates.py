@@ -0,0 +1,282 @@
+# FX Rate Tables
+"""
+Derives any number of FX (and metal) pairs from a few rate tables.
+
+exchangerate-api.com returns, per base currency, the rates of ~160
+currencies (and XAU). Instead of downloading a table per pair, the
+engine fetches each base table once per refresh (FX_RATE_BASES, USD by
+default) and derives every pair from it:
+
+- direct:   EURUSD from the EUR table   -> rates['USD']
+- inverted: EURUSD from the USD table   -> 1 / rates['EUR']
+- crossed:  EURGBP from the USD table   -> rates['GBP'] / rates['EUR']
+
+Concurrent requests for the same table share one in-flight fetch, and
+tables are reused for FX_RATE_MAX_AGE_SECONDS, so a refresh of hundreds
+of pairs costs one HTTP call per base. Table downloads go through the
+'forex_api' circuit breaker: while the API is down, lookups return None
+at once instead of waiting for the request timeout.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+import requests
+
+from .circuit_breaker import CircuitBreaker
+from .metrics import timed_price_fetch
+from .tracing import traced
+
+logger = logging.getLogger(__name__)
+
+FOREX_RATES_URL = "https://api.exchangerate-api.com/v4/latest/{base}"
+
+
+class FxRateConfig:
+    """FX rate table configuration"""
+
+    def __init__(self):
+        # Tables fetched on every refresh; pairs are derived from these first
+        self.BASES = [b.strip().upper() for b in os.getenv('FX_RATE_BASES', 'USD').split(',') if b.strip()]
+        self.MAX_AGE_SECONDS = float(os.getenv('FX_RATE_MAX_AGE_SECONDS', '5'))
+        self.REQUEST_TIMEOUT_SECONDS = float(os.getenv('PRICE_REQUEST_TIMEOUT_SECONDS', '3'))
+        self.URL = os.getenv('FX_RATES_URL', FOREX_RATES_URL)
+
+
+class RateTable:
+    """Rates of all currencies against one base currency"""
+
+    def __init__(self, base: str, rates: Dict[str, float]):
+        self.base = base
+        self.rates = rates
+        self.fetched_at = time.monotonic()
+        self.timestamp = datetime.utcnow()
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+    def has(self, currency: str) -> bool:
+        return currency == self.base or bool(self.rates.get(currency))
+
+    def rate(self, base: str, quote: str) -> Optional[float]:
+        """Units of quote per unit of base (None if either currency is missing)"""
+        if base == quote:
+            return 1.0
+        if base == self.base:
+            return self.rates.get(quote)
+        quote_rate = 1.0 if quote == self.base else self.rates.get(quote)
+        base_rate = self.rates.get(base)
+        if not base_rate or quote_rate is None:
+            return None
+        return quote_rate / base_rate
+
+
+def split_pair(pair: str) -> Tuple[str, str]:
+    """'EURUSD' -> ('EUR', 'USD')"""
+    pair = pair.upper().replace('/', '')
+    if len(pair) != 6:
+        raise ValueError(f"Not a currency pair: {pair}")
+    return pair[:3], pair[3:]
+
+
+class FxRateEngine:
+    """Fetches base rate tables once per refresh and derives pairs from them"""
+
+    def __init__(self, config: Optional[FxRateConfig] = None, breaker: Optional[CircuitBreaker] = None):
+        self.config = config or FxRateConfig()
+        self.breaker = breaker or CircuitBreaker('forex_api')
+        self.tables: Dict[str, RateTable] = {}
+        # {base: fetch in progress}, shared by concurrent callers
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"table_fetches": 0, "table_errors": 0, "derived": 0}
+
+    def _fresh(self, base: str) -> Optional[RateTable]:
+        table = self.tables.get(base)
+        if table is not None and table.age_seconds < self.config.MAX_AGE_SECONDS:
+            return table
+        return None
+
+    def _store(self, base: str, data: Dict) -> RateTable:
+        table = RateTable(base, {k: float(v) for k, v in data['rates'].items() if v})
+        self.tables[base] = table
+        self.stats["table_fetches"] += 1
+        return table
+
+    def _failed(self, base: str, error: str, provider_down: bool = True):
+        """Record a failed table download (provider_down: count it against the breaker)"""
+        logger.warning("Forex API error for %s table: %s", base, error)
+        self.stats["table_errors"] += 1
+        if provider_down:
+            self.breaker.record_failure(error)
+        else:
+            self.breaker.record_success()
+
+    def _handle_response(self, base: str, response) -> Optional[RateTable]:
+        """Store a table from a requests/httpx response and report the outcome to the breaker"""
+        if response.status_code == 200:
+            table = self._store(base, response.json())
+            self.breaker.record_success()
+            return table
+        # An unknown base (4xx) is not an outage; rate limiting and 5xx are
+        status = response.status_code
+        self._failed(base, f"HTTP {status}", provider_down=status == 429 or status >= 500)
+        return None
+
+    def _bases_for(self, pair_base: str) -> List[str]:
+        """
+        Tables to try for a pair: configured bases, then the pair's own base
+
+        The own base is only tried if the configured tables downloaded but
+        do not list the pair's currencies.
+        """
+        bases = list(self.config.BASES)
+        if pair_base not in bases:
+            bases.append(pair_base)
+        return bases
+
+    def derive(self, pair: str, include_stale: bool = False) -> Optional[float]:
+        """
+        Rate of a pair from the tables already held (no fetching)
+
+        Args:
+            pair: Currency pair, e.g. 'EURGBP'
+            include_stale: Also use tables older than FX_RATE_MAX_AGE_SECONDS
+        """
+        base, quote = split_pair(pair)
+        tables = [
+            t for t in self.tables.values()
+            if t.has(base) and t.has(quote) and (include_stale or t.age_seconds < self.config.MAX_AGE_SECONDS)
+        ]
+        # Prefer a direct quote, then inverted, then crossed; newest first
+        tables.sort(key=lambda t: (t.base != base, t.base != quote, t.age_seconds))
+        for table in tables:
+            rate = table.rate(base, quote)
+            if rate:
+                self.stats["derived"] += 1
+                return rate
+        return None
+
+    # ============================================
+    # Blocking
+    # ============================================
+
+    @timed_price_fetch('exchangerate_api')
+    @traced('price_feed.exchangerate_api', kind='client')
+    def _download_table(self, base: str) -> Optional[RateTable]:
+        try:
+            response = requests.get(self.config.URL.format(base=base), timeout=self.config.REQUEST_TIMEOUT_SECONDS)
+            return self._handle_response(base, response)
+        except Exception as e:
+            self._failed(base, str(e) or type(e).__name__)
+            return None
+
+    def fetch_table(self, base: str) -> Optional[RateTable]:
+        """Download one base table (blocking; None at once while the breaker is open)"""
+        if not self.breaker.allow():
+            return None
+        return self._download_table(base)
+
+    def get_rate(self, pair: str) -> Optional[float]:
+        """Rate of a pair, fetching a table only if no fresh one covers it"""
+        base, quote = split_pair(pair)
+        for table_base in self._bases_for(base):
+            table = self._fresh(table_base) or self.fetch_table(table_base)
+            if table is None:
+                # Provider down: the next table would fail (and count) as well
+                return None
+            if table.has(base) and table.has(quote):
+                return table.rate(base, quote)
+        return None
+
+    # ============================================
+    # Async
+    # ============================================
+
+    @timed_price_fetch('exchangerate_api')
+    @traced('price_feed.exchangerate_api', kind='client')
+    async def _fetch_table_async(self, base: str, client: httpx.AsyncClient) -> Optional[RateTable]:
+        try:
+            response = await client.get(self.config.URL.format(base=base))
+            return self._handle_response(base, response)
+        except asyncio.CancelledError:
+            # Cut off by a deadline: not a failure, but release a half-open trial
+            self.breaker.record_cancelled()
+            raise
+        except Exception as e:
+            self._failed(base, str(e) or type(e).__name__)
+            return None
+
+    async def get_table_async(self, base: str, client: httpx.AsyncClient, force: bool = False) -> Optional[RateTable]:
+        """
+        Fresh table for a base (force: download anyway); concurrent callers share one download
+
+        Returns None without a request while the breaker is open.
+        """
+        table = None if force else self._fresh(base)
+        if table is not None:
+            return table
+        task = self._inflight.get(base)
+        if task is None:
+            if not self.breaker.allow():
+                return None
+            task = asyncio.create_task(self._fetch_table_async(base, client))
+            self._inflight[base] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(base, None))
+        # Shielded: a caller hitting its deadline must not cancel the shared fetch
+        return await asyncio.shield(task)
+
+    async def get_rate_async(self, pair: str, client: httpx.AsyncClient) -> Optional[float]:
+        """Async get_rate()"""
+        base, quote = split_pair(pair)
+        for table_base in self._bases_for(base):
+            table = await self.get_table_async(table_base, client)
+            if table is None:
+                return None
+            if table.has(base) and table.has(quote):
+                return table.rate(base, quote)
+        return None
+
+    async def get_rates_async(
+        self,
+        pairs: Iterable[str],
+        client: httpx.AsyncClient,
+        force: bool = False
+    ) -> Dict[str, Optional[float]]:
+        """
+        Rates of many pairs (one download per configured base)
+
+        Pairs the configured tables downloaded fine but cannot price fall
+        back to their own base table. Each base is requested at most once
+        per refresh: after a failed download the pairs it would have priced
+        get None rather than another request to the same provider.
+
+        Args:
+            pairs: Currency pairs
+            client: Pooled HTTP client
+            force: Re-download the configured tables even if still fresh
+        """
+        tables = await asyncio.gather(*(self.get_table_async(base, client, force) for base in self.config.BASES))
+        configured_ok = all(table is not None for table in tables)
+        tried = set(self.config.BASES)
+        rates = {}
+        for pair in pairs:
+            rate = self.derive(pair)
+            if rate is None and configured_ok:
+                base = split_pair(pair)[0]
+                if base not in tried:
+                    tried.add(base)
+                    await self.get_table_async(base, client)
+                    rate = self.derive(pair)
+            rates[pair] = rate
+        return rates
+
+    def get_stats(self) -> Dict:
+        return {
+            "tables": {base: round(table.age_seconds, 1) for base, table in self.tables.items()},
+            **self.stats
+        }
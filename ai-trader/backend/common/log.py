@@ -0,0 +1,227 @@
+# Structured Logging
+"""
+Non-blocking JSON logging for the backend services.
+
+Modules log through the standard library:
+
+    logger = logging.getLogger(__name__)
+    logger.info("Signal queued", extra={"signal_id": signal.id})
+
+and each service calls setup_logging() once at startup, which installs:
+- a QueueHandler on the root logger: the calling coroutine only formats
+  the message and puts the record on a bounded in-memory queue (records
+  are dropped and counted, never waited for, when the queue is full);
+- a QueueListener thread that renders JSON lines (python-json-logger with
+  the orjson serializer) and writes them to stdout;
+- per-module levels (LOG_LEVELS="common.price_feed=WARNING,...");
+- sampling of repetitive warnings/errors: the same message from the same
+  logger is emitted LOG_SAMPLE_BURST times per LOG_SAMPLE_WINDOW_SECONDS,
+  further repeats are counted and reported on the next emitted record;
+- the active trace/span ids (common.tracing) on every record.
+"""
+import atexit
+import copy
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from pythonjsonlogger import jsonlogger
+
+from .serialization import dumps_str
+
+
+class LogConfig:
+    """Logging configuration"""
+
+    def __init__(self):
+        self.LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+        # 'json' (production) or 'text' (local development)
+        self.FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+        # Per-module levels: "common.price_feed=WARNING,sqlalchemy.engine=WARNING"
+        self.LEVELS = self._parse_levels(os.getenv('LOG_LEVELS', ''))
+        self.QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+        # Repetitive warning/error sampling (0 burst = disabled)
+        self.SAMPLE_WINDOW_SECONDS = float(os.getenv('LOG_SAMPLE_WINDOW_SECONDS', '60'))
+        self.SAMPLE_BURST = int(os.getenv('LOG_SAMPLE_BURST', '5'))
+
+    @staticmethod
+    def _parse_levels(value: str) -> Dict[str, str]:
+        """'a=DEBUG,b.c=WARNING' -> {'a': 'DEBUG', 'b.c': 'WARNING'}"""
+        levels = {}
+        for item in value.split(','):
+            if '=' in item:
+                name, level = item.split('=', 1)
+                levels[name.strip()] = level.strip().upper()
+        return levels
+
+
+class TraceContextFilter(logging.Filter):
+    """Attach the active span's ids (read in the calling task, before the queue hop)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        from .tracing import current_span
+
+        span = current_span()
+        if span is not None:
+            record.trace_id = span.context.trace_id
+            record.span_id = span.context.span_id
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Rate-limit identical warnings/errors per (logger, message template)"""
+
+    def __init__(self, window_seconds: float, burst: int):
+        super().__init__()
+        self.window_seconds = window_seconds
+        self.burst = burst
+        # {(logger, level, template): [window start, emitted, suppressed]}
+        self.windows: Dict[Tuple[str, int, str], list] = {}
+        self.suppressed_total = 0
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.burst <= 0 or record.levelno < logging.WARNING:
+            return True
+
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None or now - window[0] >= self.window_seconds:
+                suppressed = window[2] if window else 0
+                self.windows[key] = [now, 1, 0]
+                if len(self.windows) > 10000:
+                    self.windows.clear()
+                if suppressed:
+                    record.sampled_out = suppressed
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            self.suppressed_total += 1
+            return False
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking on a full queue"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args into the message here (they may not be thread-safe to
+        # format later) but leave the JSON rendering to the listener thread
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(jsonlogger.JsonFormatter):
+    """python-json-logger formatter using orjson, with service and ISO timestamps"""
+
+    def __init__(self, service: str):
+        super().__init__(
+            '%(levelname)s %(name)s %(message)s',
+            json_serializer=lambda obj, **_kwargs: dumps_str(obj),
+            rename_fields={'levelname': 'level', 'name': 'logger'},
+            timestamp=True
+        )
+        self.service = service
+
+    def add_fields(self, log_record: Dict, record: logging.LogRecord, message_dict: Dict):
+        super().add_fields(log_record, record, message_dict)
+        log_record['service'] = self.service
+
+
+class LoggingState:
+    """Handlers installed by setup_logging()"""
+
+    def __init__(self):
+        self.handler: Optional[NonBlockingQueueHandler] = None
+        self.sampler: Optional[SamplingFilter] = None
+        self.listener: Optional[logging.handlers.QueueListener] = None
+
+    def get_stats(self) -> Dict:
+        if not self.handler:
+            return {"configured": False}
+        return {
+            "configured": True,
+            "queue_depth": self.handler.queue.qsize(),
+            "dropped": self.handler.dropped,
+            "sampled_out": self.sampler.suppressed_total
+        }
+
+
+logging_state = LoggingState()
+
+
+def setup_logging(service: str, config: Optional[LogConfig] = None):
+    """
+    Route all logging through the background JSON writer (idempotent)
+
+    Args:
+        service: Service name added to every record
+        config: Logging settings (default: from environment)
+    """
+    if logging_state.listener is not None:
+        return
+    config = config or LogConfig()
+
+    output = logging.StreamHandler(sys.stdout)
+    if config.FORMAT == 'text':
+        output.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s %(name)s: %(message)s'))
+    else:
+        output.setFormatter(JsonFormatter(service))
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=config.QUEUE_SIZE))
+    sampler = SamplingFilter(config.SAMPLE_WINDOW_SECONDS, config.SAMPLE_BURST)
+    handler.addFilter(TraceContextFilter())
+    handler.addFilter(sampler)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(config.LEVEL)
+    for name, level in config.LEVELS.items():
+        logging.getLogger(name).setLevel(level)
+
+    # Route uvicorn's loggers through the same queue
+    for name in ('uvicorn', 'uvicorn.error', 'uvicorn.access'):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(shutdown_logging)
+
+    logging_state.handler = handler
+    logging_state.sampler = sampler
+    logging_state.listener = listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    if logging_state.listener is not None:
+        logging_state.listener.stop()
+        logging_state.listener = None
@@ -0,0 +1,391 @@
+# Prometheus Metrics
+"""
+Shared Prometheus instrumentation for the backend services.
+
+instrument_app() adds a request-latency middleware and a /metrics endpoint
+to a FastAPI app (deploy/prometheus.yml scrapes every service there).
+
+Hot paths stay cheap:
+- Label sets are small and bounded: the route *template* (not the raw
+  path), the method and the status class ('2xx', '5xx').
+- Labelled children are cached, so a request costs one dict lookup and one
+  histogram observe.
+- Gauges (queue depths, WebSocket connections, DB pools) are not updated
+  on every change but refreshed by on_scrape() callbacks when Prometheus
+  scrapes; pipeline latencies are read from common.timing's histograms at
+  scrape time as well.
+
+Risk and execution run in-process with the webhook in this deployment, so
+their metrics are served by the webhook's /metrics.
+"""
+import asyncio
+import functools
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple, Union
+
+from fastapi import FastAPI
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, HistogramMetricFamily
+
+from .timing import latency_registry
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsConfig:
+    """Metrics endpoint settings"""
+
+    def __init__(self):
+        self.ENABLED = os.getenv('PROMETHEUS_ENABLED', 'true').lower() == 'true'
+        self.PATH = os.getenv('METRICS_PATH', '/metrics')
+
+
+# ============================================
+# Metric definitions
+# ============================================
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency',
+    ['method', 'route', 'status']
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress',
+    'HTTP requests being served'
+)
+
+PIPELINE_STAGE_QUEUE_DEPTH = Gauge(
+    'pipeline_stage_queue_depth',
+    'Signals waiting on a pipeline stage queue',
+    ['stage']
+)
+PIPELINE_STAGE_BUSY = Gauge(
+    'pipeline_stage_busy_workers',
+    'Pipeline stage workers currently processing a signal',
+    ['stage']
+)
+SIGNAL_QUEUE_DEPTH = Gauge(
+    'signal_queue_depth',
+    'Durable signal queue depth',
+    ['state']
+)
+
+WEBSOCKET_CONNECTIONS = Gauge(
+    'websocket_connections',
+    'Open WebSocket connections',
+    ['room']
+)
+
+DB_POOL_CONNECTIONS = Gauge(
+    'db_pool_connections',
+    'Database connection pool usage',
+    ['engine', 'state']
+)
+
+PRICE_FETCH_SECONDS = Histogram(
+    'price_fetch_duration_seconds',
+    'Price feed fetch latency',
+    ['provider', 'outcome']
+)
+
+AI_PREDICTION_SECONDS = Histogram(
+    'ai_prediction_duration_seconds',
+    'Model inference latency',
+    ['model', 'outcome']
+)
+
+RISK_ASSESSMENTS = Counter(
+    'risk_assessments_total',
+    'Risk manager decisions',
+    ['decision']
+)
+RISK_STATE = Gauge(
+    'risk_state',
+    'Risk manager state (daily_pnl, consecutive_losses, kill_switch_active, ...)',
+    ['metric']
+)
+
+EXECUTION_ORDER_SECONDS = Histogram(
+    'execution_order_duration_seconds',
+    'Broker order round-trip latency',
+    ['operation', 'outcome']
+)
+
+
+class LatencyRegistryCollector:
+    """Exports common.timing's pipeline histograms as pipeline_latency_seconds{step}"""
+
+    def collect(self):
+        family = HistogramMetricFamily(
+            'pipeline_latency_seconds',
+            'Signal pipeline latency per stage, queue wait, external call and DB commit',
+            labels=['step']
+        )
+        for name, histogram in list(latency_registry.histograms.items()):
+            cumulative = 0
+            buckets = []
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                buckets.append((repr(bound / 1000), cumulative))
+            buckets.append(('+Inf', histogram.count))
+            family.add_metric([name], buckets, histogram.sum_ms / 1000)
+        yield family
+
+
+REGISTRY.register(LatencyRegistryCollector())
+
+
+class DbPoolCollector:
+    """Exports database.pool's per-pool checkout histograms and counters"""
+
+    def __init__(self, pool_stats: Dict[str, object]):
+        self.pool_stats = pool_stats
+
+    def collect(self):
+        checkout = HistogramMetricFamily(
+            'db_pool_checkout_seconds',
+            'Time to obtain a connection from the pool (waiting or connecting)',
+            labels=['engine']
+        )
+        timeouts = CounterMetricFamily('db_pool_timeouts', 'Pool checkouts that timed out', labels=['engine'])
+        leaks = CounterMetricFamily('db_pool_leaks', 'Connections reported as held too long', labels=['engine'])
+        for name, stats in list(self.pool_stats.items()):
+            cumulative = 0
+            buckets = []
+            for bound, count in zip(stats.buckets, stats.counts):
+                cumulative += count
+                buckets.append((repr(bound), cumulative))
+            buckets.append(('+Inf', stats.wait_count))
+            checkout.add_metric([name], buckets, stats.wait_sum)
+            timeouts.add_metric([name], stats.timeouts)
+            leaks.add_metric([name], stats.leaks_reported)
+        yield checkout
+        yield timeouts
+        yield leaks
+
+
+def instrument_db_pools(pool_stats: Dict[str, object]):
+    """Export database.pool.pool_stats (services that own the database engines)"""
+    REGISTRY.register(DbPoolCollector(pool_stats))
+
+
+# ============================================
+# Scrape-time gauges
+# ============================================
+
+ScrapeCallback = Callable[[], Union[None, Awaitable[None]]]
+scrape_callbacks: List[ScrapeCallback] = []
+
+
+def on_scrape(callback: ScrapeCallback):
+    """Register a (sync or async) callback that refreshes gauges before each scrape"""
+    scrape_callbacks.append(callback)
+
+
+async def refresh_gauges():
+    """Run the scrape callbacks; a failing callback leaves its gauges stale"""
+    for callback in scrape_callbacks:
+        try:
+            result = callback()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.warning("Metrics callback %s failed: %s", getattr(callback, '__name__', callback), e)
+
+
+def update_pipeline_gauges(stage_stats: Dict[str, Dict]):
+    """Stage queue depths and busy workers from StagedExecutor.get_stats()"""
+    for stage, stats in stage_stats.items():
+        PIPELINE_STAGE_QUEUE_DEPTH.labels(stage).set(stats["queue_depth"])
+        PIPELINE_STAGE_BUSY.labels(stage).set(stats["busy"])
+
+
+def update_queue_gauges(depth: Dict[str, int]):
+    """Durable queue depth from SignalQueue.depth() ('waiting', 'pending')"""
+    for state, value in depth.items():
+        SIGNAL_QUEUE_DEPTH.labels(state).set(value)
+
+
+def update_websocket_gauges(manager):
+    """
+    Connections per room of a common.websocket.ConnectionManager
+
+    Clients may join any /ws/{room}: rooms that are not a Room member are
+    counted under 'other', so the label set stays fixed.
+    """
+    from .websocket import ROOM_NAMES
+
+    counts = dict.fromkeys(ROOM_NAMES, 0)
+    counts['other'] = 0
+    for room, connections in list(manager.active_connections.items()):
+        room = getattr(room, 'value', room)
+        counts[room if room in ROOM_NAMES else 'other'] += len(connections)
+    for room, value in counts.items():
+        WEBSOCKET_CONNECTIONS.labels(room).set(value)
+
+
+def update_db_pool_gauges(engines: Dict[str, object]):
+    """
+    Pool usage per engine (sync Engine or AsyncEngine)
+
+    Pools without sizing (SQLite's NullPool/StaticPool) are skipped.
+    """
+    for name, engine in engines.items():
+        pool = engine.pool
+        if not hasattr(pool, 'checkedout'):
+            continue
+        DB_POOL_CONNECTIONS.labels(name, 'checked_out').set(pool.checkedout())
+        DB_POOL_CONNECTIONS.labels(name, 'checked_in').set(pool.checkedin())
+        DB_POOL_CONNECTIONS.labels(name, 'overflow').set(max(0, pool.overflow()))
+        DB_POOL_CONNECTIONS.labels(name, 'size').set(pool.size())
+
+
+def update_risk_gauges(risk_metrics: Dict):
+    """Numeric entries of RiskManager.get_risk_metrics()"""
+    for name, value in risk_metrics.items():
+        if isinstance(value, (bool, int, float)):
+            RISK_STATE.labels(name).set(float(value))
+
+
+# ============================================
+# Timing decorators
+# ============================================
+
+def timed_price_fetch(provider: str):
+    """Time a (sync or async) price fetch; a None result counts as an error"""
+    def decorator(func):
+        ok = PRICE_FETCH_SECONDS.labels(provider, 'ok')
+        error = PRICE_FETCH_SECONDS.labels(provider, 'error')
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                result = None
+                try:
+                    result = await func(*args, **kwargs)
+                    return result
+                finally:
+                    (ok if result is not None else error).observe(time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                (ok if result is not None else error).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def timed_order(operation: str):
+    """Time a broker call returning an OrderResult (outcome from result.success)"""
+    def decorator(func):
+        ok = EXECUTION_ORDER_SECONDS.labels(operation, 'ok')
+        error = EXECUTION_ORDER_SECONDS.labels(operation, 'error')
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                success = getattr(result, 'success', False)
+                (ok if success else error).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# ============================================
+# FastAPI integration
+# ============================================
+
+class RouteTemplates:
+    """Route template of a handled request: '/signals/{id}' rather than '/signals/42'"""
+
+    def __init__(self, fastapi_app: FastAPI):
+        self.fastapi_app = fastapi_app
+        # {endpoint: route template}, rebuilt when routes are added
+        self._templates: Dict[Callable, str] = {}
+        self._route_count = 0
+
+    def resolve(self, scope) -> str:
+        """Template for an ASGI scope after routing ('unmatched' for 404s)"""
+        route = scope.get('route')
+        if route is not None:
+            return route.path
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return 'unmatched'
+        if len(self.fastapi_app.routes) != self._route_count:
+            self._templates = {
+                route.endpoint: route.path
+                for route in self.fastapi_app.routes
+                if hasattr(route, 'endpoint')
+            }
+            self._route_count = len(self.fastapi_app.routes)
+        return self._templates.get(endpoint, 'unmatched')
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording http_request_duration_seconds"""
+
+    def __init__(self, app, fastapi_app: FastAPI):
+        self.app = app
+        self.routes = RouteTemplates(fastapi_app)
+        # {(method, route, status class): histogram child}
+        self._children: Dict[Tuple[str, str, str], Histogram] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        start = time.perf_counter()
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            key = (scope['method'], self.routes.resolve(scope), f"{status_code // 100}xx")
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = HTTP_REQUEST_SECONDS.labels(*key)
+            child.observe(time.perf_counter() - start)
+
+
+def instrument_app(app: FastAPI, config: MetricsConfig = None):
+    """
+    Add request metrics and the /metrics endpoint to a service
+
+    Args:
+        app: FastAPI application
+        config: Metrics settings (default: from environment)
+    """
+    config = config or MetricsConfig()
+    if not config.ENABLED:
+        return
+
+    app.add_middleware(MetricsMiddleware, fastapi_app=app)
+
+    @app.get(config.PATH, include_in_schema=False)
+    async def metrics():
+        await refresh_gauges()
+        return Response(generate_latest(REGISTRY), headers={"Content-Type": CONTENT_TYPE_LATEST})
@@ -0,0 +1,375 @@
+# Staged Pipeline Executor
+"""
+Runs the signal pipeline as a chain of stages (AI + risk -> LLM -> execution),
+each with its own worker pool, bounded queue and concurrency cap.
+
+A signal moves to the next stage by being put on that stage's queue. When a
+stage is saturated its queue fills up, the upstream workers block on put(),
+and eventually submit() blocks - the pipeline workers then stop pulling from
+the durable signal queue, whose backlog the webhook uses to shed load.
+Slow stages (LLM) therefore cannot spawn unbounded concurrent calls, and
+fast stages keep draining independently.
+
+Each signal carries a deadline derived from its timeframe. Stages read the
+remaining budget from the context and may degrade (skip the LLM, reuse a
+cached prediction); a signal whose deadline passed before a stage starts is
+failed with DeadlineExceeded.
+
+The context also carries the signal's latency breakdown (monotonic clock):
+the executor times queue waits and stages, stages time their external
+calls and DB commits with ctx.measure(); see common.timing. Stages and
+measured blocks are traced as spans of the signal's trace (common.tracing).
+"""
+import asyncio
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from .timing import latency_registry
+from .tracing import SpanContext, tracer
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(Exception):
+    """A signal ran out of its time budget"""
+
+    def __init__(self, stage: str, overdue_seconds: float):
+        self.stage = stage
+        self.overdue_seconds = overdue_seconds
+        super().__init__(f"Deadline exceeded before {stage} stage ({overdue_seconds:.1f}s over budget)")
+
+
+def normalize_timeframe(timeframe: Optional[str]) -> Optional[str]:
+    """
+    Normalize TradingView/MT5 timeframe notations to '<n><m|h|d|w>'
+
+    '5', 'M5', '5m' -> '5m'; '60', 'H1', '1h' -> '1h'; 'D', 'D1', '1D' -> '1d'
+    """
+    if not timeframe:
+        return None
+    tf = timeframe.strip().lower()
+
+    # TradingView intervals in minutes ('1', '60', '240')
+    if tf.isdigit():
+        minutes = int(tf)
+        if minutes % 1440 == 0:
+            return f"{minutes // 1440}d"
+        if minutes % 60 == 0:
+            return f"{minutes // 60}h"
+        return f"{minutes}m"
+
+    match = re.fullmatch(r'(\d*)([mhdw])(\d*)', tf)
+    if not match or (match.group(1) and match.group(3)):
+        return tf
+    count = match.group(1) or match.group(3) or '1'
+    return f"{int(count)}{match.group(2)}"
+
+
+class PipelineConfig:
+    """Per-stage concurrency and queue limits"""
+
+    # Defaults per stage: (concurrency, queue size)
+    DEFAULT_LIMITS = {
+        'ai': (4, 100),
+        'llm': (2, 50),
+        'execution': (2, 50)
+    }
+
+    # Default signal deadlines per timeframe (seconds from receipt)
+    DEFAULT_DEADLINES = "1m=20,5m=60,15m=180,30m=300,1h=600,4h=1800,1d=3600"
+
+    def __init__(self):
+        # Webhook answers 503 when this many signals wait in the durable queue (0 = never)
+        self.MAX_BACKLOG = int(os.getenv('PIPELINE_MAX_BACKLOG', '1000'))
+
+        # Deadline budgets: per timeframe, fallback for unknown timeframes
+        self.DEADLINES = self._parse_deadlines(os.getenv('SIGNAL_DEADLINES', self.DEFAULT_DEADLINES))
+        self.DEFAULT_DEADLINE_SECONDS = float(os.getenv('SIGNAL_DEADLINE_SECONDS', '300'))
+
+        # Skip the LLM when less budget than this remains
+        self.LLM_MIN_BUDGET_SECONDS = float(os.getenv('PIPELINE_LLM_MIN_BUDGET_SECONDS', '5'))
+        # Budget kept back for execution when waiting on earlier stages
+        self.EXECUTION_RESERVE_SECONDS = float(os.getenv('PIPELINE_EXECUTION_RESERVE_SECONDS', '2'))
+
+        # Startup recovery of signals left unfinished by a previous run
+        self.RECOVERY_ENABLED = os.getenv('PIPELINE_RECOVERY_ENABLED', 'true').lower() == 'true'
+        self.RECOVERY_MAX_AGE_SECONDS = int(os.getenv('PIPELINE_RECOVERY_MAX_AGE_SECONDS', '3600'))
+        # Periodic sweep for signals that never reached the queue (0 = startup only);
+        # only signals received at least RECOVERY_MIN_AGE_SECONDS ago are re-enqueued
+        self.RECOVERY_INTERVAL_SECONDS = float(os.getenv('PIPELINE_RECOVERY_INTERVAL_SECONDS', '60'))
+        self.RECOVERY_MIN_AGE_SECONDS = float(os.getenv('PIPELINE_RECOVERY_MIN_AGE_SECONDS', '120'))
+        # Signals with a queue message are left to the workers until it is this old
+        # (a backlog would otherwise gain a duplicate message on every sweep)
+        self.RECOVERY_REQUEUE_AFTER_SECONDS = float(os.getenv('PIPELINE_RECOVERY_REQUEUE_AFTER_SECONDS', '900'))
+
+    @staticmethod
+    def _parse_deadlines(value: str) -> Dict[str, float]:
+        """'1m=20,1h=600' -> {'1m': 20.0, '1h': 600.0}"""
+        deadlines = {}
+        for item in value.split(','):
+            if '=' not in item:
+                continue
+            timeframe, seconds = item.split('=', 1)
+            deadlines[normalize_timeframe(timeframe)] = float(seconds)
+        return deadlines
+
+    def deadline_seconds(self, timeframe: Optional[str]) -> float:
+        """Time budget for a signal of the given timeframe"""
+        return self.DEADLINES.get(normalize_timeframe(timeframe), self.DEFAULT_DEADLINE_SECONDS)
+
+    def stage_limits(self, name: str) -> tuple:
+        """(concurrency, queue_size) for a stage, e.g. PIPELINE_LLM_CONCURRENCY"""
+        concurrency, queue_size = self.DEFAULT_LIMITS.get(name, (1, 100))
+        prefix = f"PIPELINE_{name.upper()}"
+        return (
+            int(os.getenv(f"{prefix}_CONCURRENCY", str(concurrency))),
+            int(os.getenv(f"{prefix}_QUEUE_SIZE", str(queue_size)))
+        )
+
+
+@dataclass
+class PipelineContext:
+    """State carried by a signal from stage to stage"""
+    signal_id: int
+    created_at: float = field(default_factory=time.monotonic)
+    stage: Optional[str] = None
+
+    # Absolute deadline (epoch seconds), set once the signal is loaded
+    deadline: Optional[float] = None
+    # Stages that ran in degraded mode to stay within the deadline
+    degraded: List[str] = field(default_factory=list)
+
+    # Stage outputs
+    prediction: Optional[Dict] = None
+    validation: Optional[Dict] = None
+    risk: Optional[Dict] = None
+
+    # Latency breakdown {name: ms}, see common.timing
+    timings: Dict[str, float] = field(default_factory=dict)
+    # perf_counter() when the signal was put on its current stage queue
+    enqueued_at: Optional[float] = None
+    # Parent of the stage spans (the signal's pipeline span)
+    trace: Optional[SpanContext] = None
+
+    # Fields persisted with stage checkpoints (see database.journal)
+    CHECKPOINT_FIELDS = ('deadline', 'prediction', 'validation', 'risk', 'timings')
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """State to journal when a stage completes"""
+        return {name: getattr(self, name) for name in self.CHECKPOINT_FIELDS if getattr(self, name) is not None}
+
+    def restore(self, outputs: Dict[str, Any]):
+        """Reload state journaled by completed stages"""
+        for name in self.CHECKPOINT_FIELDS:
+            if name in outputs:
+                setattr(self, name, outputs[name])
+
+    def set_deadline(self, received_at: datetime, budget_seconds: float):
+        """Deadline relative to when the signal was received (naive datetimes are UTC)"""
+        if received_at.tzinfo is None:
+            received_at = received_at.replace(tzinfo=timezone.utc)
+        self.deadline = received_at.timestamp() + budget_seconds
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline (None without a deadline)"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.time()
+
+    def check_deadline(self, stage: str):
+        """Raise DeadlineExceeded if the deadline has passed"""
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded(stage, -remaining)
+
+    def record_timing(self, name: str, value_ms: float):
+        """Add a measurement to the breakdown and the process-wide histogram"""
+        self.timings[name] = round(self.timings.get(name, 0.0) + value_ms, 3)
+        latency_registry.observe(name, value_ms)
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        """Time and trace a block (may contain awaits); blocks that raise are not timed"""
+        with tracer.span(name, attributes={"signal.id": self.signal_id}):
+            start = time.perf_counter()
+            yield
+            self.record_timing(name, (time.perf_counter() - start) * 1000)
+
+    def degrade(self, stage: str, reason: str):
+        """Record that a stage cut a corner to meet the deadline"""
+        self.degraded.append(stage)
+        logger.warning("%s stage degraded: %s", stage, reason, extra={"signal_id": self.signal_id})
+
+
+# Stage handler: returns True to pass the signal on, False when it is finished
+StageHandler = Callable[[PipelineContext], Awaitable[bool]]
+
+
+class Stage:
+    """One pipeline step with its own workers and bounded queue"""
+
+    def __init__(self, name: str, handler: StageHandler, concurrency: int = 1, queue_size: int = 100):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+        self.stats = {
+            "busy": 0,
+            "processed": 0,
+            "failed": 0,
+            "deadline_missed": 0,
+            "degraded": 0,
+            "total_ms": 0.0
+        }
+
+    def get_stats(self) -> Dict:
+        processed = self.stats["processed"] + self.stats["failed"] + self.stats["deadline_missed"]
+        return {
+            "concurrency": self.concurrency,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "queue_size": self.queue_size,
+            "busy": self.stats["busy"],
+            "processed": self.stats["processed"],
+            "failed": self.stats["failed"],
+            "deadline_missed": self.stats["deadline_missed"],
+            "degraded": self.stats["degraded"],
+            "avg_ms": round(self.stats["total_ms"] / processed, 2) if processed else None
+        }
+
+
+class StagedExecutor:
+    """Chains stages through bounded queues"""
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+        self.running = False
+
+    @property
+    def capacity(self) -> int:
+        """Signals the executor can hold at once (queued + being processed)"""
+        return sum(stage.concurrency + stage.queue_size for stage in self.stages)
+
+    async def start(self):
+        """Create the stage queues and spawn the workers"""
+        self.running = True
+        for index, stage in enumerate(self.stages):
+            stage.queue = asyncio.Queue(maxsize=stage.queue_size)
+            stage.workers = [
+                asyncio.create_task(self._worker(index))
+                for _ in range(stage.concurrency)
+            ]
+        limits = ", ".join(f"{stage.name}={stage.concurrency}/{stage.queue_size}" for stage in self.stages)
+        logger.info("Staged pipeline executor started (%s)", limits)
+
+    async def stop(self):
+        """Cancel the workers; signals still queued are failed with CancelledError"""
+        self.running = False
+        for stage in self.stages:
+            for task in stage.workers:
+                task.cancel()
+            await asyncio.gather(*stage.workers, return_exceptions=True)
+            stage.workers = []
+
+            while stage.queue and not stage.queue.empty():
+                _ctx, future = stage.queue.get_nowait()
+                if not future.done():
+                    future.cancel()
+        logger.info("Staged pipeline executor stopped")
+
+    def stage_after(self, name: Optional[str]) -> Optional[str]:
+        """Stage following `name` (first stage for None, None after the last)"""
+        if name is None:
+            return self.stages[0].name
+        names = [stage.name for stage in self.stages]
+        index = names.index(name) + 1 if name in names else 0
+        return names[index] if index < len(names) else None
+
+    async def submit(self, ctx: PipelineContext, start_stage: Optional[str] = None) -> asyncio.Future:
+        """
+        Put a signal on a stage queue (waits while it is full)
+
+        Args:
+            ctx: Signal context
+            start_stage: Stage to start at (default: first; used to resume)
+
+        Returns:
+            Future resolved with the context once the last stage ran,
+            or with the exception raised by a stage
+        """
+        stage = next((s for s in self.stages if s.name == start_stage), self.stages[0])
+        future = asyncio.get_running_loop().create_future()
+        ctx.enqueued_at = time.perf_counter()
+        await stage.queue.put((ctx, future))
+        return future
+
+    async def run(self, ctx: PipelineContext, start_stage: Optional[str] = None) -> PipelineContext:
+        """Submit a signal and wait until it leaves the pipeline"""
+        return await (await self.submit(ctx, start_stage))
+
+    async def _worker(self, index: int):
+        """Stage worker: run the handler, then hand over to the next stage"""
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+
+        while True:
+            ctx, future = await stage.queue.get()
+            if future.done():
+                continue
+
+            ctx.stage = stage.name
+            stage.stats["busy"] += 1
+            start = time.perf_counter()
+            if ctx.enqueued_at is not None:
+                ctx.record_timing(f"queue.{stage.name}", (start - ctx.enqueued_at) * 1000)
+            try:
+                with tracer.span(f"pipeline.{stage.name}", parent=ctx.trace, attributes={
+                    "signal.id": ctx.signal_id,
+                    "pipeline.stage": stage.name,
+                    "pipeline.queue_ms": ctx.timings.get(f"queue.{stage.name}")
+                }) as span:
+                    ctx.check_deadline(stage.name)
+                    proceed = await stage.handler(ctx)
+                    if stage.name in ctx.degraded:
+                        span.set_attribute("pipeline.degraded", True)
+                stage.stats["processed"] += 1
+                ctx.record_timing(f"stage.{stage.name}", (time.perf_counter() - start) * 1000)
+                if stage.name in ctx.degraded:
+                    stage.stats["degraded"] += 1
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                if isinstance(e, DeadlineExceeded):
+                    stage.stats["deadline_missed"] += 1
+                else:
+                    stage.stats["failed"] += 1
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            finally:
+                stage.stats["busy"] -= 1
+                stage.stats["total_ms"] += (time.perf_counter() - start) * 1000
+
+            if proceed and next_stage:
+                # Blocks while the next stage is saturated (backpressure)
+                try:
+                    ctx.enqueued_at = time.perf_counter()
+                    await next_stage.queue.put((ctx, future))
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+            elif not future.done():
+                ctx.record_timing("pipeline.total", (time.monotonic() - ctx.created_at) * 1000)
+                future.set_result(ctx)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-stage queue depth and worker statistics"""
+        return {stage.name: stage.get_stats() for stage in self.stages}
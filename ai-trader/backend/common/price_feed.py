@@ -1,159 +1,358 @@
 # Real-time Price Feed Service
-import requests
-import time
-from typing import Dict, Optional
-from datetime import datetime, timedelta
+"""
+Live prices for the dashboard and the price broadcast.
+
+Two interfaces over the same providers and cache:
+- get_live_price() / get_all_prices(): blocking (requests), for scripts
+- get_live_price_async() / get_all_prices_async(): async, sharing one
+  pooled keep-alive httpx client; get_all_prices_async() fetches every
+  symbol concurrently and returns within PRICE_CYCLE_DEADLINE_SECONDS,
+  serving the last cached price (marked stale) for symbols that did not
+  answer in time
+
+Prices come from the providers of common.price_providers (Binance for
+crypto, FX and metal pairs derived from shared rate tables, or a recorded
+tick file), chosen per symbol by the provider registry with failover to
+the next provider. Async fetches are batched per provider, so all FX
+pairs cost one exchangerate-api request per refresh.
+
+Network providers sit behind circuit breakers (common.circuit_breaker).
+While a provider is failing, fetches return at once and the last good
+price is served, marked stale and tagged with its age and source.
+"""
+import asyncio
+import logging
+import os
+import random
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import datetime
+
+import httpx
+
+from .price_providers import PriceProvider, ProviderRegistry, create_registry
+
+logger = logging.getLogger(__name__)
+
+
+class PriceFeedConfig:
+    """Price feed configuration"""
 
-class PriceFeedService:
-    """Fetches real-time prices from various APIs"""
-    
     def __init__(self):
+        self.CACHE_SECONDS = float(os.getenv('PRICE_CACHE_SECONDS', '5'))
+        # Symbols of get_all_prices(); any currency pair is derived from the FX tables
+        self.SYMBOLS = [
+            s.strip().upper()
+            for s in os.getenv('PRICE_SYMBOLS', 'EURUSD,GBPUSD,USDJPY,XAUUSD,BTCUSD,ETHUSD').split(',')
+            if s.strip()
+        ]
+        # Per-request timeout and the budget for one get_all_prices_async() cycle
+        self.REQUEST_TIMEOUT_SECONDS = float(os.getenv('PRICE_REQUEST_TIMEOUT_SECONDS', '3'))
+        self.CYCLE_DEADLINE_SECONDS = float(os.getenv('PRICE_CYCLE_DEADLINE_SECONDS', '3.5'))
+        # Cached prices older than this are served marked stale
+        self.STALE_AFTER_SECONDS = float(os.getenv('PRICE_STALE_AFTER_SECONDS', '10'))
+        # WebSocket price broadcast period
+        self.BROADCAST_INTERVAL_SECONDS = float(os.getenv('PRICE_BROADCAST_INTERVAL_SECONDS', '2'))
+        # Pooled async client
+        self.MAX_CONNECTIONS = int(os.getenv('PRICE_HTTP_MAX_CONNECTIONS', '20'))
+        self.KEEPALIVE_SECONDS = float(os.getenv('PRICE_HTTP_KEEPALIVE_SECONDS', '30'))
+
+
+class PriceFeedService:
+    """Fetches real-time prices from the registered providers"""
+
+    def __init__(self, config: Optional[PriceFeedConfig] = None, registry: Optional[ProviderRegistry] = None):
+        self.config = config or PriceFeedConfig()
         self.cache = {}
-        self.cache_duration = 5  # Cache for 5 seconds
-        
+        self.cache_duration = self.config.CACHE_SECONDS
+        # Symbol -> providers in failover order (PRICE_PROVIDERS, PRICE_PROVIDER_ROUTES)
+        self.registry = registry or create_registry(timeout_seconds=self.config.REQUEST_TIMEOUT_SECONDS)
+        # Created on first async fetch (bound to the running event loop)
+        self._client: Optional[httpx.AsyncClient] = None
+        # Symbols with a fetch in flight, and background revalidations
+        self.refreshing: Set[str] = set()
+        self._revalidations: Set[asyncio.Task] = set()
+
     def _is_cache_valid(self, symbol: str) -> bool:
         """Check if cached price is still valid"""
         if symbol not in self.cache:
             return False
-        
+
         cache_entry = self.cache[symbol]
         age = (datetime.utcnow() - cache_entry['timestamp']).total_seconds()
         return age < self.cache_duration
-    
-    def get_binance_price(self, symbol: str) -> Optional[float]:
-        """Fetch crypto price from Binance API (free, no key needed)"""
-        try:
-            # Binance uses BTCUSDT format
-            binance_symbol = symbol.replace('USD', 'USDT')
-            
-            url = f"https://api.binance.com/api/v3/ticker/price"
-            params = {'symbol': binance_symbol}
-            
-            response = requests.get(url, params=params, timeout=3)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return float(data['price'])
-            
-            return None
-            
-        except Exception as e:
-            print(f"Binance API error for {symbol}: {e}")
-            return None
-    
-    def get_forex_price(self, symbol: str) -> Optional[float]:
-        """Fetch forex price from exchangerate API (free tier)"""
-        try:
-            # Extract base and quote currency
-            # EURUSD -> EUR/USD
-            base = symbol[:3]
-            quote = symbol[3:6]
-            
-            # Using exchangerate-api.com (free, no key for basic)
-            url = f"https://api.exchangerate-api.com/v4/latest/{base}"
-            
-            response = requests.get(url, timeout=3)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if quote in data['rates']:
-                    return data['rates'][quote]
-            
-            return None
-            
-        except Exception as e:
-            print(f"Forex API error for {symbol}: {e}")
-            return None
-    
-    def get_gold_price(self) -> Optional[float]:
-        """Fetch gold price (XAU/USD)"""
-        try:
-            # Try to get from metals-api or forex API
-            # The exchangerate API XAU rates are inverted
-            
-            # Method 1: Try direct USD to XAU conversion
-            url = "https://api.exchangerate-api.com/v4/latest/USD"
-            response = requests.get(url, timeout=3)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'XAU' in data['rates']:
-                    # This gives us how many ounces of gold = 1 USD
-                    # We need USD per ounce, so invert it
-                    usd_per_oz = 1.0 / data['rates']['XAU']
-                    
-                    # The returned value should be around 4000-4100
-                    if 3000 < usd_per_oz < 5000:  # Sanity check
-                        return usd_per_oz
-            
-            # If API fails or returns unrealistic value, use current approximate price
-            # Gold is trading around $4,065 as of November 2025
-            return 4065.0
-            
-        except Exception as e:
-            print(f"Gold price API error: {e}")
-            # Return current approximate gold price
-            return 4065.0
-    
-    def get_live_price(self, symbol: str) -> Dict:
-        """Get live price for any symbol with caching"""
-        
-        # Check cache first
-        if self._is_cache_valid(symbol):
-            return self.cache[symbol]['data']
-        
-        # Determine which API to use
-        price = None
-        
-        if symbol in ['BTCUSD', 'ETHUSD']:
-            # Crypto from Binance
-            price = self.get_binance_price(symbol)
-        elif symbol == 'XAUUSD':
-            # Gold
-            price = self.get_gold_price()
-        elif symbol in ['EURUSD', 'GBPUSD', 'USDJPY']:
-            # Forex
-            price = self.get_forex_price(symbol)
-        
+
+    # ============================================
+    # Cache (shared by sync and async fetchers)
+    # ============================================
+
+    def _store(self, symbol: str, price: Optional[float], source: Optional[str]) -> Dict:
+        """Build the price response and cache it"""
         # Calculate 24h change (simplified - using random for demo)
         # In production, you'd get this from the API or calculate from historical data
-        import random
         change_24h = (random.random() - 0.5) * 2  # -1% to +1%
-        
-        # Prepare response
+
         result = {
             'symbol': symbol,
             'price': price,
             'change_24h': change_24h,
             'timestamp': datetime.utcnow().isoformat(),
-            'source': 'binance' if symbol in ['BTCUSD', 'ETHUSD'] else 'forex_api'
+            'source': source
         }
-        
-        # Cache the result
+
         self.cache[symbol] = {
             'data': result,
             'timestamp': datetime.utcnow()
         }
-        
+
         return result
-    
+
+    @staticmethod
+    def _unavailable(provider: Optional[PriceProvider]) -> Optional[str]:
+        """Reason a provider is being skipped (its circuit is open), else None"""
+        if provider is not None and provider.breaker is not None and provider.breaker.is_open:
+            return f"{provider.name} unavailable (circuit {provider.breaker.state})"
+        return None
+
+    def _store_fetched(self, symbol: str, price: Optional[float], source: Optional[str]) -> Dict:
+        """
+        Cache a fetched price
+
+        A failed fetch keeps the last good price, which is returned marked
+        stale with its age and source (and ages until a provider answers).
+        """
+        cached = self.cache.get(symbol)
+        if price is None and cached and cached['data'].get('price') is not None:
+            error = self._unavailable(self.registry.primary(symbol)) or "fetch failed"
+            return {**self._cached(symbol, datetime.utcnow()), 'stale': True, 'error': error}
+        if source is None:
+            primary = self.registry.primary(symbol)
+            source = primary.name if primary else None
+        return self._store(symbol, price, source)
+
+    # ============================================
+    # Blocking fetchers
+    # ============================================
+
+    def get_live_price(self, symbol: str) -> Dict:
+        """Get live price for any symbol with caching (providers tried in failover order)"""
+
+        # Check cache first
+        if self._is_cache_valid(symbol):
+            return self.cache[symbol]['data']
+
+        for provider in self.registry.providers_for(symbol):
+            price = provider.get_price(symbol)
+            if price is not None:
+                return self._store_fetched(symbol, price, provider.name)
+
+        return self._store_fetched(symbol, None, None)
+
     def get_all_prices(self) -> Dict[str, Dict]:
-        """Get all prices for dashboard"""
-        symbols = ['EURUSD', 'GBPUSD', 'USDJPY', 'XAUUSD', 'BTCUSD', 'ETHUSD']
-        
+        """Get all prices for dashboard (sequential; see get_all_prices_async)"""
         prices = {}
-        for symbol in symbols:
+        for symbol in self.config.SYMBOLS:
             try:
                 prices[symbol] = self.get_live_price(symbol)
             except Exception as e:
-                print(f"Error fetching {symbol}: {e}")
+                logger.error("Price fetch failed for %s: %s", symbol, e)
                 # Fallback to cached or None
-                prices[symbol] = {
-                    'symbol': symbol,
-                    'price': None,
-                    'error': str(e)
-                }
-        
+                prices[symbol] = {**self._cached(symbol, datetime.utcnow()), 'stale': True, 'error': str(e)}
+
+        return prices
+
+    # ============================================
+    # Async fetchers (pooled keep-alive client)
+    # ============================================
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared async HTTP client (connection pool with keep-alive)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.config.REQUEST_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=self.config.MAX_CONNECTIONS,
+                    max_keepalive_connections=self.config.MAX_CONNECTIONS,
+                    keepalive_expiry=self.config.KEEPALIVE_SECONDS
+                )
+            )
+        return self._client
+
+    async def close(self):
+        """Close the async client's connections (call on shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _ask_provider(
+        self,
+        provider: PriceProvider,
+        symbols: List[str],
+        force: bool
+    ) -> Dict[str, Optional[float]]:
+        try:
+            return await provider.get_prices_async(symbols, self.client, force=force)
+        except Exception as e:
+            logger.error("Price provider %s failed for %s: %s", provider.name, ', '.join(symbols), e)
+            return {}
+
+    async def _fetch_prices_async(self, symbols: List[str], force: bool = False) -> Dict[str, Dict]:
+        """
+        Fetch symbols with failover and cache them
+
+        Each round asks every provider concurrently for the symbols routed
+        to it (one batch per provider); symbols left without a price move
+        on to their next provider.
+        """
+        fetched: Dict[str, Tuple[float, str]] = {}
+        pending = list(symbols)
+        attempt = 0
+        while pending:
+            groups = self.registry.group(pending, attempt)
+            if not groups:
+                break
+            results = await asyncio.gather(
+                *(self._ask_provider(provider, group, force) for provider, group in groups.items())
+            )
+            pending = []
+            for (provider, group), prices in zip(groups.items(), results):
+                for symbol in group:
+                    price = prices.get(symbol)
+                    if price is None:
+                        pending.append(symbol)
+                    else:
+                        fetched[symbol] = (price, provider.name)
+            attempt += 1
+
+        return {symbol: self._store_fetched(symbol, *fetched.get(symbol, (None, None))) for symbol in symbols}
+
+    async def _update_async(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Serve valid cache entries, fetch the rest"""
+        expired = [symbol for symbol in symbols if not self._is_cache_valid(symbol)]
+        prices = {symbol: self.cache[symbol]['data'] for symbol in symbols if symbol not in expired}
+        if expired:
+            prices.update(await self._fetch_prices_async(expired))
+        return prices
+
+    async def refresh_async(self, symbols: List[str]):
+        """
+        Re-fetch symbols regardless of cache age (background refresher)
+
+        Readers see the symbols as refreshing meanwhile.
+        """
+        self.refreshing.update(symbols)
+        try:
+            await self._fetch_prices_async(symbols, force=True)
+        finally:
+            self.refreshing.difference_update(symbols)
+
+    def _revalidate(self, symbol: str):
+        """Refresh a symbol in the background (at most one refresh per symbol)"""
+        if symbol in self.refreshing:
+            return
+        task = asyncio.create_task(self.refresh_async([symbol]))
+        self._revalidations.add(task)
+        task.add_done_callback(self._revalidations.discard)
+
+    async def get_live_price_async(self, symbol: str) -> Dict:
+        """
+        Async get_live_price() with stale-while-revalidate
+
+        An expired entry is returned at once (marked stale) while a
+        background refresh runs; only a symbol never fetched waits for the
+        provider.
+        """
+        if self._is_cache_valid(symbol):
+            return self.cache[symbol]['data']
+
+        if symbol in self.cache:
+            self._revalidate(symbol)
+            return self._cached(symbol, datetime.utcnow())
+
+        return (await self._fetch_prices_async([symbol]))[symbol]
+
+    def _cached(self, symbol: str, now: datetime) -> Dict:
+        entry = self.cache.get(symbol)
+        if entry is None:
+            return {
+                'symbol': symbol,
+                'price': None,
+                'stale': True,
+                'refreshing': symbol in self.refreshing,
+                'error': 'no price fetched yet'
+            }
+        age = (now - entry['timestamp']).total_seconds()
+        result = {
+            **entry['data'],
+            'age_ms': int(age * 1000),
+            'stale': age > self.config.STALE_AFTER_SECONDS,
+            'refreshing': symbol in self.refreshing
+        }
+        error = self._unavailable(self.registry.get(entry['data'].get('source')))
+        if error:
+            result['stale'] = True
+            result['error'] = error
+        return result
+
+    def get_provider_health(self) -> Dict[str, Dict]:
+        """Circuit breaker state and stats of every provider"""
+        return self.registry.get_stats()
+
+    def get_cached_prices(self, symbols: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Prices from memory only (kept warm by the background refresher)
+
+        Each entry carries its age, 'stale' (older than PRICE_STALE_AFTER_SECONDS)
+        and 'refreshing' (a fetch is in flight).
+        """
+        now = datetime.utcnow()
+        return {symbol: self._cached(symbol, now) for symbol in (symbols or self.config.SYMBOLS)}
+
+    async def get_all_prices_async(self, deadline_seconds: Optional[float] = None) -> Dict[str, Dict]:
+        """
+        Get all dashboard prices concurrently
+
+        Args:
+            deadline_seconds: Budget for the whole cycle (default PRICE_CYCLE_DEADLINE_SECONDS)
+
+        Returns:
+            {symbol: price data}; symbols still pending at the deadline get
+            their last cached price with its age and 'stale': True (or price None)
+        """
+        deadline = self.config.CYCLE_DEADLINE_SECONDS if deadline_seconds is None else deadline_seconds
+
+        # One task per primary provider (a provider prices its symbols in one batch)
+        tasks = {}
+        for symbols in self.registry.group(self.config.SYMBOLS).values():
+            task = asyncio.create_task(self._update_async(symbols))
+            tasks.update({symbol: task for symbol in symbols})
+
+        done, pending = set(), set()
+        if tasks:
+            done, pending = await asyncio.wait(set(tasks.values()), timeout=deadline)
+        for task in pending:
+            task.cancel()
+
+        prices = {}
+        now = datetime.utcnow()
+        for symbol in self.config.SYMBOLS:
+            task = tasks.get(symbol)
+            if task is None:
+                prices[symbol] = {**self._cached(symbol, now), 'error': 'no price provider for symbol'}
+                continue
+
+            if task in done and task.exception() is None:
+                prices[symbol] = task.result()[symbol]
+                continue
+
+            if task in done:
+                error = str(task.exception())
+                logger.error("Price fetch failed for %s: %s", symbol, error)
+            else:
+                error = f"no response within {deadline}s"
+
+            prices[symbol] = {**self._cached(symbol, now), 'stale': True, 'error': error}
+
         return prices
 
 
@@ -0,0 +1,307 @@
+# Price Providers
+"""
+Pluggable price sources and the registry that routes symbols to them.
+
+A PriceProvider prices the symbols it supports(), blocking (get_price) or
+async (get_prices_async, batched so a provider can price many symbols
+with one request). The ProviderRegistry orders the providers serving a
+symbol:
+
+- by priority: position in PRICE_PROVIDERS (default 'binance,forex_api'),
+- overridden per symbol by PRICE_PROVIDER_ROUTES, e.g.
+  'XAUUSD=replay,forex_api;BTCUSD=binance'.
+
+PriceFeedService asks the first provider and fails over to the next one
+for symbols that got no price (error, circuit open, symbol unknown).
+
+Providers:
+- binance:   crypto tickers, one request per symbol
+- forex_api: FX and metal pairs derived from shared rate tables (common.fx_rates)
+- replay:    recorded ticks from a CSV/Parquet file, no network (common.price_replay)
+"""
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional
+
+import httpx
+import requests
+
+from .circuit_breaker import CircuitBreaker
+from .fx_rates import FxRateEngine
+from .metrics import timed_price_fetch
+from .tracing import traced
+
+logger = logging.getLogger(__name__)
+
+BINANCE_TICKER_URL = "https://api.binance.com/api/v3/ticker/price"
+
+CRYPTO_SYMBOLS = ['BTCUSD', 'ETHUSD']
+
+# Plausible XAUUSD range; rates outside it are treated as a failed fetch
+GOLD_SANITY_RANGE = (1000.0, 10000.0)
+
+
+class ProviderConfig:
+    """Provider selection configuration"""
+
+    def __init__(self):
+        # Provider names in priority order
+        self.PROVIDERS = [
+            p.strip().lower()
+            for p in os.getenv('PRICE_PROVIDERS', 'binance,forex_api').split(',')
+            if p.strip()
+        ]
+        # Per-symbol provider order: "SYMBOL=provider,provider;SYMBOL=provider"
+        self.ROUTES: Dict[str, List[str]] = {}
+        for route in os.getenv('PRICE_PROVIDER_ROUTES', '').split(';'):
+            if '=' not in route:
+                continue
+            symbol, providers = route.split('=', 1)
+            self.ROUTES[symbol.strip().upper()] = [p.strip().lower() for p in providers.split(',') if p.strip()]
+
+
+class PriceProvider:
+    """Base class of price sources"""
+
+    name = 'provider'
+
+    def __init__(self):
+        # Providers calling external services set a breaker
+        self.breaker: Optional[CircuitBreaker] = None
+
+    def supports(self, symbol: str) -> bool:
+        raise NotImplementedError
+
+    def get_price(self, symbol: str) -> Optional[float]:
+        """Price of one symbol (blocking); None if unavailable"""
+        raise NotImplementedError
+
+    async def get_price_async(self, symbol: str, client: httpx.AsyncClient) -> Optional[float]:
+        """Async get_price()"""
+        raise NotImplementedError
+
+    async def get_prices_async(
+        self,
+        symbols: List[str],
+        client: httpx.AsyncClient,
+        force: bool = False
+    ) -> Dict[str, Optional[float]]:
+        """
+        Prices of many symbols (one concurrent request per symbol unless overridden)
+
+        Args:
+            symbols: Symbols this provider supports
+            client: Pooled HTTP client
+            force: Bypass provider-side caches
+        """
+        prices = await asyncio.gather(*(self.get_price_async(symbol, client) for symbol in symbols))
+        return dict(zip(symbols, prices))
+
+    def get_stats(self) -> Dict:
+        return self.breaker.get_stats() if self.breaker else {}
+
+
+class BinanceProvider(PriceProvider):
+    """Crypto prices from the Binance ticker API (free, no key needed)"""
+
+    name = 'binance'
+
+    def __init__(self, symbols: Optional[List[str]] = None, timeout_seconds: float = 3.0):
+        super().__init__()
+        self.symbols = set(symbols or CRYPTO_SYMBOLS)
+        self.timeout_seconds = timeout_seconds
+        self.breaker = CircuitBreaker(self.name)
+
+    def supports(self, symbol: str) -> bool:
+        return symbol in self.symbols
+
+    @staticmethod
+    def _binance_symbol(symbol: str) -> str:
+        # Binance uses BTCUSDT format
+        return symbol.replace('USD', 'USDT')
+
+    def _handle_response(self, symbol: str, response) -> Optional[float]:
+        """Price from a requests/httpx response; reports the outcome to the breaker"""
+        if response.status_code == 200:
+            price = float(response.json()['price'])
+            self.breaker.record_success()
+            return price
+
+        # An unknown symbol (4xx) is not an outage; rate limiting and 5xx are
+        if response.status_code == 429 or response.status_code >= 500:
+            self.breaker.record_failure(f"HTTP {response.status_code}")
+        else:
+            self.breaker.record_success()
+        logger.warning("Binance returned %d for %s", response.status_code, symbol)
+        return None
+
+    @timed_price_fetch('binance')
+    @traced('price_feed.binance', kind='client')
+    def _request(self, symbol: str) -> Optional[float]:
+        try:
+            params = {'symbol': self._binance_symbol(symbol)}
+            response = requests.get(BINANCE_TICKER_URL, params=params, timeout=self.timeout_seconds)
+            return self._handle_response(symbol, response)
+
+        except Exception as e:
+            logger.warning("Binance API error for %s: %s", symbol, e)
+            self.breaker.record_failure(str(e) or type(e).__name__)
+            return None
+
+    @timed_price_fetch('binance')
+    @traced('price_feed.binance', kind='client')
+    async def _request_async(self, symbol: str, client: httpx.AsyncClient) -> Optional[float]:
+        try:
+            response = await client.get(BINANCE_TICKER_URL, params={'symbol': self._binance_symbol(symbol)})
+            return self._handle_response(symbol, response)
+        except asyncio.CancelledError:
+            # Cut off by a deadline: not a failure, but release a half-open trial
+            self.breaker.record_cancelled()
+            raise
+        except Exception as e:
+            logger.warning("Binance API error for %s: %s", symbol, e)
+            self.breaker.record_failure(str(e) or type(e).__name__)
+            return None
+
+    def get_price(self, symbol: str) -> Optional[float]:
+        """Ticker price (None at once while the breaker is open)"""
+        if not self.breaker.allow():
+            return None
+        return self._request(symbol)
+
+    async def get_price_async(self, symbol: str, client: httpx.AsyncClient) -> Optional[float]:
+        if not self.breaker.allow():
+            return None
+        return await self._request_async(symbol, client)
+
+
+class ForexProvider(PriceProvider):
+    """FX and metal pairs from the exchangerate API rate tables (direct, inverted or crossed)"""
+
+    name = 'forex_api'
+
+    def __init__(self, fx: Optional[FxRateEngine] = None):
+        super().__init__()
+        self.fx = fx or FxRateEngine()
+        self.breaker = self.fx.breaker
+
+    def supports(self, symbol: str) -> bool:
+        return symbol not in CRYPTO_SYMBOLS and len(symbol) == 6 and symbol.isalpha()
+
+    @staticmethod
+    def _checked(symbol: str, rate: Optional[float]) -> Optional[float]:
+        """Drop implausible gold rates (the last good price is served instead)"""
+        if symbol != 'XAUUSD' or rate is None:
+            return rate
+        low, high = GOLD_SANITY_RANGE
+        if low < rate < high:
+            return rate
+
+        logger.warning("Discarding implausible XAUUSD rate %.2f", rate)
+        return None
+
+    def get_price(self, symbol: str) -> Optional[float]:
+        try:
+            return self._checked(symbol, self.fx.get_rate(symbol))
+        except Exception as e:
+            logger.warning("Forex rate error for %s: %s", symbol, e)
+            return None
+
+    async def get_price_async(self, symbol: str, client: httpx.AsyncClient) -> Optional[float]:
+        try:
+            return self._checked(symbol, await self.fx.get_rate_async(symbol, client))
+        except Exception as e:
+            logger.warning("Forex rate error for %s: %s", symbol, e)
+            return None
+
+    async def get_prices_async(
+        self,
+        symbols: List[str],
+        client: httpx.AsyncClient,
+        force: bool = False
+    ) -> Dict[str, Optional[float]]:
+        """All pairs from one rate-table refresh"""
+        rates = await self.fx.get_rates_async(symbols, client, force=force)
+        return {symbol: self._checked(symbol, rates.get(symbol)) for symbol in symbols}
+
+    def get_stats(self) -> Dict:
+        return {**super().get_stats(), "fx_tables": self.fx.get_stats()}
+
+
+class ProviderRegistry:
+    """Symbol -> providers in priority order"""
+
+    def __init__(self, routes: Optional[Dict[str, List[str]]] = None):
+        # Registration order is the default priority
+        self.providers: Dict[str, PriceProvider] = {}
+        self.routes = routes or {}
+        # {symbol: ordered providers}, rebuilt when providers change
+        self._resolved: Dict[str, List[PriceProvider]] = {}
+
+    def register(self, provider: PriceProvider):
+        """Add a provider after the ones already registered (replaces one of the same name)"""
+        self.providers[provider.name] = provider
+        self._resolved.clear()
+
+    def get(self, name: Optional[str]) -> Optional[PriceProvider]:
+        return self.providers.get(name) if name else None
+
+    def providers_for(self, symbol: str) -> List[PriceProvider]:
+        """Providers able to price a symbol, in failover order"""
+        resolved = self._resolved.get(symbol)
+        if resolved is None:
+            names = self.routes.get(symbol, list(self.providers))
+            resolved = [
+                self.providers[name] for name in names
+                if name in self.providers and self.providers[name].supports(symbol)
+            ]
+            self._resolved[symbol] = resolved
+        return resolved
+
+    def primary(self, symbol: str) -> Optional[PriceProvider]:
+        providers = self.providers_for(symbol)
+        return providers[0] if providers else None
+
+    def group(self, symbols: List[str], attempt: int = 0) -> Dict[PriceProvider, List[str]]:
+        """
+        Symbols grouped by their provider for one attempt
+
+        Args:
+            symbols: Symbols to price
+            attempt: 0 for the primary provider, 1 for the first failover, ...
+
+        Returns:
+            {provider: symbols}; symbols with no provider left are omitted
+        """
+        groups: Dict[PriceProvider, List[str]] = {}
+        for symbol in symbols:
+            providers = self.providers_for(symbol)
+            if attempt < len(providers):
+                groups.setdefault(providers[attempt], []).append(symbol)
+        return groups
+
+    def get_stats(self) -> Dict[str, Dict]:
+        return {name: provider.get_stats() for name, provider in self.providers.items()}
+
+
+def create_registry(config: Optional[ProviderConfig] = None, timeout_seconds: float = 3.0) -> ProviderRegistry:
+    """
+    Registry of the providers named in PRICE_PROVIDERS
+
+    Raises:
+        ValueError: Unknown provider name
+    """
+    config = config or ProviderConfig()
+    registry = ProviderRegistry(config.ROUTES)
+    for name in config.PROVIDERS:
+        if name == BinanceProvider.name:
+            registry.register(BinanceProvider(timeout_seconds=timeout_seconds))
+        elif name == ForexProvider.name:
+            registry.register(ForexProvider())
+        elif name == 'replay':
+            from .price_replay import ReplayProvider
+            registry.register(ReplayProvider.from_env())
+        else:
+            raise ValueError(f"Unknown price provider '{name}' in PRICE_PROVIDERS")
+    return registry
@@ -0,0 +1,139 @@
+# Background Price Refresher
+"""
+Keeps PriceFeedService.cache warm so readers never wait on a provider.
+
+One loop per provider re-fetches the symbols it is the primary provider of
+on its own schedule (Binance every PRICE_REFRESH_BINANCE_SECONDS, the FX
+rate tables every PRICE_REFRESH_FOREX_SECONDS, a replay file every
+PRICE_REFRESH_REPLAY_SECONDS), each refresh bounded by
+PRICE_CYCLE_DEADLINE_SECONDS. /api/prices/live and the WebSocket price
+broadcast read price_feed.get_cached_prices(), which only touches memory:
+entries carry their age and are marked stale/refreshing rather than
+blocking while a provider is slow or down.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from .price_feed import PriceFeedService, price_feed
+
+logger = logging.getLogger(__name__)
+
+
+class RefresherConfig:
+    """Background refresher configuration"""
+
+    def __init__(self):
+        self.ENABLED = os.getenv('PRICE_REFRESHER_ENABLED', 'true').lower() == 'true'
+        # Refresh interval per provider (seconds)
+        self.INTERVALS = {
+            'binance': float(os.getenv('PRICE_REFRESH_BINANCE_SECONDS', '2')),
+            'forex_api': float(os.getenv('PRICE_REFRESH_FOREX_SECONDS', '5')),
+            'replay': float(os.getenv('PRICE_REFRESH_REPLAY_SECONDS', '0.5'))
+        }
+
+
+class ProviderSchedule:
+    """Refresh loop state of one provider"""
+
+    def __init__(self, provider: str, symbols: List[str], interval: float):
+        self.provider = provider
+        self.symbols = symbols
+        self.interval = interval
+        self.task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.last_refresh_at: Optional[float] = None
+        self.last_duration_ms: Optional[float] = None
+
+    def get_stats(self) -> Dict:
+        return {
+            "symbols": self.symbols,
+            "interval_seconds": self.interval,
+            "refreshes": self.refreshes,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "last_refresh_age_seconds": (
+                round(time.monotonic() - self.last_refresh_at, 1) if self.last_refresh_at else None
+            ),
+            "last_duration_ms": self.last_duration_ms
+        }
+
+
+class PriceRefresher:
+    """Per-provider background refresh of the price feed cache"""
+
+    def __init__(self, feed: PriceFeedService, config: Optional[RefresherConfig] = None):
+        self.feed = feed
+        self.config = config or RefresherConfig()
+        self.schedules: Dict[str, ProviderSchedule] = {}
+
+    def _group_symbols(self) -> Dict[str, List[str]]:
+        """{primary provider: symbols} for the feed's configured symbols"""
+        groups = self.feed.registry.group(self.feed.config.SYMBOLS)
+        return {provider.name: symbols for provider, symbols in groups.items()}
+
+    async def start(self):
+        """Start one refresh loop per provider (the first refresh runs immediately)"""
+        if not self.config.ENABLED:
+            return
+        for provider, symbols in self._group_symbols().items():
+            interval = self.config.INTERVALS.get(provider, self.feed.config.CACHE_SECONDS)
+            schedule = ProviderSchedule(provider, symbols, interval)
+            schedule.task = asyncio.create_task(self._refresh_loop(schedule))
+            self.schedules[provider] = schedule
+        logger.info(
+            "Price refresher started (%s)",
+            ', '.join(f"{s.provider} every {s.interval}s" for s in self.schedules.values())
+        )
+
+    async def stop(self):
+        """Cancel the refresh loops"""
+        for schedule in self.schedules.values():
+            if schedule.task:
+                schedule.task.cancel()
+                try:
+                    await schedule.task
+                except asyncio.CancelledError:
+                    pass
+                schedule.task = None
+        self.schedules = {}
+
+    async def _refresh_loop(self, schedule: ProviderSchedule):
+        deadline = self.feed.config.CYCLE_DEADLINE_SECONDS
+        while True:
+            started = time.monotonic()
+            try:
+                await asyncio.wait_for(self.feed.refresh_async(schedule.symbols), timeout=deadline)
+                schedule.refreshes += 1
+                schedule.last_refresh_at = time.monotonic()
+            except asyncio.TimeoutError:
+                schedule.timeouts += 1
+                logger.warning("%s price refresh exceeded %ss", schedule.provider, deadline)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                schedule.errors += 1
+                logger.error("%s price refresh failed: %s", schedule.provider, e)
+
+            elapsed = time.monotonic() - started
+            schedule.last_duration_ms = round(elapsed * 1000, 1)
+            # Fixed-rate schedule: a slow refresh shortens the following pause
+            await asyncio.sleep(max(0.0, schedule.interval - elapsed))
+
+    @property
+    def running(self) -> bool:
+        return any(s.task is not None and not s.task.done() for s in self.schedules.values())
+
+    def get_stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "providers": {provider: s.get_stats() for provider, s in self.schedules.items()}
+        }
+
+
+# Global refresher for the global price feed
+price_refresher = PriceRefresher(price_feed)
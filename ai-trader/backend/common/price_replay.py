@@ -0,0 +1,172 @@
+# Price Replay Provider
+"""
+Replays recorded ticks as live prices, without network access.
+
+Load tests and benchmarks of the price -> WebSocket -> dashboard path
+set, for example:
+
+    PRICE_PROVIDERS=replay
+    PRICE_REPLAY_FILE=/data/ticks.parquet
+    PRICE_REPLAY_SPEED=10        # 10x recorded time
+
+The file has one row per tick with the columns timestamp, symbol and
+price (CSV with a header row, or Parquet, which needs pyarrow).
+Timestamps are ISO 8601 strings, datetimes, or epoch seconds/milliseconds.
+
+The replay clock starts at the first tick and advances PRICE_REPLAY_SPEED
+recorded seconds per wall-clock second; a symbol's price is its last tick
+at or before the clock (None before its first tick). With
+PRICE_REPLAY_LOOP the recording starts over at the end.
+"""
+import bisect
+import csv
+import logging
+import os
+import time
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from .price_providers import PriceProvider
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayConfig:
+    """Replay provider configuration"""
+
+    def __init__(self):
+        self.FILE = os.getenv('PRICE_REPLAY_FILE', '')
+        # Recorded seconds per wall-clock second
+        self.SPEED = float(os.getenv('PRICE_REPLAY_SPEED', '1'))
+        self.LOOP = os.getenv('PRICE_REPLAY_LOOP', 'true').lower() == 'true'
+
+
+def _epoch_seconds(value) -> float:
+    """Tick timestamp as epoch seconds (naive datetimes are UTC)"""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            return _epoch_seconds(datetime.fromisoformat(value.strip()))
+    value = float(value)
+    # Epoch milliseconds
+    return value / 1000 if value > 1e11 else value
+
+
+def _read_csv(path: Path) -> Iterable[Tuple[object, str, object]]:
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            yield row['timestamp'], row['symbol'], row['price']
+
+
+def _read_parquet(path: Path) -> Iterable[Tuple[object, str, object]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet replay files need the pyarrow package (or convert the file to CSV)")
+    columns = pq.read_table(path, columns=['timestamp', 'symbol', 'price']).to_pydict()
+    return zip(columns['timestamp'], columns['symbol'], columns['price'])
+
+
+class ReplayProvider(PriceProvider):
+    """Recorded ticks replayed at a configurable speed"""
+
+    name = 'replay'
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = True):
+        super().__init__()
+        if speed <= 0:
+            raise ValueError("PRICE_REPLAY_SPEED must be positive")
+        self.path = Path(path)
+        self.speed = speed
+        self.loop = loop
+        # {symbol: (tick times, prices)}, both sorted by time
+        self.ticks: Dict[str, Tuple[array, array]] = {}
+        self.tick_count = 0
+        self.start = 0.0
+        self.end = 0.0
+        self._load()
+        # Wall-clock start of the replay (set on the first price request)
+        self.started_at: Optional[float] = None
+
+    @classmethod
+    def from_env(cls, config: Optional[ReplayConfig] = None) -> 'ReplayProvider':
+        config = config or ReplayConfig()
+        if not config.FILE:
+            raise ValueError("PRICE_PROVIDERS includes 'replay' but PRICE_REPLAY_FILE is not set")
+        return cls(config.FILE, speed=config.SPEED, loop=config.LOOP)
+
+    def _load(self):
+        reader = _read_parquet if self.path.suffix.lower() in ('.parquet', '.pq') else _read_csv
+        rows: Dict[str, List[Tuple[float, float]]] = {}
+        for timestamp, symbol, price in reader(self.path):
+            if price in (None, ''):
+                continue
+            rows.setdefault(symbol.strip().upper(), []).append((_epoch_seconds(timestamp), float(price)))
+
+        for symbol, symbol_ticks in rows.items():
+            symbol_ticks.sort()
+            self.ticks[symbol] = (array('d', (t for t, _ in symbol_ticks)), array('d', (p for _, p in symbol_ticks)))
+            self.tick_count += len(symbol_ticks)
+        if not self.ticks:
+            raise ValueError(f"No ticks in replay file {self.path}")
+
+        self.start = min(times[0] for times, _ in self.ticks.values())
+        self.end = max(times[-1] for times, _ in self.ticks.values())
+        logger.info(
+            "Loaded %d ticks of %d symbols from %s (%.0fs recorded, replayed at %sx)",
+            self.tick_count, len(self.ticks), self.path, self.end - self.start, self.speed
+        )
+
+    def clock(self) -> float:
+        """Current replay position (recorded epoch seconds)"""
+        now = time.monotonic()
+        if self.started_at is None:
+            self.started_at = now
+        elapsed = (now - self.started_at) * self.speed
+        span = self.end - self.start
+        if self.loop and span > 0:
+            elapsed %= span
+        return self.start + min(elapsed, span)
+
+    def supports(self, symbol: str) -> bool:
+        return symbol in self.ticks
+
+    def get_price(self, symbol: str) -> Optional[float]:
+        entry = self.ticks.get(symbol)
+        if entry is None:
+            return None
+        times, prices = entry
+        index = bisect.bisect_right(times, self.clock()) - 1
+        return prices[index] if index >= 0 else None
+
+    async def get_price_async(self, symbol: str, client: httpx.AsyncClient) -> Optional[float]:
+        return self.get_price(symbol)
+
+    async def get_prices_async(
+        self,
+        symbols: List[str],
+        client: httpx.AsyncClient,
+        force: bool = False
+    ) -> Dict[str, Optional[float]]:
+        return {symbol: self.get_price(symbol) for symbol in symbols}
+
+    def get_stats(self) -> Dict:
+        return {
+            "file": str(self.path),
+            "symbols": sorted(self.ticks),
+            "ticks": self.tick_count,
+            "speed": self.speed,
+            "loop": self.loop,
+            "position": (
+                datetime.fromtimestamp(self.clock(), timezone.utc).isoformat() if self.started_at else None
+            )
+        }
@@ -0,0 +1,244 @@
+# Dashboard Query Result Cache
+"""
+Read-through cache for the dashboard's signal and trade queries.
+
+Results are cached per table ("signals", "trades") under a key built from
+the endpoint and its filters. Writers invalidate a table explicitly after
+committing, so every connected dashboard polling the same filters shares
+one query per change instead of one per poll. Concurrent misses for the
+same key in one process are coalesced into a single load.
+
+Each table carries a generation number that invalidation bumps; a load
+that started before an invalidation is not stored, so stale results do not
+outlive the write that made them stale (beyond the TTL for the Redis race
+window).
+
+Backends:
+- InMemoryQueryCache: per process
+- RedisQueryCache: shared by all webhook workers
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import redis.asyncio as redis
+
+from .serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCacheConfig:
+    """Query cache configuration"""
+
+    def __init__(self):
+        # Backend: 'redis', 'memory' or 'off'
+        self.BACKEND = os.getenv('QUERY_CACHE_BACKEND', 'redis').lower()
+        self.REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        self.KEY_PREFIX = os.getenv('QUERY_CACHE_KEY_PREFIX', 'trading:query_cache:')
+
+        # Safety net in case an invalidation is missed
+        self.TTL_SECONDS = int(os.getenv('QUERY_CACHE_TTL_SECONDS', '30'))
+        # In-memory capacity per table
+        self.MAX_ENTRIES = int(os.getenv('QUERY_CACHE_MAX_ENTRIES', '1000'))
+
+
+def cache_key(endpoint: str, **params) -> str:
+    """Stable key for an endpoint and its query parameters"""
+    parts = [f"{name}={params[name]}" for name in sorted(params) if params[name] is not None]
+    return f"{endpoint}?{'&'.join(parts)}"
+
+
+class QueryCache:
+    """Read-through logic shared by all backends"""
+
+    def __init__(self):
+        # {table:key: future} for loads in progress in this process
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "invalidations": 0
+        }
+
+    async def get(self, table: str, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, table: str, key: str, value: Any, generation: int):
+        """Store value unless the table was invalidated since `generation`"""
+        raise NotImplementedError
+
+    async def generation(self, table: str) -> int:
+        raise NotImplementedError
+
+    async def invalidate(self, *tables: str):
+        """Drop every cached result for the given tables"""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+    async def get_or_load(self, table: str, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached result or run loader() once and cache it
+
+        Args:
+            table: Table the result depends on (invalidation unit)
+            key: Endpoint + filters (see cache_key)
+            loader: Coroutine function producing a JSON-serializable result
+        """
+        cached = await self.get(table, key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached
+
+        flight_key = f"{table}:{key}"
+        inflight = self._inflight.get(flight_key)
+        if inflight is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[flight_key] = future
+        try:
+            generation = await self.generation(table)
+            value = await loader()
+            await self.set(table, key, value, generation)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else was waiting
+            raise
+        finally:
+            del self._inflight[flight_key]
+
+    def get_stats(self) -> Dict:
+        return {"backend": type(self).__name__, **self.stats}
+
+
+class InMemoryQueryCache(QueryCache):
+    """Per-process cache with TTL and LRU bound per table"""
+
+    def __init__(self, ttl_seconds: int = 30, max_entries: int = 1000):
+        super().__init__()
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # {table: OrderedDict{key: (expires_at_monotonic, value)}}
+        self._tables: Dict[str, "OrderedDict[str, Tuple[float, Any]]"] = {}
+        self._generations: Dict[str, int] = {}
+
+    async def get(self, table: str, key: str) -> Optional[Any]:
+        entries = self._tables.get(table)
+        if not entries or key not in entries:
+            return None
+        expires_at, value = entries[key]
+        if expires_at <= time.monotonic():
+            del entries[key]
+            return None
+        entries.move_to_end(key)
+        return value
+
+    async def set(self, table: str, key: str, value: Any, generation: int):
+        if self._generations.get(table, 0) != generation:
+            return
+        entries = self._tables.setdefault(table, OrderedDict())
+        entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    async def generation(self, table: str) -> int:
+        return self._generations.get(table, 0)
+
+    async def invalidate(self, *tables: str):
+        for table in tables:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            self._tables.pop(table, None)
+        self.stats["invalidations"] += 1
+
+
+class RedisQueryCache(QueryCache):
+    """Redis cache: one hash per table, dropped as a whole on invalidation"""
+
+    def __init__(self, client: redis.Redis, key_prefix: str, ttl_seconds: int = 30):
+        super().__init__()
+        self.client = client
+        self.key_prefix = key_prefix
+        self.ttl_seconds = ttl_seconds
+
+    def _hash_key(self, table: str) -> str:
+        return f"{self.key_prefix}{table}"
+
+    def _generation_key(self, table: str) -> str:
+        return f"{self.key_prefix}{table}:generation"
+
+    async def get(self, table: str, key: str) -> Optional[Any]:
+        value = await self.client.hget(self._hash_key(table), key)
+        return loads(value) if value is not None else None
+
+    async def set(self, table: str, key: str, value: Any, generation: int):
+        if await self.generation(table) != generation:
+            return
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(self._hash_key(table), key, dumps(value))
+            pipe.expire(self._hash_key(table), self.ttl_seconds)
+            await pipe.execute()
+
+    async def generation(self, table: str) -> int:
+        return int(await self.client.get(self._generation_key(table)) or 0)
+
+    async def invalidate(self, *tables: str):
+        async with self.client.pipeline(transaction=True) as pipe:
+            for table in tables:
+                pipe.incr(self._generation_key(table))
+                pipe.delete(self._hash_key(table))
+            await pipe.execute()
+        self.stats["invalidations"] += 1
+
+    async def close(self):
+        await self.client.close()
+
+
+class DisabledQueryCache(QueryCache):
+    """Pass-through used when QUERY_CACHE_BACKEND=off"""
+
+    async def get(self, table: str, key: str) -> Optional[Any]:
+        return None
+
+    async def set(self, table: str, key: str, value: Any, generation: int):
+        pass
+
+    async def generation(self, table: str) -> int:
+        return 0
+
+    async def invalidate(self, *tables: str):
+        pass
+
+
+async def create_query_cache(config: Optional[QueryCacheConfig] = None) -> QueryCache:
+    """
+    Create the configured cache backend
+
+    Falls back to the in-memory cache if Redis is unreachable.
+    """
+    config = config or QueryCacheConfig()
+
+    if config.BACKEND == 'off':
+        return DisabledQueryCache()
+
+    if config.BACKEND == 'redis':
+        try:
+            client = redis.from_url(config.REDIS_URL, encoding="utf-8", decode_responses=True)
+            await client.ping()
+            logger.info("Query cache connected to Redis")
+            return RedisQueryCache(client, config.KEY_PREFIX, config.TTL_SECONDS)
+        except Exception as e:
+            logger.warning("Redis query cache unavailable, using in-memory cache: %s", e)
+
+    return InMemoryQueryCache(config.TTL_SECONDS, config.MAX_ENTRIES)
@@ -0,0 +1,64 @@
+# Fast JSON Serialization
+"""
+orjson-based encoding shared by the HTTP endpoints and the WebSocket manager.
+
+orjson serializes datetime, date, Enum, UUID and dataclasses natively, so
+row serializers can hand over model values as-is instead of calling
+isoformat()/.value per field. Naive datetimes are written exactly like
+datetime.isoformat() (no offset), keeping the wire format unchanged.
+
+Endpoints returning FastJSONResponse directly also skip FastAPI's
+jsonable_encoder pass over the content.
+"""
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for types orjson does not handle natively"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if hasattr(obj, 'model_dump'):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes"""
+    return orjson.dumps(obj, default=_default, option=OPTIONS)
+
+
+def dumps_str(obj: Any) -> str:
+    """Serialize to a JSON string (WebSocket text frames, Redis)"""
+    return dumps(obj).decode('utf-8')
+
+
+loads = orjson.loads
+
+
+def csv_cell(value: Any) -> Any:
+    """Flatten a row value for csv.DictWriter"""
+    if isinstance(value, (list, dict)):
+        return dumps_str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
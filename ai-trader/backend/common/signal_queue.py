@@ -0,0 +1,542 @@
+# Durable Signal Ingest Queue
+"""
+Durable hand-off between the webhook and the signal processing pipeline.
+
+The webhook appends signal ids to a queue and returns; a pool of pipeline
+workers consumes them, acknowledging each message only after the pipeline
+finished. Messages that are not acknowledged (worker crash, process restart)
+are redelivered to another consumer after an idle timeout. While a signal
+runs, the pool refreshes the idle time of its message (heartbeat), so a
+signal that outlives the timeout is not redelivered alongside itself.
+
+Backends:
+- RedisStreamQueue: Redis Streams with a consumer group (production)
+- InMemorySignalQueue: in-process stand-in with the same semantics (tests, local)
+"""
+import asyncio
+import itertools
+import logging
+import os
+import socket
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import redis.asyncio as redis
+from redis.exceptions import ResponseError
+
+logger = logging.getLogger(__name__)
+
+
+class QueueConfig:
+    """Signal queue configuration"""
+
+    def __init__(self):
+        # Backend: 'redis' or 'memory'
+        self.BACKEND = os.getenv('SIGNAL_QUEUE_BACKEND', 'redis').lower()
+        self.REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        # Run on the in-memory queue (signals lost on restart) when Redis is down at startup
+        self.ALLOW_MEMORY_FALLBACK = os.getenv('SIGNAL_QUEUE_ALLOW_MEMORY_FALLBACK', 'false').lower() == 'true'
+
+        # Redis stream settings
+        self.STREAM = os.getenv('SIGNAL_QUEUE_STREAM', 'trading:signal_queue')
+        self.GROUP = os.getenv('SIGNAL_QUEUE_GROUP', 'pipeline')
+        self.MAX_LEN = int(os.getenv('SIGNAL_QUEUE_MAX_LEN', '100000'))
+
+        # Worker pool settings (0 = as many as the staged executor can hold)
+        self.MAX_IN_FLIGHT = int(os.getenv('PIPELINE_MAX_IN_FLIGHT', '0'))
+        self.CLAIM_IDLE_MS = int(os.getenv('SIGNAL_QUEUE_CLAIM_IDLE_MS', '60000'))
+        self.MAX_DELIVERIES = int(os.getenv('SIGNAL_QUEUE_MAX_DELIVERIES', '5'))
+        self.BLOCK_MS = int(os.getenv('SIGNAL_QUEUE_BLOCK_MS', '1000'))
+
+
+class SignalInProgress(Exception):
+    """Raised by the handler when the signal is already being processed (message stays unacked)"""
+    pass
+
+
+@dataclass
+class QueueMessage:
+    """A signal waiting to be processed"""
+    message_id: str
+    signal_id: int
+    deliveries: int = 1
+    # W3C trace context of the request that enqueued the signal
+    traceparent: Optional[str] = None
+
+
+class SignalQueue:
+    """Interface shared by all queue backends"""
+
+    # Why the queue runs on a fallback backend (None = configured backend)
+    degraded: Optional[str] = None
+    # Queued and unacked messages survive a restart of the service
+    durable: bool = True
+
+    async def enqueue(self, signal_id: int, traceparent: Optional[str] = None) -> str:
+        """Append a signal id (with the enqueuing trace context), returns the message id"""
+        raise NotImplementedError
+
+    async def enqueue_many(self, signal_ids: List[int], traceparent: Optional[str] = None) -> List[str]:
+        """Append several signal ids, returns their message ids"""
+        return [await self.enqueue(signal_id, traceparent) for signal_id in signal_ids]
+
+    async def consume(self, consumer: str, count: int = 1, block_ms: int = 1000) -> List[QueueMessage]:
+        """Read new messages for a consumer (blocks up to block_ms)"""
+        raise NotImplementedError
+
+    async def claim_stale(self, consumer: str, min_idle_ms: int, count: int = 1) -> List[QueueMessage]:
+        """Take over messages delivered to another consumer but not acked in time"""
+        raise NotImplementedError
+
+    async def touch(self, consumer: str, message_ids: List[str]):
+        """Reset the idle time of messages a consumer is still processing"""
+        raise NotImplementedError
+
+    async def ack(self, message_id: str):
+        """Acknowledge a processed message"""
+        raise NotImplementedError
+
+    async def depth(self) -> Dict[str, int]:
+        """Queue depth: messages waiting and delivered-but-unacked"""
+        raise NotImplementedError
+
+    async def close(self):
+        """Release backend resources"""
+        pass
+
+
+class InMemorySignalQueue(SignalQueue):
+    """In-process queue with ack/redelivery semantics (not durable across restarts)"""
+
+    durable = False
+
+    def __init__(self):
+        self._ready: asyncio.Queue = asyncio.Queue()
+        # {message_id: (message, delivered_at_monotonic)}
+        self._pending: Dict[str, Tuple[QueueMessage, float]] = {}
+        self._seq = itertools.count(1)
+
+    async def enqueue(self, signal_id: int, traceparent: Optional[str] = None) -> str:
+        message_id = f"{int(time.time() * 1000)}-{next(self._seq)}"
+        await self._ready.put(QueueMessage(
+            message_id=message_id,
+            signal_id=signal_id,
+            deliveries=0,
+            traceparent=traceparent
+        ))
+        return message_id
+
+    async def consume(self, consumer: str, count: int = 1, block_ms: int = 1000) -> List[QueueMessage]:
+        messages = []
+        try:
+            message = await asyncio.wait_for(self._ready.get(), timeout=block_ms / 1000)
+        except asyncio.TimeoutError:
+            return messages
+
+        messages.append(message)
+        while len(messages) < count and not self._ready.empty():
+            messages.append(self._ready.get_nowait())
+
+        now = time.monotonic()
+        for message in messages:
+            message.deliveries += 1
+            self._pending[message.message_id] = (message, now)
+        return messages
+
+    async def claim_stale(self, consumer: str, min_idle_ms: int, count: int = 1) -> List[QueueMessage]:
+        now = time.monotonic()
+        claimed = []
+        for message_id, (message, delivered_at) in list(self._pending.items()):
+            if len(claimed) >= count:
+                break
+            if (now - delivered_at) * 1000 >= min_idle_ms:
+                message.deliveries += 1
+                self._pending[message_id] = (message, now)
+                claimed.append(message)
+        return claimed
+
+    async def touch(self, consumer: str, message_ids: List[str]):
+        now = time.monotonic()
+        for message_id in message_ids:
+            entry = self._pending.get(message_id)
+            if entry:
+                self._pending[message_id] = (entry[0], now)
+
+    async def ack(self, message_id: str):
+        self._pending.pop(message_id, None)
+
+    async def depth(self) -> Dict[str, int]:
+        return {"waiting": self._ready.qsize(), "pending": len(self._pending)}
+
+
+class RedisStreamQueue(SignalQueue):
+    """Redis Streams queue using a consumer group for at-least-once delivery"""
+
+    def __init__(self, client: redis.Redis, stream: str, group: str, max_len: int = 100000):
+        self.client = client
+        self.stream = stream
+        self.group = group
+        self.max_len = max_len
+
+    async def ensure_group(self):
+        """Create the consumer group (and stream) if missing"""
+        try:
+            await self.client.xgroup_create(self.stream, self.group, id='0', mkstream=True)
+        except ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    @staticmethod
+    def _fields(signal_id: int, traceparent: Optional[str]) -> Dict[str, str]:
+        fields = {'signal_id': str(signal_id)}
+        if traceparent:
+            fields['traceparent'] = traceparent
+        return fields
+
+    async def enqueue(self, signal_id: int, traceparent: Optional[str] = None) -> str:
+        return await self.client.xadd(
+            self.stream,
+            self._fields(signal_id, traceparent),
+            maxlen=self.max_len,
+            approximate=True
+        )
+
+    async def enqueue_many(self, signal_ids: List[int], traceparent: Optional[str] = None) -> List[str]:
+        # Single round trip for the whole batch
+        async with self.client.pipeline(transaction=False) as pipe:
+            for signal_id in signal_ids:
+                pipe.xadd(
+                    self.stream,
+                    self._fields(signal_id, traceparent),
+                    maxlen=self.max_len,
+                    approximate=True
+                )
+            return await pipe.execute()
+
+    async def consume(self, consumer: str, count: int = 1, block_ms: int = 1000) -> List[QueueMessage]:
+        response = await self.client.xreadgroup(
+            self.group,
+            consumer,
+            streams={self.stream: '>'},
+            count=count,
+            block=block_ms
+        )
+        messages = []
+        for _stream, entries in response or []:
+            for message_id, fields in entries:
+                messages.append(QueueMessage(
+                    message_id=message_id,
+                    signal_id=int(fields['signal_id']),
+                    traceparent=fields.get('traceparent')
+                ))
+        return messages
+
+    async def claim_stale(self, consumer: str, min_idle_ms: int, count: int = 1) -> List[QueueMessage]:
+        # XAUTOCLAIM returns [next_start_id, entries] (Redis 6.2) or [next_start_id, entries, deleted] (Redis 7)
+        response = await self.client.xautoclaim(
+            self.stream,
+            self.group,
+            consumer,
+            min_idle_time=min_idle_ms,
+            start_id='0-0',
+            count=count
+        )
+        entries = response[1] if response else []
+        if not entries:
+            return []
+
+        # Delivery counts live in the pending entries list
+        message_ids = [message_id for message_id, fields in entries if fields]
+        deliveries = {}
+        if message_ids:
+            pending = await self.client.xpending_range(
+                self.stream, self.group,
+                min=message_ids[0], max=message_ids[-1],
+                count=len(message_ids), consumername=consumer
+            )
+            deliveries = {p['message_id']: p['times_delivered'] for p in pending}
+
+        messages = []
+        for message_id, fields in entries:
+            if not fields:
+                # Entry was trimmed from the stream; nothing left to process
+                await self.ack(message_id)
+                continue
+            messages.append(QueueMessage(
+                message_id=message_id,
+                signal_id=int(fields['signal_id']),
+                deliveries=deliveries.get(message_id, 2),
+                traceparent=fields.get('traceparent')
+            ))
+        return messages
+
+    async def touch(self, consumer: str, message_ids: List[str]):
+        # XCLAIM with JUSTID resets the idle time without counting a delivery
+        await self.client.xclaim(
+            self.stream, self.group, consumer,
+            min_idle_time=0,
+            message_ids=message_ids,
+            justid=True
+        )
+
+    async def ack(self, message_id: str):
+        await self.client.xack(self.stream, self.group, message_id)
+
+    async def depth(self) -> Dict[str, int]:
+        waiting = 0
+        groups = await self.client.xinfo_groups(self.stream)
+        for group in groups:
+            if group.get('name') == self.group:
+                # 'lag' is reported by Redis >= 7.0
+                waiting = group.get('lag') or 0
+                pending = group.get('pending', 0)
+                return {"waiting": waiting, "pending": pending}
+        return {"waiting": await self.client.xlen(self.stream), "pending": 0}
+
+    async def close(self):
+        await self.client.close()
+
+
+class PipelineWorkerPool:
+    """Consumes the signal queue and runs the pipeline with bounded concurrency"""
+
+    def __init__(
+        self,
+        queue: SignalQueue,
+        handler: Callable[[int, Optional[str]], Awaitable[None]],
+        max_in_flight: int = 8,
+        claim_idle_ms: int = 60000,
+        max_deliveries: int = 5,
+        block_ms: int = 1000,
+        max_backlog: int = 0
+    ):
+        """
+        Args:
+            queue: Signal queue backend
+            handler: Coroutine processing one signal id and its traceparent (the signal pipeline)
+            max_in_flight: Number of signals processed concurrently
+            claim_idle_ms: Unacked messages idle longer than this are redelivered
+                (in-flight messages are refreshed every claim_idle_ms / 3)
+            max_deliveries: Messages delivered more often are dropped (poison messages)
+            block_ms: How long an idle worker waits for new messages
+            max_backlog: Waiting messages above which is_overloaded() is True (0 = never)
+        """
+        self.queue = queue
+        self.handler = handler
+        self.max_in_flight = max_in_flight
+        self.claim_idle_ms = claim_idle_ms
+        self.max_deliveries = max_deliveries
+        self.block_ms = block_ms
+        self.max_backlog = max_backlog
+
+        # Backlog sample shared by concurrent is_overloaded() calls
+        self._backlog = 0
+        self._backlog_sampled_at = 0.0
+
+        self.consumer_prefix = f"{socket.gethostname()}-{os.getpid()}"
+        self.workers: List[asyncio.Task] = []
+        self.running = False
+
+        # In-flight slots and the tasks holding them
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._handlers: Set[asyncio.Task] = set()
+        # Messages being handled: {message_id: signal_id}
+        self._in_flight: Dict[str, int] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+        self.stats = {
+            "in_flight": 0,
+            "processed": 0,
+            "failed": 0,
+            "redelivered": 0,
+            "in_progress": 0,
+            "dead_lettered": 0,
+            "shed": 0
+        }
+
+    async def start(self):
+        """Start the consumer loop"""
+        self.running = True
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self.workers.append(asyncio.create_task(self._worker(self.consumer_prefix)))
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop(self.consumer_prefix))
+        logger.info("Pipeline worker pool started (up to %d signals in flight)", self.max_in_flight)
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop consuming and wait for in-flight signals to finish"""
+        self.running = False
+        if not self.workers:
+            return
+
+        await asyncio.wait(self.workers, timeout=self.block_ms / 1000 + 1)
+        handlers = self.workers + list(self._handlers)
+        done, still_running = await asyncio.wait(handlers, timeout=timeout)
+        for task in still_running:
+            # Unacked messages will be redelivered after restart
+            task.cancel()
+        self.workers = []
+        if self._heartbeat:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        logger.info("Pipeline worker pool stopped")
+
+    async def _worker(self, consumer: str):
+        """
+        Consumer loop: redeliveries first, then new messages
+
+        Reads one message per free in-flight slot and handles it in its own
+        task, so a single queue connection feeds up to max_in_flight signals.
+        """
+        while self.running:
+            await self._slots.acquire()
+            try:
+                messages = await self.queue.claim_stale(consumer, self.claim_idle_ms, count=1)
+                if messages:
+                    self.stats["redelivered"] += len(messages)
+                else:
+                    messages = await self.queue.consume(consumer, count=1, block_ms=self.block_ms)
+            except asyncio.CancelledError:
+                self._slots.release()
+                break
+            except Exception as e:
+                self._slots.release()
+                logger.error("Pipeline worker %s error: %s", consumer, e)
+                await asyncio.sleep(1)
+                continue
+
+            if not messages:
+                self._slots.release()
+                continue
+
+            message = messages[0]
+            if message.message_id in self._in_flight or message.signal_id in self._in_flight.values():
+                # Still running here: the running delivery acks its own message,
+                # a duplicate stays pending until the signal has finished
+                self.stats["in_progress"] += 1
+                self._slots.release()
+                continue
+
+            self._in_flight[message.message_id] = message.signal_id
+            task = asyncio.create_task(self._handle(message))
+            self._handlers.add(task)
+            task.add_done_callback(self._handler_done)
+
+    def _handler_done(self, task: asyncio.Task):
+        self._handlers.discard(task)
+        self._slots.release()
+
+    async def _heartbeat_loop(self, consumer: str):
+        """Keep in-flight messages from going idle, so no consumer reclaims them while they run"""
+        while True:
+            await asyncio.sleep(self.claim_idle_ms / 3000)
+            if not self._in_flight:
+                continue
+            try:
+                await self.queue.touch(consumer, list(self._in_flight))
+            except Exception as e:
+                logger.warning("Pipeline heartbeat failed: %s", e)
+
+    async def _handle(self, message: QueueMessage):
+        """Run the pipeline for one message and ack it on success"""
+        try:
+            await self._run(message)
+        finally:
+            self._in_flight.pop(message.message_id, None)
+
+    async def _run(self, message: QueueMessage):
+        if message.deliveries > self.max_deliveries:
+            logger.error(
+                "Dropping signal after %d failed deliveries", message.deliveries - 1,
+                extra={"signal_id": message.signal_id}
+            )
+            self.stats["dead_lettered"] += 1
+            await self.queue.ack(message.message_id)
+            return
+
+        self.stats["in_flight"] += 1
+        try:
+            await self.handler(message.signal_id, message.traceparent)
+            await self.queue.ack(message.message_id)
+            self.stats["processed"] += 1
+        except SignalInProgress:
+            # Left unacked - the delivery already running acks the signal's own message
+            logger.info("Signal already in progress, leaving message pending", extra={"signal_id": message.signal_id})
+            self.stats["in_progress"] += 1
+        except Exception as e:
+            # Left unacked - redelivered after claim_idle_ms
+            logger.error("Pipeline failed: %s", e, extra={"signal_id": message.signal_id})
+            self.stats["failed"] += 1
+        finally:
+            self.stats["in_flight"] -= 1
+
+    async def is_overloaded(self) -> bool:
+        """
+        True when more than max_backlog signals wait in the queue
+
+        The queue depth is sampled at most once per second.
+        """
+        if not self.max_backlog:
+            return False
+
+        now = time.monotonic()
+        if now - self._backlog_sampled_at >= 1.0:
+            self._backlog_sampled_at = now
+            try:
+                self._backlog = (await self.queue.depth()).get("waiting", 0)
+            except Exception:
+                self._backlog = 0
+
+        if self._backlog > self.max_backlog:
+            self.stats["shed"] += 1
+            return True
+        return False
+
+    async def get_stats(self) -> Dict:
+        """Worker and queue statistics"""
+        try:
+            depth = await self.queue.depth()
+        except Exception:
+            depth = {}
+        return {
+            "backend": type(self.queue).__name__,
+            "status": "degraded" if self.queue.degraded else "healthy",
+            "durable": self.queue.durable,
+            "degraded_reason": self.queue.degraded,
+            "max_in_flight": self.max_in_flight,
+            "max_backlog": self.max_backlog,
+            **self.stats,
+            **depth
+        }
+
+
+async def create_signal_queue(config: Optional[QueueConfig] = None) -> SignalQueue:
+    """
+    Create the configured queue backend
+
+    Raises:
+        RuntimeError: Redis is unreachable and SIGNAL_QUEUE_ALLOW_MEMORY_FALLBACK
+            is off (acking webhooks into a non-durable queue would lose signals
+            on restart)
+    """
+    config = config or QueueConfig()
+
+    if config.BACKEND == 'redis':
+        try:
+            client = redis.from_url(config.REDIS_URL, encoding="utf-8", decode_responses=True)
+            await client.ping()
+            queue = RedisStreamQueue(client, config.STREAM, config.GROUP, config.MAX_LEN)
+            await queue.ensure_group()
+            logger.info("Signal queue connected to Redis stream %r", config.STREAM)
+            return queue
+        except Exception as e:
+            if not config.ALLOW_MEMORY_FALLBACK:
+                raise RuntimeError(
+                    f"Redis signal queue unavailable ({e}); set SIGNAL_QUEUE_ALLOW_MEMORY_FALLBACK=true "
+                    "to run on the non-durable in-memory queue"
+                ) from e
+            logger.error("Redis signal queue unavailable, using the NON-DURABLE in-memory queue: %s", e)
+            queue = InMemorySignalQueue()
+            queue.degraded = f"Redis unavailable at startup ({e}); queued signals are lost on restart"
+            return queue
+
+    return InMemorySignalQueue()
@@ -0,0 +1,83 @@
+# Pipeline Latency Instrumentation
+"""
+Monotonic-clock timings for the signal pipeline.
+
+Per signal, a timing breakdown (ms per stage, queue wait, external call and
+DB commit) is collected on the PipelineContext (see PipelineContext.measure)
+and stored with the Prediction/Trade rows. Every measurement is also
+aggregated into an in-process fixed-bucket histogram, exposed through
+/api/pipeline/latency and /api/status.
+
+Names are dotted: 'stage.llm', 'queue.execution', 'ai.inference',
+'db.commit.ai', 'pipeline.total'.
+"""
+import bisect
+from typing import Dict, Optional, Tuple
+
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is unbounded
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    1, 2.5, 5, 10, 25, 50, 100, 250, 500,
+    1000, 2500, 5000, 10000, 30000, 60000
+)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (constant memory, O(log buckets) per sample)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float):
+        self.counts[bisect.bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.sum_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile, capped at the observed max"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return min(self.buckets[index], round(self.max_ms, 2)) if index < len(self.buckets) else round(self.max_ms, 2)
+        return round(self.max_ms, 2)
+
+    def summary(self) -> Dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.sum_ms / self.count, 2) if self.count else None,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 2)
+        }
+
+
+class LatencyRegistry:
+    """Named histograms for the whole process"""
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+    def observe(self, name: str, value_ms: float):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.observe(value_ms)
+
+    def summary(self) -> Dict[str, Dict]:
+        """Per-name count/avg/percentiles, sorted by name"""
+        return {name: self.histograms[name].summary() for name in sorted(self.histograms)}
+
+
+# Global latency registry
+latency_registry = LatencyRegistry()
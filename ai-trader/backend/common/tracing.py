@@ -0,0 +1,410 @@
+# Distributed Tracing
+"""
+Lightweight, OpenTelemetry-compatible tracing for offline deployments.
+
+- Trace context is propagated with the W3C `traceparent` header: HTTP
+  requests (TracingMiddleware), outbound calls (inject()) and the durable
+  signal queue (the webhook request's context travels with the message).
+- Spans are exported in the OTLP/JSON span shape (traceId, spanId,
+  parentSpanId, startTimeUnixNano, ...), so files written by
+  FileSpanExporter can be loaded into OTLP-aware tools.
+- Exporters: 'memory' keeps the most recent spans for /api/traces,
+  'file' appends JSON lines to TRACING_FILE from a writer thread.
+
+Pipeline spans carry a `signal.id` attribute; the spans of one signal
+(webhook request, stages, inference, LLM call, DB commits, order) share a
+trace id.
+
+Usage:
+    with tracer.span('llm.generate', kind='client') as span:
+        span.set_attribute('llm.model', model_name)
+        response = requests.post(url, headers=inject({}), ...)
+"""
+import asyncio
+import functools
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterator, List, Optional, Union
+
+from fastapi import FastAPI
+
+from .serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+
+class TracingConfig:
+    """Tracing configuration"""
+
+    def __init__(self):
+        self.ENABLED = os.getenv('TRACING_ENABLED', 'true').lower() == 'true'
+        self.SERVICE_NAME = os.getenv('OTEL_SERVICE_NAME', 'ai-trader')
+        # Comma-separated: 'memory', 'file'
+        self.EXPORTERS = [e.strip() for e in os.getenv('TRACING_EXPORTER', 'memory').lower().split(',') if e.strip()]
+        self.FILE = os.getenv('TRACING_FILE', 'traces.jsonl')
+        self.MEMORY_MAX_SPANS = int(os.getenv('TRACING_MEMORY_MAX_SPANS', '5000'))
+        # Fraction of new traces recorded (child spans follow their parent)
+        self.SAMPLE_RATIO = float(os.getenv('TRACING_SAMPLE_RATIO', '1.0'))
+
+
+TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+# OTLP span kinds
+SPAN_KINDS = {'internal': 1, 'server': 2, 'client': 3, 'producer': 4, 'consumer': 5}
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    """Identifies a span across process boundaries"""
+    trace_id: str
+    span_id: str
+    sampled: bool = True
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """SpanContext from a W3C traceparent header (None if absent or malformed)"""
+    if not value:
+        return None
+    match = TRACEPARENT_RE.match(value.strip().lower())
+    if not match or match.group(1) == '0' * 32 or match.group(2) == '0' * 16:
+        return None
+    return SpanContext(match.group(1), match.group(2), bool(int(match.group(3), 16) & 1))
+
+
+class Span:
+    """A timed operation within a trace"""
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        context: SpanContext,
+        parent_id: Optional[str],
+        kind: str,
+        attributes: Optional[Dict[str, Any]]
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Dict] = []
+        self.status = 'UNSET'
+        self.status_message: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException):
+        """Mark the span failed and attach the exception as an event"""
+        self.status = 'ERROR'
+        self.status_message = str(exc)[:500]
+        self.events.append({
+            "name": "exception",
+            "timeUnixNano": time.time_ns(),
+            "attributes": {"exception.type": type(exc).__name__, "exception.message": self.status_message}
+        })
+
+    def end(self):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if self.context.sampled:
+            self.tracer.export(self)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        """OTLP/JSON span representation (plus serviceName and durationMs)"""
+        return {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": SPAN_KINDS.get(self.kind, 1),
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round(self.duration_ms, 3) if self.end_ns else None,
+            "attributes": self.attributes,
+            "events": self.events,
+            "status": {"code": self.status, "message": self.status_message},
+            "serviceName": self.tracer.config.SERVICE_NAME
+        }
+
+
+class InMemorySpanExporter:
+    """Keeps the most recent finished spans (served by /api/traces)"""
+
+    def __init__(self, max_spans: int = 5000):
+        self.spans: Deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+    def get_trace(self, trace_id: str) -> List[Dict]:
+        return [s.to_dict() for s in self.spans if s.context.trace_id == trace_id]
+
+    def get_signal_spans(self, signal_id: int) -> List[Dict]:
+        """All spans of the traces that touched a signal"""
+        trace_ids = {s.context.trace_id for s in self.spans if s.attributes.get('signal.id') == signal_id}
+        return [s.to_dict() for s in self.spans if s.context.trace_id in trace_ids]
+
+    def shutdown(self):
+        pass
+
+
+class FileSpanExporter:
+    """
+    Appends finished spans as JSON lines, flushing in batches
+
+    Spans end on the event loop, so full batches are handed to a writer
+    thread (like the log QueueListener); the file is never opened or written
+    on the loop. Batches are dropped, and counted, when max_pending_batches
+    are already waiting for the disk.
+    """
+
+    def __init__(self, path: str, batch_size: int = 100, max_pending_batches: int = 100):
+        self.path = path
+        self.batch_size = batch_size
+        self.buffer: List[bytes] = []
+        self.dropped_spans = 0
+        self._dropping = False
+        # Batches waiting for the writer thread (None stops it)
+        self._batches: queue.Queue = queue.Queue(maxsize=max_pending_batches)
+        self._writer = threading.Thread(target=self._write_batches, name='span-file-writer', daemon=True)
+        self._writer.start()
+
+    def export(self, span: Span):
+        self.buffer.append(dumps(span.to_dict()))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Hand the buffered spans to the writer thread (never blocks)"""
+        if not self.buffer:
+            return
+        lines, self.buffer = self.buffer, []
+        try:
+            self._batches.put_nowait(lines)
+            self._dropping = False
+        except queue.Full:
+            self.dropped_spans += len(lines)
+            if not self._dropping:
+                # Once per overflow, not per batch
+                self._dropping = True
+                logger.warning("Span file writer is behind, dropping spans (%d so far)", self.dropped_spans)
+
+    def _write_batches(self):
+        while True:
+            lines = self._batches.get()
+            if lines is None:
+                return
+            try:
+                with open(self.path, 'ab') as f:
+                    f.write(b'\n'.join(lines) + b'\n')
+            except OSError as e:
+                logger.error("Failed to write %d spans to %s: %s", len(lines), self.path, e)
+
+    def shutdown(self, timeout: float = 5.0):
+        """Write the remaining spans and stop the writer thread"""
+        self.flush()
+        try:
+            self._batches.put(None, timeout=timeout)
+        except queue.Full:
+            logger.error("Span file writer did not drain in %.0fs, remaining spans are lost", timeout)
+            return
+        self._writer.join(timeout)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_traceparent() -> Optional[str]:
+    """traceparent of the active span, for hand-offs (queue messages, outbound calls)"""
+    span = _current_span.get()
+    return span.context.traceparent if span else None
+
+
+def inject(headers: Dict[str, str]) -> Dict[str, str]:
+    """Add the active span's traceparent to outbound request headers"""
+    traceparent = current_traceparent()
+    if traceparent:
+        headers['traceparent'] = traceparent
+    return headers
+
+
+ParentType = Union[Span, SpanContext, str, None]
+
+
+class Tracer:
+    """Creates spans and hands finished ones to the exporters"""
+
+    def __init__(self, config: Optional[TracingConfig] = None):
+        self.config = config or TracingConfig()
+        self.memory: Optional[InMemorySpanExporter] = None
+        self.exporters = []
+        if 'memory' in self.config.EXPORTERS:
+            self.memory = InMemorySpanExporter(self.config.MEMORY_MAX_SPANS)
+            self.exporters.append(self.memory)
+        if 'file' in self.config.EXPORTERS:
+            self.exporters.append(FileSpanExporter(self.config.FILE))
+
+    @staticmethod
+    def _new_id(bits: int) -> str:
+        return format(random.getrandbits(bits) or 1, f'0{bits // 4}x')
+
+    def start_span(
+        self,
+        name: str,
+        kind: str = 'internal',
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: ParentType = None
+    ) -> Span:
+        """
+        Start a span (call end() when done; prefer span())
+
+        Args:
+            name: Operation name
+            kind: internal, server, client, producer or consumer
+            attributes: Span attributes (e.g. {'signal.id': 42})
+            parent: Parent span, context or traceparent (default: the active span)
+        """
+        if isinstance(parent, str):
+            parent = parse_traceparent(parent)
+        elif parent is None:
+            parent = _current_span.get()
+        if isinstance(parent, Span):
+            parent = parent.context
+
+        if parent is not None:
+            context = SpanContext(parent.trace_id, self._new_id(64), parent.sampled)
+            parent_id = parent.span_id
+        else:
+            sampled = self.config.ENABLED and random.random() < self.config.SAMPLE_RATIO
+            context = SpanContext(self._new_id(128), self._new_id(64), sampled)
+            parent_id = None
+        return Span(self, name, context, parent_id, kind, attributes)
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        kind: str = 'internal',
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: ParentType = None
+    ) -> Iterator[Span]:
+        """Run a block in a new active span; exceptions mark it failed and propagate"""
+        span = self.start_span(name, kind, attributes, parent)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            if not isinstance(e, (GeneratorExit, asyncio.CancelledError)):
+                span.record_exception(e)
+            else:
+                span.set_attribute('cancelled', True)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def export(self, span: Span):
+        for exporter in self.exporters:
+            exporter.export(span)
+
+    def shutdown(self):
+        """Flush buffered spans (call on service shutdown)"""
+        for exporter in self.exporters:
+            exporter.shutdown()
+
+
+def traced(name: str, kind: str = 'internal'):
+    """Decorator running a sync or async function in a span"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(name, kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracingMiddleware:
+    """ASGI middleware: one server span per HTTP request, continuing an incoming traceparent"""
+
+    def __init__(self, app, fastapi_app: FastAPI):
+        from .metrics import RouteTemplates
+
+        self.app = app
+        self.routes = RouteTemplates(fastapi_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope['headers']:
+            if key == b'traceparent':
+                traceparent = value.decode('latin-1')
+                break
+
+        method = scope['method']
+        with tracer.span(method, kind='server', parent=traceparent, attributes={
+            "http.request.method": method,
+            "url.path": scope['path']
+        }) as span:
+            async def send_wrapper(message):
+                if message['type'] == 'http.response.start':
+                    span.set_attribute('http.response.status_code', message['status'])
+                    if message['status'] >= 500:
+                        span.status = 'ERROR'
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = self.routes.resolve(scope)
+                span.name = f"{method} {route}"
+                span.set_attribute('http.route', route)
+
+
+def instrument_app(app: FastAPI):
+    """Trace every HTTP request of a service"""
+    if tracer.config.ENABLED:
+        app.add_middleware(TracingMiddleware, fastapi_app=app)
+
+
+# Global tracer
+tracer = Tracer()
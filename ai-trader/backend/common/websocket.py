@@ -1,6 +1,6 @@
 # WebSocket Server for Real-time Updates
 import asyncio
-import json
+import logging
 from typing import Dict, Set, Optional
 from fastapi import WebSocket, WebSocketDisconnect, Depends
 from datetime import datetime
@@ -8,6 +8,9 @@ import redis.asyncio as redis
 from enum import Enum
 
 from .auth import verify_jwt_token
+from .serialization import dumps_str, loads
+
+logger = logging.getLogger(__name__)
 
 
 class Room(str, Enum):
@@ -20,6 +23,9 @@ class Room(str, Enum):
     PRICES = "prices"
 
 
+ROOM_NAMES = frozenset(room.value for room in Room)
+
+
 class ConnectionManager:
     """Manages WebSocket connections and broadcasting"""
     
@@ -46,12 +52,12 @@ class ConnectionManager:
                 encoding="utf-8",
                 decode_responses=True
             )
-            print("✅ WebSocket Redis connection established")
+            logger.info("WebSocket Redis connection established")
             
             # Start pub/sub listener
             self.pubsub_task = asyncio.create_task(self._redis_listener())
         except Exception as e:
-            print(f"❌ Failed to connect to Redis: {e}")
+            logger.error("WebSocket Redis connection failed: %s", e)
     
     async def _redis_listener(self):
         """Listen to Redis pub/sub channels and broadcast to WebSocket clients"""
@@ -64,7 +70,7 @@ class ConnectionManager:
         channels = [f"trading:{room}" for room in Room]
         await pubsub.subscribe(*channels)
         
-        print(f"✅ Subscribed to Redis channels: {channels}")
+        logger.info("Subscribed to Redis channels: %s", channels)
         
         try:
             async for message in pubsub.listen():
@@ -78,7 +84,7 @@ class ConnectionManager:
                     # Broadcast to WebSocket clients in that room
                     await self.broadcast_to_room(room, data)
         except Exception as e:
-            print(f"❌ Redis listener error: {e}")
+            logger.error("Redis listener error: %s", e)
     
     async def connect(self, websocket: WebSocket, room: str, token: Optional[str] = None):
         """
@@ -105,14 +111,14 @@ class ConnectionManager:
         self.active_connections[room].add(websocket)
         
         # Send welcome message
-        await websocket.send_json({
+        await websocket.send_text(dumps_str({
             "type": "connection",
             "status": "connected",
             "room": room,
-            "timestamp": datetime.utcnow().isoformat()
-        })
+            "timestamp": datetime.utcnow()
+        }))
         
-        print(f"✅ WebSocket connected to room: {room} (total: {len(self.active_connections[room])})")
+        logger.debug("WebSocket connected", extra={"room": room, "connections": len(self.active_connections[room])})
     
     def disconnect(self, websocket: WebSocket, room: str):
         """
@@ -123,15 +129,19 @@ class ConnectionManager:
             room: Room name
         """
         if room in self.active_connections:
-            self.active_connections[room].discard(websocket)
-            print(f"❌ WebSocket disconnected from room: {room} (remaining: {len(self.active_connections[room])})")
+            connections = self.active_connections[room]
+            connections.discard(websocket)
+            logger.debug("WebSocket disconnected", extra={"room": room, "connections": len(connections)})
+            # Rooms outside Room are created per client path; drop them once empty
+            if not connections and room not in ROOM_NAMES:
+                del self.active_connections[room]
     
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         """Send message to specific WebSocket connection"""
         try:
-            await websocket.send_json(message)
+            await websocket.send_text(dumps_str(message))
         except Exception as e:
-            print(f"❌ Error sending personal message: {e}")
+            logger.warning("Sending personal message failed: %s", e)
     
     async def broadcast_to_room(self, room: str, message: str or dict):
         """
@@ -147,22 +157,25 @@ class ConnectionManager:
         # Convert to dict if string (likely from Redis)
         if isinstance(message, str):
             try:
-                message = json.loads(message)
-            except json.JSONDecodeError:
+                message = loads(message)
+            except ValueError:
                 message = {"data": message}
         
         # Add timestamp if not present
         if "timestamp" not in message:
-            message["timestamp"] = datetime.utcnow().isoformat()
+            message["timestamp"] = datetime.utcnow()
+        
+        # Serialize once for the whole room
+        text = dumps_str(message)
         
         # Broadcast to all connected clients in room
         disconnected = set()
         
         for connection in self.active_connections[room]:
             try:
-                await connection.send_json(message)
+                await connection.send_text(text)
             except Exception as e:
-                print(f"❌ Error broadcasting to connection: {e}")
+                logger.warning("Broadcast to connection failed: %s", e, extra={"room": room})
                 disconnected.add(connection)
         
         # Remove disconnected clients
@@ -178,14 +191,14 @@ class ConnectionManager:
             message: Message dict to publish
         """
         if not self.redis_client:
-            print("⚠️  Redis not connected, skipping publish")
+            logger.warning("Redis not connected, skipping publish")
             return
         
         try:
             channel = f"trading:{room}"
-            await self.redis_client.publish(channel, json.dumps(message))
+            await self.redis_client.publish(channel, dumps_str(message))
         except Exception as e:
-            print(f"❌ Redis publish error: {e}")
+            logger.error("Redis publish failed: %s", e)
     
     async def broadcast_signal(self, signal_data: dict):
         """Helper: Broadcast new signal"""
@@ -194,6 +207,20 @@ class ConnectionManager:
             "data": signal_data
         })
     
+    async def broadcast_signal_update(self, signal_data: dict):
+        """Helper: Broadcast a change to an already broadcast signal"""
+        await self.broadcast_to_room(Room.SIGNALS, {
+            "type": "signal_update",
+            "data": signal_data
+        })
+    
+    async def broadcast_signals(self, signals_data: list):
+        """Helper: Broadcast a batch of new signals as one message"""
+        await self.broadcast_to_room(Room.SIGNALS, {
+            "type": "signals",
+            "data": signals_data
+        })
+    
     async def broadcast_trade(self, trade_data: dict):
         """Helper: Broadcast trade update"""
         await self.broadcast_to_room(Room.TRADES, {
@@ -276,5 +303,5 @@ async def websocket_endpoint(
     except WebSocketDisconnect:
         manager.disconnect(websocket, room)
     except Exception as e:
-        print(f"❌ WebSocket error: {e}")
+        logger.error("WebSocket error: %s", e, extra={"room": room})
         manager.disconnect(websocket, room)
@@ -1,8 +1,15 @@
 # Database package initialization
-from .db import get_db, get_db_session, init_db, check_database_health
+from .db import (
+    get_db, get_db_session, get_async_db, get_async_db_session,
+    init_db, check_database_health, get_pool_status
+)
+from .audit import AuditLogWriter, audit_writer
+from .health import HealthMonitor, health_monitor
+from .stats import rebuild_trading_stats, get_trading_stats
+from .journal import record_stage_completed, load_checkpoint, mark_enqueued, sweep_incomplete_signals
 from .models import (
     Signal, SignalStatus, SignalDirection,
     Prediction, Trade, TradeStatus, TradeDirection,
     Position, RiskMetrics, ModelVersion, AuditLog, SystemHealth,
-    UserSettings, User, UserRole
+    UserSettings, User, UserRole, TradingStats, PipelineProgress
 )
@@ -0,0 +1,217 @@
+# Group-commit Audit Log Writer
+"""
+Buffers AuditLog records in memory and writes them in bulk.
+
+Request handlers call audit_writer.record(...) which only appends to a
+bounded in-memory buffer. A background task flushes the buffer with one
+multi-row INSERT whenever it reaches AUDIT_BATCH_SIZE records or every
+AUDIT_FLUSH_INTERVAL_MS, and once more on shutdown.
+
+Repeated failures (e.g. a signature-failure flood from one IP) are sampled:
+only the first AUDIT_FAILURE_SAMPLE_LIMIT records per (event_type, ip)
+are kept per window, and the next kept record carries the number of
+suppressed ones.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from .db import async_engine
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+class AuditConfig:
+    """Audit writer configuration"""
+
+    def __init__(self):
+        self.BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '200'))
+        self.FLUSH_INTERVAL_MS = int(os.getenv('AUDIT_FLUSH_INTERVAL_MS', '1000'))
+        self.MAX_BUFFER = int(os.getenv('AUDIT_MAX_BUFFER', '10000'))
+
+        # Failure sampling
+        self.FAILURE_SAMPLE_LIMIT = int(os.getenv('AUDIT_FAILURE_SAMPLE_LIMIT', '10'))
+        self.FAILURE_SAMPLE_WINDOW_SECONDS = int(os.getenv('AUDIT_FAILURE_SAMPLE_WINDOW_SECONDS', '60'))
+
+
+class AuditLogWriter:
+    """Async audit sink with bounded buffer and group commit"""
+
+    def __init__(self, config: Optional[AuditConfig] = None):
+        self.config = config or AuditConfig()
+        self.buffer: List[Dict] = []
+        self.flush_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+        # {(event_type, ip_address): [window_start, count]}
+        self._failure_windows: Dict[Tuple[str, Optional[str]], List] = {}
+
+        self.stats = {
+            "recorded": 0,
+            "written": 0,
+            "flushes": 0,
+            "dropped": 0,
+            "sampled_out": 0,
+            "write_errors": 0
+        }
+
+    def record(
+        self,
+        event_type: str,
+        action: str,
+        success: bool,
+        **fields
+    ) -> bool:
+        """
+        Queue an audit record (non-blocking)
+
+        Args:
+            event_type: Event name (signal_received, webhook_signature_validation_failed, ...)
+            action: Action performed (create, update, receive_signal, ...)
+            success: Whether the action succeeded
+            **fields: Other AuditLog columns (ip_address, entity_type, entity_id, details, ...)
+
+        Returns:
+            True if buffered, False if sampled out or dropped
+        """
+        if not success and not self._sample_failure(event_type, fields):
+            self.stats["sampled_out"] += 1
+            return False
+
+        if len(self.buffer) >= self.config.MAX_BUFFER:
+            self.stats["dropped"] += 1
+            return False
+
+        self.buffer.append({
+            "timestamp": datetime.utcnow(),
+            "event_type": event_type,
+            "action": action,
+            "success": success,
+            "user_id": fields.get("user_id"),
+            "ip_address": fields.get("ip_address"),
+            "entity_type": fields.get("entity_type"),
+            "entity_id": fields.get("entity_id"),
+            "details": fields.get("details"),
+            "error_message": fields.get("error_message")
+        })
+        self.stats["recorded"] += 1
+
+        if len(self.buffer) >= self.config.BATCH_SIZE and self._wakeup:
+            self._wakeup.set()
+        return True
+
+    def _sample_failure(self, event_type: str, fields: Dict) -> bool:
+        """Keep the first N failures per (event_type, ip) per window"""
+        key = (event_type, fields.get("ip_address"))
+        now = time.monotonic()
+        window = self._failure_windows.get(key)
+
+        if window is None or now - window[0] >= self.config.FAILURE_SAMPLE_WINDOW_SECONDS:
+            suppressed = max(0, window[1] - self.config.FAILURE_SAMPLE_LIMIT) if window else 0
+            self._failure_windows[key] = [now, 1]
+            if suppressed:
+                details = dict(fields.get("details") or {})
+                details["suppressed_since_last"] = suppressed
+                fields["details"] = details
+            return True
+
+        window[1] += 1
+        return window[1] <= self.config.FAILURE_SAMPLE_LIMIT
+
+    def _prune_failure_windows(self):
+        """Forget expired windows, writing one summary row for suppressed failures"""
+        now = time.monotonic()
+        for key, (window_start, count) in list(self._failure_windows.items()):
+            if now - window_start < self.config.FAILURE_SAMPLE_WINDOW_SECONDS:
+                continue
+            del self._failure_windows[key]
+            suppressed = count - self.config.FAILURE_SAMPLE_LIMIT
+            if suppressed > 0 and len(self.buffer) < self.config.MAX_BUFFER:
+                event_type, ip_address = key
+                self.buffer.append({
+                    "timestamp": datetime.utcnow(),
+                    "event_type": event_type,
+                    "action": "sampled",
+                    "success": False,
+                    "user_id": None,
+                    "ip_address": ip_address,
+                    "entity_type": None,
+                    "entity_id": None,
+                    "details": {"suppressed_since_last": suppressed},
+                    "error_message": None
+                })
+
+    async def start(self):
+        """Start the background flush loop"""
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self.flush_task = asyncio.create_task(self._flush_loop())
+        logger.info("Audit log writer started")
+
+    async def stop(self):
+        """Stop the flush loop and write everything still buffered"""
+        if self.flush_task:
+            self.flush_task.cancel()
+            try:
+                await self.flush_task
+            except asyncio.CancelledError:
+                pass
+            self.flush_task = None
+
+        await self.flush()
+        logger.info("Audit log writer stopped (%d records written)", self.stats['written'])
+
+    async def _flush_loop(self):
+        """Flush on size threshold or interval"""
+        interval = self.config.FLUSH_INTERVAL_MS / 1000
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                self._prune_failure_windows()
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Audit flush loop error: %s", e)
+
+    async def flush(self):
+        """Write buffered records with one multi-row INSERT"""
+        if not self.buffer:
+            return
+
+        lock = self._flush_lock or asyncio.Lock()
+        async with lock:
+            rows, self.buffer = self.buffer, []
+            try:
+                async with async_engine.begin() as conn:
+                    await conn.execute(insert(AuditLog.__table__), rows)
+                self.stats["written"] += len(rows)
+                self.stats["flushes"] += 1
+            except Exception as e:
+                self.stats["write_errors"] += 1
+                # Put rows back (oldest first) as far as the buffer bound allows
+                room = self.config.MAX_BUFFER - len(self.buffer)
+                kept = rows[:max(0, room)]
+                self.stats["dropped"] += len(rows) - len(kept)
+                self.buffer = kept + self.buffer
+                logger.error("Audit log flush failed (%d records): %s", len(rows), e)
+
+    def get_stats(self) -> Dict:
+        """Writer statistics"""
+        return {"buffered": len(self.buffer), **self.stats}
+
+
+# Global audit writer
+audit_writer = AuditLogWriter()
@@ -1,12 +1,19 @@
 # Database Configuration and Session Management
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import QueuePool
-from contextlib import contextmanager
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from contextlib import contextmanager, asynccontextmanager
+import logging
 import os
-from typing import Generator
+from typing import Generator, AsyncGenerator
 
 from .models import Base
+from .pool import (
+    InstrumentedQueuePool, InstrumentedAsyncAdaptedQueuePool,
+    instrument_engine, get_pool_stats
+)
+
+logger = logging.getLogger(__name__)
 
 
 class DatabaseConfig:
@@ -26,6 +33,30 @@ class DatabaseConfig:
         
         # Echo SQL (disable in production)
         self.ECHO_SQL = os.getenv('DB_ECHO_SQL', 'false').lower() == 'true'
+        
+        # Async driver URL (asyncpg for Postgres, aiosqlite for local SQLite)
+        self.ASYNC_DATABASE_URL = os.getenv(
+            'ASYNC_DATABASE_URL',
+            to_async_url(self.DATABASE_URL)
+        )
+
+
+def to_async_url(url: str) -> str:
+    """
+    Map a sync DATABASE_URL onto its async driver equivalent
+    
+    postgresql://...  -> postgresql+asyncpg://...
+    sqlite:///...     -> sqlite+aiosqlite:///...
+    """
+    if url.startswith('postgresql+asyncpg://') or url.startswith('sqlite+aiosqlite://'):
+        return url
+    if url.startswith('postgresql://') or url.startswith('postgresql+psycopg2://'):
+        return 'postgresql+asyncpg://' + url.split('://', 1)[1]
+    if url.startswith('postgres://'):
+        return 'postgresql+asyncpg://' + url.split('://', 1)[1]
+    if url.startswith('sqlite://'):
+        return 'sqlite+aiosqlite://' + url.split('://', 1)[1]
+    return url
 
 
 # Global configuration
@@ -34,7 +65,8 @@ config = DatabaseConfig()
 # Create engine with connection pooling
 engine = create_engine(
     config.DATABASE_URL,
-    poolclass=QueuePool,
+    poolclass=InstrumentedQueuePool,
+    pool_logging_name='sync',
     pool_size=config.POOL_SIZE,
     max_overflow=config.MAX_OVERFLOW,
     pool_timeout=config.POOL_TIMEOUT,
@@ -51,17 +83,48 @@ SessionLocal = sessionmaker(
     expire_on_commit=False
 )
 
+# Async engine for the request hot path (webhook, queries, settings)
+_async_pool_args = {} if config.ASYNC_DATABASE_URL.startswith('sqlite') else {
+    'poolclass': InstrumentedAsyncAdaptedQueuePool,
+    'pool_size': config.POOL_SIZE,
+    'max_overflow': config.MAX_OVERFLOW,
+    'pool_timeout': config.POOL_TIMEOUT,
+    'pool_recycle': config.POOL_RECYCLE,
+}
+
+async_engine = create_async_engine(
+    config.ASYNC_DATABASE_URL,
+    echo=config.ECHO_SQL,
+    pool_logging_name='async',
+    **_async_pool_args
+)
+
+# Checkout latency, hold times and leak detection (see database/pool.py)
+instrument_engine(engine, 'sync')
+instrument_engine(async_engine, 'async')
+
+# Async session factory
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 
 def init_db():
-    """Initialize database - create all tables"""
+    """Initialize database - create all tables, add columns newer than existing tables"""
+    from .migrations import upgrade_schema
+    
     Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created successfully")
+    added = upgrade_schema(engine)
+    logger.info("Database tables created%s", f" (added columns: {', '.join(added)})" if added else "")
 
 
 def drop_db():
     """Drop all tables - USE WITH CAUTION"""
     Base.metadata.drop_all(bind=engine)
-    print("⚠️  All database tables dropped")
+    logger.warning("All database tables dropped")
 
 
 @contextmanager
@@ -84,10 +147,14 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
-def get_db_session() -> Session:
+def get_db_session() -> Generator[Session, None, None]:
     """
     Get database session for FastAPI dependency injection
     
+    The session is rolled back if the request fails and always closed
+    (connection returned to the pool) once the request finishes.
+    Endpoints commit explicitly.
+    
     Usage in FastAPI:
         @app.get("/signals")
         def get_signals(db: Session = Depends(get_db_session)):
@@ -95,9 +162,47 @@ def get_db_session() -> Session:
     """
     db = SessionLocal()
     try:
-        return db
+        yield db
+    except Exception:
+        db.rollback()
+        raise
     finally:
-        pass  # FastAPI will handle closing
+        db.close()
+
+
+@asynccontextmanager
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async database session context manager (commits on success)
+    
+    Usage:
+        async with get_async_db() as db:
+            result = await db.execute(select(Signal))
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            raise e
+
+
+async def get_async_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get async database session for FastAPI dependency injection
+    
+    The session is closed (connection returned to the pool) once the
+    request finishes. Endpoints commit explicitly.
+    
+    Usage in FastAPI:
+        @app.get("/signals")
+        async def get_signals(db: AsyncSession = Depends(get_async_db_session)):
+            result = await db.execute(select(Signal))
+            return result.scalars().all()
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
 
 
 # Health check
@@ -108,7 +213,7 @@ def check_database_health() -> dict:
     try:
         start = time.time()
         with get_db() as db:
-            db.execute("SELECT 1")
+            db.execute(text("SELECT 1"))
         latency_ms = (time.time() - start) * 1000
         
         return {
@@ -120,3 +225,19 @@ def check_database_health() -> dict:
             "healthy": False,
             "error": str(e)
         }
+
+
+def get_pool_status() -> dict:
+    """Usage and checkout telemetry of both connection pools"""
+    status = {}
+    for name, pool in (('sync', engine.pool), ('async', async_engine.pool)):
+        usage = {}
+        if hasattr(pool, 'checkedout'):
+            usage = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(0, pool.overflow())
+            }
+        status[name] = {"pool": type(pool).__name__, **usage, **get_pool_stats(name).get_stats()}
+    return status
@@ -0,0 +1,317 @@
+# Background Health Monitor
+"""
+Probes the webhook's dependencies on an interval and serves cached results.
+
+/health (load balancer checks) and /api/status read the latest snapshot
+instead of probing on every request, so health checks cost a dict lookup
+and never block the event loop.
+
+Each cycle probes, concurrently and with a timeout:
+- database: SELECT 1 on the async engine
+- redis: PING on a long-lived async client
+- mt5: terminal_info() in a worker thread (the terminal is initialized once,
+  not per probe; skipped when the MetaTrader5 package is not installed)
+- ai_service: GET {AI_SERVICE_URL}/health
+
+Latencies are kept per component (last HEALTH_HISTORY_SIZE probes). One
+SystemHealth row is recorded per cycle and written with a multi-row INSERT
+every HEALTH_PERSIST_BATCH_SIZE cycles (and on shutdown).
+
+Each cycle also runs the connection leak detector (database/pool.py).
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+from sqlalchemy import insert, text
+
+from .db import async_engine
+from .models import SystemHealth
+from .pool import find_leaks
+
+logger = logging.getLogger(__name__)
+
+
+class HealthConfig:
+    """Health monitor configuration"""
+
+    def __init__(self):
+        self.INTERVAL_SECONDS = float(os.getenv('HEALTH_CHECK_INTERVAL_SECONDS', '10'))
+        self.PROBE_TIMEOUT_SECONDS = float(os.getenv('HEALTH_PROBE_TIMEOUT_SECONDS', '2'))
+        self.HISTORY_SIZE = int(os.getenv('HEALTH_HISTORY_SIZE', '60'))
+        # SystemHealth rows buffered before one bulk INSERT (0 = don't persist)
+        self.PERSIST_BATCH_SIZE = int(os.getenv('HEALTH_PERSIST_BATCH_SIZE', '6'))
+
+        self.REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        self.AI_SERVICE_URL = os.getenv('AI_SERVICE_URL', 'http://localhost:8001').rstrip('/')
+        self.MT5_ENABLED = os.getenv('HEALTH_MT5_ENABLED', 'true').lower() == 'true'
+
+
+class ComponentHealth:
+    """Latest probe result and latency history of one dependency"""
+
+    def __init__(self, name: str, history_size: int):
+        self.name = name
+        self.status = 'unknown'
+        self.healthy = False
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.details: Dict = {}
+        self.checked_at: Optional[datetime] = None
+        self.last_healthy_at: Optional[datetime] = None
+        self.failures = 0
+        # Latencies of successful probes, oldest first
+        self.history: Deque[float] = deque(maxlen=history_size)
+
+    def update(self, status: str, latency_ms: Optional[float], error: Optional[str] = None, details: Optional[Dict] = None):
+        self.status = status
+        self.healthy = status == 'healthy'
+        self.latency_ms = latency_ms
+        self.error = error
+        self.details = details or {}
+        self.checked_at = datetime.utcnow()
+        if self.healthy:
+            self.last_healthy_at = self.checked_at
+            self.failures = 0
+            self.history.append(latency_ms)
+        elif status != 'unavailable':
+            self.failures += 1
+
+    def to_dict(self) -> Dict:
+        history = sorted(self.history)
+        return {
+            "status": self.status,
+            "connected": self.healthy,
+            "latency_ms": round(self.latency_ms, 2) if self.latency_ms is not None else None,
+            "avg_latency_ms": round(sum(history) / len(history), 2) if history else None,
+            "max_latency_ms": round(history[-1], 2) if history else None,
+            "consecutive_failures": self.failures,
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+            "last_healthy_at": self.last_healthy_at.isoformat() if self.last_healthy_at else None,
+            "error": self.error,
+            **self.details
+        }
+
+
+class HealthMonitor:
+    """Periodic dependency probes with a cached snapshot and batched SystemHealth writes"""
+
+    # Components whose failure makes the service unhealthy (others degrade it)
+    CRITICAL = ('database',)
+
+    def __init__(self, config: Optional[HealthConfig] = None):
+        self.config = config or HealthConfig()
+        self.components: Dict[str, ComponentHealth] = {
+            name: ComponentHealth(name, self.config.HISTORY_SIZE)
+            for name in ('database', 'redis', 'mt5', 'ai_service')
+        }
+        self.task: Optional[asyncio.Task] = None
+        self.started_at = time.time()
+        self.buffer: List[Dict] = []
+
+        # Clients created on start() and reused by every probe
+        self._redis = None
+        self._http = None
+        self._mt5 = None
+        self._mt5_initialized = False
+        self._mt5_check: Optional[asyncio.Future] = None
+
+        self.stats = {
+            "cycles": 0,
+            "rows_written": 0,
+            "write_errors": 0
+        }
+
+    # ============================================
+    # Lifecycle
+    # ============================================
+
+    async def start(self):
+        """Create the probe clients, run a first probe and start the loop"""
+        import httpx
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(
+            self.config.REDIS_URL,
+            socket_connect_timeout=self.config.PROBE_TIMEOUT_SECONDS,
+            socket_timeout=self.config.PROBE_TIMEOUT_SECONDS
+        )
+        self._http = httpx.AsyncClient(timeout=self.config.PROBE_TIMEOUT_SECONDS)
+
+        if self.config.MT5_ENABLED:
+            try:
+                import MetaTrader5 as mt5
+                self._mt5 = mt5
+            except ImportError:
+                self.components['mt5'].update('unavailable', None, "MetaTrader5 package not installed")
+        else:
+            self.components['mt5'].update('unavailable', None, "MT5 probe disabled")
+
+        await self.probe_all()
+        self.task = asyncio.create_task(self._probe_loop())
+        logger.info("Health monitor started (every %ss)", self.config.INTERVAL_SECONDS)
+
+    async def stop(self):
+        """Stop probing, write buffered SystemHealth rows and close the clients"""
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+        await self.flush()
+        if self._redis is not None:
+            await self._redis.close()
+        if self._http is not None:
+            await self._http.aclose()
+        if self._mt5_initialized:
+            await asyncio.to_thread(self._mt5.shutdown)
+            self._mt5_initialized = False
+
+    async def _probe_loop(self):
+        while True:
+            await asyncio.sleep(self.config.INTERVAL_SECONDS)
+            try:
+                await self.probe_all()
+                find_leaks()
+                if self.config.PERSIST_BATCH_SIZE and len(self.buffer) >= self.config.PERSIST_BATCH_SIZE:
+                    await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Health probe cycle failed: %s", e)
+
+    # ============================================
+    # Probes
+    # ============================================
+
+    async def probe_all(self):
+        """Run all probes concurrently and record a SystemHealth row"""
+        probes = [
+            self._run('database', self._probe_database),
+            self._run('redis', self._probe_redis),
+            self._run('ai_service', self._probe_ai_service)
+        ]
+        if self._mt5 is not None:
+            probes.append(self._run('mt5', self._probe_mt5))
+        await asyncio.gather(*probes)
+        self.stats["cycles"] += 1
+        if self.config.PERSIST_BATCH_SIZE:
+            self.buffer.append(self._health_row())
+
+    async def _run(self, name: str, probe):
+        """Time one probe; exceptions and timeouts mark the component unhealthy"""
+        component = self.components[name]
+        previous_failures = component.failures
+        start = time.perf_counter()
+        try:
+            details = await asyncio.wait_for(probe(), timeout=self.config.PROBE_TIMEOUT_SECONDS)
+            component.update('healthy', (time.perf_counter() - start) * 1000, details=details)
+        except asyncio.TimeoutError:
+            component.update('unhealthy', None, f"Probe timed out after {self.config.PROBE_TIMEOUT_SECONDS}s")
+        except Exception as e:
+            component.update('unhealthy', None, str(e)[:200])
+
+        # Log state changes only, not every failing probe
+        if component.failures == 1:
+            logger.warning("Health probe failed for %s: %s", name, component.error)
+        elif component.healthy and previous_failures:
+            logger.info("%s healthy again after %d failed probes", name, previous_failures)
+
+    async def _probe_database(self):
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def _probe_redis(self):
+        await self._redis.ping()
+
+    async def _probe_ai_service(self):
+        response = await self._http.get(f"{self.config.AI_SERVICE_URL}/health")
+        response.raise_for_status()
+        return {"models_loaded": response.json().get("models_loaded", [])}
+
+    async def _probe_mt5(self):
+        # A check that outlived the probe timeout keeps running in its thread;
+        # wait for it instead of starting another one
+        if self._mt5_check is None or self._mt5_check.done():
+            self._mt5_check = asyncio.ensure_future(asyncio.to_thread(self._check_mt5))
+        return await asyncio.shield(self._mt5_check)
+
+    def _check_mt5(self) -> Dict:
+        """Terminal state (initializes the terminal once, not on every probe)"""
+        mt5 = self._mt5
+        if not self._mt5_initialized or mt5.terminal_info() is None:
+            if not mt5.initialize():
+                self._mt5_initialized = False
+                raise ConnectionError(f"MT5 initialize failed: {mt5.last_error()}")
+            self._mt5_initialized = True
+        account = mt5.account_info()
+        if account is None:
+            raise ConnectionError("MT5 terminal not logged in")
+        return {"account": str(account.login), "server": account.server}
+
+    # ============================================
+    # Snapshot
+    # ============================================
+
+    def is_healthy(self) -> bool:
+        return all(self.components[name].healthy for name in self.CRITICAL)
+
+    def get_status(self) -> str:
+        """'healthy', 'degraded' (optional dependency down) or 'unhealthy'"""
+        if not self.is_healthy():
+            return 'unhealthy'
+        if any(c.status == 'unhealthy' for c in self.components.values()):
+            return 'degraded'
+        return 'healthy'
+
+    def get_snapshot(self) -> Dict[str, Dict]:
+        """Latest result per component (no probing)"""
+        return {name: component.to_dict() for name, component in self.components.items()}
+
+    def get_stats(self) -> Dict:
+        return {"buffered_rows": len(self.buffer), **self.stats}
+
+    def _health_row(self) -> Dict:
+        components = self.components
+        mt5 = components['mt5']
+        return {
+            "timestamp": datetime.utcnow(),
+            "webhook_service_healthy": True,
+            "ai_service_healthy": components['ai_service'].healthy,
+            "mt5_connected": mt5.healthy,
+            "mt5_account_number": mt5.details.get("account"),
+            "mt5_server": mt5.details.get("server"),
+            "database_connected": components['database'].healthy,
+            "database_latency_ms": components['database'].latency_ms,
+            "redis_connected": components['redis'].healthy,
+            "redis_latency_ms": components['redis'].latency_ms,
+            "active_alerts": [
+                f"{name}: {c.error}" for name, c in components.items() if c.status == 'unhealthy'
+            ] or None
+        }
+
+    async def flush(self):
+        """Write buffered SystemHealth rows with one multi-row INSERT"""
+        if not self.buffer:
+            return
+        rows, self.buffer = self.buffer, []
+        try:
+            async with async_engine.begin() as conn:
+                await conn.execute(insert(SystemHealth.__table__), rows)
+            self.stats["rows_written"] += len(rows)
+        except Exception as e:
+            # Health history is best effort: keep at most one batch for the next attempt
+            self.stats["write_errors"] += 1
+            self.buffer = rows[-self.config.PERSIST_BATCH_SIZE:] + self.buffer
+            logger.error("SystemHealth write failed (%d rows): %s", len(rows), e)
+
+
+# Global health monitor
+health_monitor = HealthMonitor()
@@ -0,0 +1,115 @@
+# Pipeline Stage Journal
+"""
+Stage checkpoints for crash recovery.
+
+When a pipeline stage hands a signal on, it records a PipelineProgress row
+(with the outputs later stages need) and sets Signal.pipeline_stage in the
+same transaction as its own writes. After a restart a signal is resumed
+after its last checkpointed stage, so completed work - an LLM verdict, a
+placed trade - is neither lost nor repeated.
+
+Terminal outcomes (rejected, executed, failed) are carried by Signal.status;
+signals still RECEIVED at startup are incomplete. Signal.enqueued_at marks
+signals that already have a queue message, so the periodic sweep only
+re-enqueues those that never reached the queue (or whose message is stale).
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Signal, SignalStatus, PipelineProgress
+
+
+def record_stage_completed(db: AsyncSession, signal: Signal, stage: str, output: Optional[Dict] = None):
+    """
+    Checkpoint a stage in the caller's transaction
+
+    Args:
+        db: Session the stage commits its own changes with
+        signal: Signal being processed
+        stage: Completed stage name
+        output: JSON-serializable state later stages need
+    """
+    db.add(PipelineProgress(signal_id=signal.id, stage=stage, output=output))
+    signal.pipeline_stage = stage
+
+
+async def load_checkpoint(db: AsyncSession, signal_id: int) -> Tuple[Optional[str], Dict]:
+    """
+    Last completed stage of a signal and the merged outputs of all completed stages
+
+    Returns:
+        (stage or None if nothing completed, outputs)
+    """
+    result = await db.execute(
+        select(PipelineProgress)
+        .where(PipelineProgress.signal_id == signal_id)
+        .order_by(PipelineProgress.id)
+    )
+    rows = result.scalars().all()
+
+    outputs = {}
+    for row in rows:
+        outputs.update(row.output or {})
+    return (rows[-1].stage if rows else None), outputs
+
+
+async def mark_enqueued(db: AsyncSession, signal_ids: List[int]):
+    """Record in the caller's transaction that the signals have a queue message"""
+    await db.execute(
+        update(Signal)
+        .where(Signal.id.in_(signal_ids))
+        .values(enqueued_at=datetime.utcnow())
+    )
+
+
+async def sweep_incomplete_signals(
+    db: AsyncSession,
+    max_age_seconds: int,
+    limit: int = 1000,
+    min_age_seconds: float = 0,
+    requeue_after_seconds: Optional[float] = None
+) -> Tuple[List[int], int]:
+    """
+    Find signals left unfinished by a previous run (or never enqueued)
+
+    Signals received within max_age_seconds, but at least min_age_seconds
+    ago, are returned for resumption (oldest first); older ones are marked
+    FAILED.
+
+    Args:
+        requeue_after_seconds: Skip signals enqueued more recently than this
+            (None: return enqueued signals too, e.g. at startup on a
+            non-durable queue)
+
+    Returns:
+        (signal ids to resume, number of signals expired)
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=max_age_seconds)
+    pending = Signal.status == SignalStatus.RECEIVED
+
+    query = select(Signal.id).where(
+        pending, Signal.timestamp >= cutoff, Signal.timestamp <= now - timedelta(seconds=min_age_seconds)
+    )
+    if requeue_after_seconds is not None:
+        query = query.where(or_(
+            Signal.enqueued_at.is_(None),
+            Signal.enqueued_at < now - timedelta(seconds=requeue_after_seconds)
+        ))
+    result = await db.execute(query.order_by(Signal.timestamp).limit(limit))
+    resumable = list(result.scalars().all())
+
+    expired = await db.execute(
+        update(Signal)
+        .where(pending, Signal.timestamp < cutoff)
+        .values(
+            status=SignalStatus.FAILED,
+            rejection_reason="Not processed within the recovery window"
+        )
+    )
+    await db.commit()
+
+    return resumable, expired.rowcount
@@ -0,0 +1,67 @@
+# Schema Upgrades
+"""
+Adds columns introduced after a table was first created.
+
+Base.metadata.create_all() creates missing tables but never alters
+existing ones, so databases created by an older release lack newer
+columns. upgrade_schema() (run by init_db()) compares the live tables with
+ADDED_COLUMNS using SQLAlchemy's inspector, which works on PostgreSQL and
+SQLite alike, and adds what is missing. Column types come from the models,
+compiled for the connected dialect.
+
+Only nullable columns without server defaults belong here; anything else
+needs a hand-written migration.
+"""
+import logging
+from typing import List, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from .models import Base
+
+logger = logging.getLogger(__name__)
+
+# (table, column) pairs added after the initial schema, oldest first
+ADDED_COLUMNS: List[Tuple[str, str]] = [
+    # Institutional signal fields
+    ('signals', 'targets'),
+    ('signals', 'confidence'),
+    ('signals', 'volatility'),
+    ('signals', 'win_probability'),
+    # Pipeline journal (last completed stage)
+    ('signals', 'pipeline_stage'),
+    # Recovery sweep: queue message already exists
+    ('signals', 'enqueued_at'),
+    # Pipeline latency breakdown
+    ('predictions', 'timings'),
+    ('trades', 'timings'),
+]
+
+
+def upgrade_schema(engine: Engine) -> List[str]:
+    """
+    Add missing ADDED_COLUMNS to existing tables
+
+    Args:
+        engine: Sync engine of the database to upgrade
+
+    Returns:
+        'table.column' of every column added
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    with engine.begin() as conn:
+        for table_name, column_name in ADDED_COLUMNS:
+            if table_name not in existing_tables:
+                continue  # create_all() creates it with every column
+            present = {c['name'] for c in inspector.get_columns(table_name)}
+            if column_name in present:
+                continue
+            column = Base.metadata.tables[table_name].columns[column_name]
+            column_type = column.type.compile(dialect=engine.dialect)
+            logger.info("Running migration: adding %s.%s (%s)", table_name, column_name, column_type)
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+            added.append(f"{table_name}.{column_name}")
+    return added
@@ -109,6 +109,8 @@ class Signal(Base):
     # Processing status
     status = Column(Enum(SignalStatus), default=SignalStatus.RECEIVED, nullable=False, index=True)
     rejection_reason = Column(Text)
+    pipeline_stage = Column(String(20))  # Last completed pipeline stage (see pipeline_progress)
+    enqueued_at = Column(DateTime)  # Last handed to the signal queue (periodic recovery skips it until stale)
 
     # Institutional Data (New)
     targets = Column(JSON)  # [TP1, TP2, TP3]
@@ -154,6 +156,7 @@ class Prediction(Base):
     
     # Performance
     inference_time_ms = Column(Float)
+    timings = Column(JSON)  # Pipeline latency breakdown in ms, see common.timing
     
     # Relationships
     signal = relationship("Signal", back_populates="prediction")
@@ -213,6 +216,7 @@ class Trade(Base):
     # Metadata
     rejection_reason = Column(Text)
     error_message = Column(Text)
+    timings = Column(JSON)  # Pipeline latency breakdown in ms, see common.timing
     
     # Relationships
     signal = relationship("Signal", back_populates="trade")
@@ -402,6 +406,43 @@ class SystemHealth(Base):
     # Alerts
     active_alerts = Column(JSON)  # List of current issues
 
+
+class TradingStats(Base):
+    """Incrementally maintained dashboard statistics (one row per counter shard, see database/stats.py)"""
+    __tablename__ = 'trading_stats'
+    
+    id = Column(Integer, primary_key=True)
+    
+    # Counters
+    total_signals = Column(Integer, default=0, nullable=False)
+    total_trades = Column(Integer, default=0, nullable=False)
+    open_trades = Column(Integer, default=0, nullable=False)
+    closed_trades = Column(Integer, default=0, nullable=False)
+    winning_trades = Column(Integer, default=0, nullable=False)
+    total_pnl = Column(Float, default=0.0, nullable=False)
+    
+    # Timestamps
+    rebuilt_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class PipelineProgress(Base):
+    """Pipeline stage checkpoints, used to resume signals after a restart"""
+    __tablename__ = 'pipeline_progress'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    signal_id = Column(Integer, ForeignKey('signals.id'), nullable=False)
+    stage = Column(String(20), nullable=False)
+    completed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Stage output needed by later stages (prediction, risk, validation, deadline)
+    output = Column(JSON)
+    
+    __table_args__ = (
+        Index('idx_progress_signal_stage', 'signal_id', 'stage', unique=True),
+    )
+
+
 class UserSettings(Base):
     """User preferences and configuration"""
     __tablename__ = 'user_settings'
@@ -0,0 +1,59 @@
+# Keyset Pagination Helpers
+"""
+Cursor (keyset) pagination on (timestamp, id), newest first.
+
+A cursor encodes the (timestamp, id) of the last row of a page; the next
+page continues strictly after it. Unlike OFFSET, each page costs an index
+range scan on the timestamp indexes (idx_signal_symbol_timestamp /
+idx_trade_symbol_timestamp when filtered by symbol) no matter how deep.
+"""
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.sql import Select
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """Opaque cursor for the row at (timestamp, id)"""
+    raw = f"{timestamp.isoformat()}|{row_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp_str, row_id = base64.urlsafe_b64decode(padded).decode('utf-8').split('|')
+        return datetime.fromisoformat(timestamp_str), int(row_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def keyset_page(query: Select, model, cursor: Optional[str], limit: int) -> Select:
+    """
+    Restrict a query to one page, newest first
+
+    Fetches limit + 1 rows so split_page() can tell whether another page exists.
+    """
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(model.timestamp, model.id) < tuple_(timestamp, row_id))
+
+    return query.order_by(model.timestamp.desc(), model.id.desc()).limit(limit + 1)
+
+
+def split_page(rows: List, limit: int) -> Tuple[List, Optional[str]]:
+    """Trim the extra row fetched by keyset_page() and build the next cursor"""
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.timestamp, last.id)
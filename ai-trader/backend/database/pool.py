@@ -0,0 +1,281 @@
+# Connection Pool Telemetry
+"""
+Checkout latency, usage counters and leak detection for the engine pools.
+
+- InstrumentedQueuePool / InstrumentedAsyncAdaptedQueuePool time every
+  checkout (the wait for a free connection, or for opening a new one) and
+  count pool timeouts.
+- instrument_engine() tracks checked-out connections through pool events:
+  how long each is held and the application frame that checked it out (with
+  DB_LEAK_CAPTURE_STACKS, its whole stack), recorded as raw (file, line,
+  function) entries and only formatted when a leak is reported. AsyncSession
+  checkouts run in SQLAlchemy's greenlet, so the walk continues into the
+  parent greenlet, where the awaiting coroutines are.
+- find_leaks() logs connections held longer than DB_LEAK_THRESHOLD_SECONDS
+  together with that stack, once per checkout. The health monitor calls it
+  every cycle.
+
+Stats are kept per pool name ('sync', 'async'); see get_pool_stats().
+"""
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event, exc
+
+try:
+    import greenlet
+except ImportError:  # only installed with SQLAlchemy's asyncio extra
+    greenlet = None
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolConfig:
+    """Pool telemetry configuration"""
+
+    def __init__(self):
+        self.LEAK_THRESHOLD_SECONDS = float(os.getenv('DB_LEAK_THRESHOLD_SECONDS', '30'))
+        # Record the whole checkout stack, not just the calling application frame
+        self.CAPTURE_STACKS = os.getenv('DB_LEAK_CAPTURE_STACKS', 'false').lower() == 'true'
+        self.SLOW_CHECKOUT_MS = float(os.getenv('DB_SLOW_CHECKOUT_MS', '1000'))
+
+
+# Frames recorded per checkout stack
+STACK_LIMIT = 40
+
+# Checkout wait histogram bounds (seconds)
+CHECKOUT_BUCKETS_SECONDS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class PoolStats:
+    """Counters, checkout latency histogram and held connections of one pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkouts = 0
+        self.timeouts = 0
+        self.slow_checkouts = 0
+        self.leaks_reported = 0
+
+        # Checkout wait (time spent in Pool.connect())
+        self.buckets = CHECKOUT_BUCKETS_SECONDS
+        self.counts = [0] * len(self.buckets)
+        self.wait_count = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+
+        # Checkout -> checkin
+        self.hold_count = 0
+        self.hold_sum = 0.0
+        self.hold_max = 0.0
+
+        # {id(connection record): [checked out at (monotonic), stack, reported]}
+        self.held: Dict[int, list] = {}
+        self.lock = threading.Lock()
+
+    def observe_wait(self, seconds: float):
+        with self.lock:
+            self.wait_count += 1
+            self.wait_sum += seconds
+            if seconds > self.wait_max:
+                self.wait_max = seconds
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self.counts[i] += 1
+                    break
+
+    def checked_out(self, key: int, stack: Optional[List[Tuple[str, int, str]]]):
+        with self.lock:
+            self.checkouts += 1
+        self.held[key] = [time.monotonic(), stack, False]
+
+    def checked_in(self, key: int):
+        entry = self.held.pop(key, None)
+        if entry is None:
+            return
+        held_for = time.monotonic() - entry[0]
+        with self.lock:
+            self.hold_count += 1
+            self.hold_sum += held_for
+            if held_for > self.hold_max:
+                self.hold_max = held_for
+        if entry[2]:
+            logger.info("Connection from pool %s returned after %.1fs (previously reported as leaked)", self.name, held_for)
+
+    def get_stats(self) -> Dict:
+        return {
+            "checkouts": self.checkouts,
+            "checked_out_tracked": len(self.held),
+            "timeouts": self.timeouts,
+            "slow_checkouts": self.slow_checkouts,
+            "leaks_reported": self.leaks_reported,
+            "checkout_avg_ms": round(self.wait_sum / self.wait_count * 1000, 3) if self.wait_count else 0,
+            "checkout_max_ms": round(self.wait_max * 1000, 3),
+            "hold_avg_ms": round(self.hold_sum / self.hold_count * 1000, 3) if self.hold_count else 0,
+            "hold_max_ms": round(self.hold_max * 1000, 3)
+        }
+
+
+pool_config = PoolConfig()
+
+# {pool name: stats}, survives pool re-creation (engine.dispose())
+pool_stats: Dict[str, PoolStats] = {}
+
+
+def get_pool_stats(name: str) -> PoolStats:
+    stats = pool_stats.get(name)
+    if stats is None:
+        stats = pool_stats.setdefault(name, PoolStats(name))
+    return stats
+
+
+class _TimedCheckout:
+    """Pool mixin timing connect() (pool name taken from pool_logging_name)"""
+
+    def connect(self):
+        stats = get_pool_stats(self._orig_logging_name or 'default')
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            with stats.lock:
+                stats.timeouts += 1
+            logger.error("Pool %s exhausted: %s", stats.name, self.status())
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            stats.observe_wait(waited)
+            if waited * 1000 >= pool_config.SLOW_CHECKOUT_MS:
+                stats.slow_checkouts += 1
+                logger.warning("Slow connection checkout from pool %s: %.0fms (%s)", stats.name, waited * 1000, self.status())
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine, name: str):
+    """
+    Track checked-out connections of an engine (sync Engine or AsyncEngine)
+
+    Args:
+        engine: Engine whose pool to track
+        name: Pool name used in stats and logs
+    """
+    stats = get_pool_stats(name)
+    target = getattr(engine, 'sync_engine', engine)
+
+    @event.listens_for(target, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stack = _capture_stack() if pool_config.CAPTURE_STACKS else _capture_caller()
+        stats.checked_out(id(connection_record), stack)
+
+    @event.listens_for(target, 'checkin')
+    def on_checkin(dbapi_connection, connection_record):
+        stats.checked_in(id(connection_record))
+
+    @event.listens_for(target, 'detach')
+    def on_detach(dbapi_connection, connection_record):
+        stats.held.pop(id(connection_record), None)
+
+
+def find_leaks(threshold_seconds: Optional[float] = None) -> List[Tuple[str, float]]:
+    """
+    Log connections held longer than the threshold (each checkout reported once)
+
+    Returns:
+        (pool name, seconds held) of every connection over the threshold
+    """
+    threshold = pool_config.LEAK_THRESHOLD_SECONDS if threshold_seconds is None else threshold_seconds
+    now = time.monotonic()
+    leaks = []
+    for stats in list(pool_stats.values()):
+        for entry in list(stats.held.values()):
+            held_for = now - entry[0]
+            if held_for < threshold:
+                continue
+            leaks.append((stats.name, held_for))
+            if entry[2]:
+                continue
+            entry[2] = True
+            stats.leaks_reported += 1
+            stack = ''.join(_application_frames(_format_stack(entry[1]))) if entry[1] else '(caller unknown)\n'
+            logger.warning(
+                "Possible connection leak: pool %s connection held for %.1fs, checked out at:\n%s",
+                stats.name, held_for, stack
+            )
+    return leaks
+
+
+def _checkout_frames(frame) -> Iterator:
+    """
+    Frames from frame outwards, continued in the parent greenlet
+
+    An AsyncSession runs its checkout in a greenlet whose own stack ends in
+    SQLAlchemy; the application coroutine awaiting it is suspended in the
+    parent greenlet.
+    """
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+    parent = greenlet.getcurrent().parent if greenlet is not None else None
+    frame = parent.gr_frame if parent is not None else None
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+
+
+def _is_application(filename: str) -> bool:
+    return '/sqlalchemy/' not in filename and filename != __file__ and filename != '<string>'
+
+
+def _capture_stack() -> List[Tuple[str, int, str]]:
+    """
+    Caller's stack as raw (file, line, function) entries, innermost first
+
+    Frames are not kept (that would pin their locals until checkin) and
+    source lines are not read; _format_stack() does that on report.
+    """
+    stack = []
+    # Without _capture_stack and the checkout handler
+    for frame in _checkout_frames(sys._getframe(2)):
+        if len(stack) >= STACK_LIMIT:
+            break
+        code = frame.f_code
+        stack.append((code.co_filename, frame.f_lineno, code.co_name))
+    return stack
+
+
+def _capture_caller() -> Optional[List[Tuple[str, int, str]]]:
+    """Innermost application frame of the checkout (cheap default when stacks are not captured)"""
+    for frame in _checkout_frames(sys._getframe(2)):
+        code = frame.f_code
+        if _is_application(code.co_filename):
+            return [(code.co_filename, frame.f_lineno, code.co_name)]
+    return None
+
+
+def _format_stack(stack: List[Tuple[str, int, str]]) -> List[str]:
+    """Raw checkout stack as traceback lines, outermost first"""
+    return traceback.format_list([
+        traceback.FrameSummary(filename, lineno, name) for filename, lineno, name in reversed(stack)
+    ])
+
+
+def _application_frames(stack: List[str]) -> List[str]:
+    """Checkout stack without SQLAlchemy's and this module's frames"""
+    frames = [
+        frame for frame in stack
+        if '/sqlalchemy/' not in frame and __file__ not in frame and 'File "<string>"' not in frame
+    ]
+    return frames or stack
@@ -0,0 +1,232 @@
+# Incremental Trading Statistics
+"""
+Keeps the trading_stats summary in step with signals and trades.
+
+An after_flush listener inspects every ORM flush (sync and async sessions)
+for new, changed and deleted Signal/Trade rows and applies the resulting
+deltas with a single relative UPDATE in the same transaction, so /stats
+reads a handful of rows regardless of table size.
+
+The summary is sharded over STATS_COUNTER_SHARDS rows (ids 1..N): each
+session adds its deltas to one randomly chosen row and reads sum all of
+them, so concurrent ingest and pipeline transactions rarely queue on the
+same row lock. Shards are upserted (INSERT ... ON CONFLICT on PostgreSQL
+and SQLite), so sessions and replicas creating the same missing shard do
+not conflict.
+
+Writes that bypass the ORM (raw SQL, bulk Core updates) are not seen; use
+rebuild_trading_stats() to recompute the row from the source tables.
+"""
+import os
+import random
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import event, inspect, insert, select, update, func, case
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .models import Signal, Trade, TradeStatus, TradingStats
+
+
+# Shard rebuilt totals are written to (the other shards are reset to zero)
+STATS_ROW_ID = 1
+
+# Counter rows; more shards = less row-lock contention, slightly slower reads
+STATS_SHARDS = max(1, int(os.getenv('STATS_COUNTER_SHARDS', '16')))
+
+# Statuses counted as open trades on the dashboard
+OPEN_TRADE_STATUSES = (TradeStatus.PLACED, TradeStatus.FILLED)
+
+COUNTER_FIELDS = (
+    'total_signals', 'total_trades', 'open_trades',
+    'closed_trades', 'winning_trades', 'total_pnl'
+)
+
+# INSERT constructs with ON CONFLICT support, by dialect name
+UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert
+}
+
+
+def _trade_contribution(status: Optional[TradeStatus], net_pnl: Optional[float]) -> Counter:
+    """Counters a trade in the given state contributes (excluding total_trades)"""
+    contribution = Counter()
+    if status in OPEN_TRADE_STATUSES:
+        contribution['open_trades'] += 1
+    elif status == TradeStatus.CLOSED:
+        contribution['closed_trades'] += 1
+        if net_pnl is not None:
+            contribution['total_pnl'] += net_pnl
+            if net_pnl > 0:
+                contribution['winning_trades'] += 1
+    return contribution
+
+
+def _previous_value(state, attr: str):
+    """Value of an attribute before the pending change"""
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(state.obj(), attr)
+
+
+def collect_stats_deltas(session: Session) -> Counter:
+    """Counter deltas implied by the objects in a flush"""
+    deltas = Counter()
+
+    for obj in session.new:
+        if isinstance(obj, Signal):
+            deltas['total_signals'] += 1
+        elif isinstance(obj, Trade):
+            deltas['total_trades'] += 1
+            deltas.update(_trade_contribution(obj.status, obj.net_pnl))
+
+    for obj in session.dirty:
+        if not isinstance(obj, Trade):
+            continue
+        state = inspect(obj)
+        if not (state.attrs.status.history.has_changes() or state.attrs.net_pnl.history.has_changes()):
+            continue
+        deltas.subtract(_trade_contribution(
+            _previous_value(state, 'status'),
+            _previous_value(state, 'net_pnl')
+        ))
+        deltas.update(_trade_contribution(obj.status, obj.net_pnl))
+
+    for obj in session.deleted:
+        if isinstance(obj, Signal):
+            deltas['total_signals'] -= 1
+        elif isinstance(obj, Trade):
+            deltas['total_trades'] -= 1
+            deltas.subtract(_trade_contribution(obj.status, obj.net_pnl))
+
+    return deltas
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_stats_deltas(session: Session, flush_context):
+    """Apply signal/trade counter deltas to this session's shard in the same transaction"""
+    deltas = {field: delta for field, delta in collect_stats_deltas(session).items() if delta}
+    if not deltas:
+        return
+
+    # One shard per session: a transaction never locks two shards (no lock-order deadlocks)
+    shard = session.info.setdefault('stats_shard', random.randint(1, STATS_SHARDS))
+    now = datetime.utcnow()
+    table = TradingStats.__table__
+    increments = {field: table.c[field] + delta for field, delta in deltas.items()}
+    connection = session.connection()
+
+    upsert = UPSERT_INSERTS.get(connection.dialect.name)
+    if upsert is not None:
+        # Creates the shard if missing; a concurrent creator turns this into the update
+        row = {field: 0 for field in COUNTER_FIELDS}
+        row.update(deltas)
+        connection.execute(
+            upsert(table)
+            .values(id=shard, updated_at=now, **row)
+            .on_conflict_do_update(index_elements=[table.c.id], set_=dict(updated_at=now, **increments))
+        )
+        return
+
+    result = connection.execute(update(table).where(table.c.id == shard).values(updated_at=now, **increments))
+    if result.rowcount == 0:
+        # Shard missing: use the one the startup rebuild guarantees
+        connection.execute(update(table).where(table.c.id == STATS_ROW_ID).values(updated_at=now, **increments))
+
+
+async def _load_shards(db: AsyncSession) -> Dict[int, TradingStats]:
+    rows = (await db.execute(
+        select(TradingStats).execution_options(populate_existing=True)
+    )).scalars().all()
+    return {row.id: row for row in rows}
+
+
+def _reset_shard(row: TradingStats):
+    for field in COUNTER_FIELDS:
+        setattr(row, field, 0)
+
+
+async def _create_missing_shards(db: AsyncSession, shards: Dict[int, TradingStats]) -> bool:
+    """Insert zeroed rows for missing shard ids 1..STATS_SHARDS (ignored if created concurrently)"""
+    missing = [shard_id for shard_id in range(1, STATS_SHARDS + 1) if shard_id not in shards]
+    if not missing:
+        return False
+
+    table = TradingStats.__table__
+    upsert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    statement = insert(table) if upsert is None else upsert(table).on_conflict_do_nothing(index_elements=[table.c.id])
+    now = datetime.utcnow()
+    await db.execute(statement, [
+        dict(id=shard_id, updated_at=now, **{field: 0 for field in COUNTER_FIELDS})
+        for shard_id in missing
+    ])
+    return True
+
+
+async def rebuild_trading_stats(db: AsyncSession) -> TradingStats:
+    """
+    Recompute the summary from the signals and trades tables
+
+    Totals go to shard STATS_ROW_ID, every other shard is reset to zero.
+    Full scan - run on demand (startup with no summary, admin endpoint),
+    never on the request path.
+    """
+    total_signals = await db.scalar(select(func.count(Signal.id))) or 0
+
+    is_closed = Trade.status == TradeStatus.CLOSED
+    trade_counts = (await db.execute(select(
+        func.count(Trade.id),
+        func.sum(case((Trade.status.in_(OPEN_TRADE_STATUSES), 1), else_=0)),
+        func.sum(case((is_closed, 1), else_=0)),
+        func.sum(case(((is_closed) & (Trade.net_pnl > 0), 1), else_=0)),
+        func.sum(case((is_closed, Trade.net_pnl), else_=0.0))
+    ))).one()
+
+    shards = await _load_shards(db)
+    if await _create_missing_shards(db, shards):
+        shards = await _load_shards(db)
+    for row in shards.values():
+        _reset_shard(row)
+
+    stats = shards[STATS_ROW_ID]
+
+    stats.total_signals = total_signals
+    stats.total_trades = trade_counts[0] or 0
+    stats.open_trades = trade_counts[1] or 0
+    stats.closed_trades = trade_counts[2] or 0
+    stats.winning_trades = trade_counts[3] or 0
+    stats.total_pnl = float(trade_counts[4] or 0.0)
+    stats.rebuilt_at = datetime.utcnow()
+
+    await db.commit()
+    return stats
+
+
+async def get_trading_stats(db: AsyncSession) -> Dict:
+    """Sum the summary shards (rebuilding the summary if missing, creating missing shards)"""
+    shards = await _load_shards(db)
+    if not shards:
+        await rebuild_trading_stats(db)
+        shards = await _load_shards(db)
+    elif await _create_missing_shards(db, shards):
+        await db.commit()
+
+    totals = {field: sum(getattr(row, field) or 0 for row in shards.values()) for field in COUNTER_FIELDS}
+    win_rate = (totals['winning_trades'] / totals['closed_trades'] * 100) if totals['closed_trades'] > 0 else 0
+
+    return {
+        "total_signals": totals['total_signals'],
+        "total_trades": totals['total_trades'],
+        "open_trades": totals['open_trades'],
+        "total_pnl": round(float(totals['total_pnl']), 2),
+        "win_rate": round(float(win_rate), 2),
+        "closed_trades": totals['closed_trades'],
+        "winning_trades": totals['winning_trades']
+    }
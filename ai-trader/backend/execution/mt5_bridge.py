@@ -4,9 +4,15 @@ from typing import Optional, Dict, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
+import logging
 import time
 import os
 
+from common.metrics import timed_order
+from common.tracing import traced
+
+logger = logging.getLogger(__name__)
+
 
 class MT5OrderType(Enum):
     """MT5 order types"""
@@ -77,12 +83,12 @@ class MT5ExecutionEngine:
         server = server or os.getenv('MT5_SERVER')
         
         if not all([login, password, server]):
-            print("❌ MT5 credentials not provided")
+            logger.error("MT5 credentials not provided")
             return False
         
         # Initialize MT5
         if not mt5.initialize():
-            print(f"❌ MT5 initialization failed: {mt5.last_error()}")
+            logger.error("MT5 initialization failed: %s", mt5.last_error())
             return False
         
         # Login to account
@@ -90,18 +96,19 @@ class MT5ExecutionEngine:
         
         if not authorized:
             error = mt5.last_error()
-            print(f"❌ MT5 login failed: {error}")
+            logger.error("MT5 login failed: %s", error)
             mt5.shutdown()
             return False
         
         self.connected = True
         self.account_info = mt5.account_info()
         
-        print(f"✅ MT5 connected")
-        print(f"   Account: {self.account_info.login}")
-        print(f"   Server: {self.account_info.server}")
-        print(f"   Balance: ${self.account_info.balance:.2f}")
-        print(f"   Equity: ${self.account_info.equity:.2f}")
+        logger.info("MT5 connected", extra={
+            "account": self.account_info.login,
+            "server": self.account_info.server,
+            "balance": self.account_info.balance,
+            "equity": self.account_info.equity
+        })
         
         return True
     
@@ -110,7 +117,7 @@ class MT5ExecutionEngine:
         if self.connected:
             mt5.shutdown()
             self.connected = False
-            print("✅ MT5 disconnected")
+            logger.info("MT5 disconnected")
     
     def is_connected(self) -> bool:
         """Check if MT5 is connected"""
@@ -196,6 +203,8 @@ class MT5ExecutionEngine:
         
         return lots
     
+    @timed_order('market_order')
+    @traced('mt5.order_send', kind='client')
     def place_market_order(self, order_req: OrderRequest) -> OrderResult:
         """
         Place market order
@@ -284,6 +293,8 @@ class MT5ExecutionEngine:
             latency_ms=latency_ms
         )
     
+    @timed_order('close_position')
+    @traced('mt5.close_position', kind='client')
     def close_position(self, position_id: int) -> OrderResult:
         """
         Close an open position
@@ -6,14 +6,21 @@ import torch
 import numpy as np
 import pandas as pd
 from datetime import datetime
+import logging
 import os
 import pickle
 
 # Model imports
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.log import setup_logging
+setup_logging('ai_service')
 from ml.features.engineer import FeatureEngineer
 from ml.models.lstm import LSTMTradingModel
+from common import tracing
+from common.metrics import instrument_app, AI_PREDICTION_SECONDS
+
+logger = logging.getLogger(__name__)
 
 
 class PredictionRequest(BaseModel):
@@ -58,7 +65,7 @@ class ModelRegistry:
             model_path: Path to model file
             model_type: Type of model (lstm, transformer, lightgbm)
         """
-        print(f"Loading {model_type} model: {model_name} from {model_path}")
+        logger.info("Loading %s model %s from %s", model_type, model_name, model_path)
         
         if model_type == 'lstm':
             # Load LSTM model
@@ -75,18 +82,18 @@ class ModelRegistry:
                 model.load_state_dict(torch.load(model_path, map_location=self.device))
                 model.to(self.device)
                 model.eval()
-                print(f"✅ Loaded LSTM model from {model_path}")
+                logger.info("Loaded LSTM model from %s", model_path)
             else:
-                print(f"⚠️  Model file not found: {model_path}, using untrained model")
+                logger.warning("Model file not found: %s, using untrained model", model_path)
         
         elif model_type == 'lightgbm':
             # Load LightGBM model
             if os.path.exists(model_path):
                 with open(model_path, 'rb') as f:
                     model = pickle.load(f)
-                print(f"✅ Loaded LightGBM model from {model_path}")
+                logger.info("Loaded LightGBM model from %s", model_path)
             else:
-                print(f"⚠️  Model file not found: {model_path}")
+                logger.warning("Model file not found: %s", model_path)
                 model = None
         
         else:
@@ -148,6 +155,12 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Request latency middleware and /metrics (see common.metrics)
+instrument_app(app)
+
+# Request spans, continuing the caller's traceparent (see common.tracing)
+tracing.instrument_app(app)
+
 # Global model registry
 registry = ModelRegistry()
 
@@ -155,14 +168,14 @@ registry = ModelRegistry()
 @app.on_event("startup")
 async def startup_event():
     """Load models on startup"""
-    print("🚀 Starting AI Inference Service...")
+    logger.info("Starting AI inference service")
     
     # Load default LSTM model
     model_path = os.getenv('LSTM_MODEL_PATH', 'models/lstm_v1.pth')
     try:
         registry.load_model('lstm_v1', model_path, 'lstm')
     except Exception as e:
-        print(f"⚠️  Failed to load LSTM model: {e}")
+        logger.error("Failed to load LSTM model: %s", e)
     
     # Load LightGBM model (if available)
     lgbm_path = os.getenv('LIGHTGBM_MODEL_PATH', 'models/lightgbm_v1.pkl')
@@ -170,9 +183,15 @@ async def startup_event():
         try:
             registry.load_model('lightgbm_v1', lgbm_path, 'lightgbm')
         except Exception as e:
-            print(f"⚠️  Failed to load LightGBM model: {e}")
+            logger.error("Failed to load LightGBM model: %s", e)
     
-    print("✅ AI Inference Service started")
+    logger.info("AI inference service started")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush buffered spans"""
+    tracing.tracer.shutdown()
 
 
 @app.get("/health")
@@ -231,6 +250,7 @@ async def predict(request: PredictionRequest):
         expected_return = (prediction - 0.5) * 2.0 * 100  # Convert to % estimate
         
         inference_time_ms = (time.time() - start_time) * 1000
+        AI_PREDICTION_SECONDS.labels(model_name, 'ok').observe(inference_time_ms / 1000)
         
         return PredictionResponse(
             signal_id=request.signal_id,
@@ -247,6 +267,7 @@ async def predict(request: PredictionRequest):
         )
     
     except Exception as e:
+        AI_PREDICTION_SECONDS.labels(model_name, 'error').observe(time.time() - start_time)
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
 
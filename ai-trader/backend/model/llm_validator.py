@@ -5,10 +5,13 @@ Uses a local language model to provide reasoning-based validation.
 """
 
 import os
+import logging
 from typing import Dict, Optional, Tuple
 from datetime import datetime
 import json
 
+logger = logging.getLogger(__name__)
+
 
 class LLMValidator:
     """
@@ -33,6 +36,8 @@ class LLMValidator:
         self.model_name = model_name
         self.api_endpoint = api_endpoint
         self.enabled = os.getenv('LLM_VALIDATION_ENABLED', 'true').lower() == 'true'
+        # Async client for validate_signal_async (created on first use)
+        self._client = None
     
     def validate_signal(
         self,
@@ -73,7 +78,36 @@ class LLMValidator:
         except Exception as e:
             # Fail-safe: if LLM fails, log error and default to approval
             # (since AI and Risk already validated)
-            print(f"⚠️  LLM validation failed: {e}")
+            logger.warning("LLM validation failed: %s", e)
+            return True, f"LLM validation error: {str(e)}", 0.5
+    
+    async def validate_signal_async(
+        self,
+        signal_data: Dict,
+        ai_prediction: Dict,
+        risk_assessment: Dict,
+        market_context: Optional[Dict] = None
+    ) -> Tuple[bool, str, float]:
+        """
+        Async validate_signal()
+        
+        Cancelling the call (e.g. a pipeline deadline) aborts the HTTP
+        request, so no LLM call outlives the stage's concurrency limit.
+        """
+        if not self.enabled:
+            return True, "LLM validation disabled", 1.0
+        
+        prompt = self._build_validation_prompt(
+            signal_data, ai_prediction, risk_assessment, market_context
+        )
+        
+        try:
+            llm_response = await self._call_llm_async(prompt)
+            return self._parse_llm_response(llm_response)
+            
+        except Exception as e:
+            # Fail-safe, as in validate_signal()
+            logger.warning("LLM validation failed: %s", e)
             return True, f"LLM validation error: {str(e)}", 0.5
     
     def _build_validation_prompt(
@@ -140,24 +174,17 @@ Be concise, objective, and focus on the most critical factors. Think step-by-ste
         For production, this would call your local LLM service
         """
         import requests
+        from common.tracing import tracer, inject
         
         try:
             # Ollama API format
-            response = requests.post(
-                f"{self.api_endpoint}/api/generate",
-                json={
-                    "model": self.model_name,
-                    "prompt": prompt,
-                    "stream": False,
-                    "format": "json",  # Request JSON response
-                    "options": {
-                        "temperature": 0.3,  # Lower temperature for more consistent analysis
-                        "top_p": 0.9,
-                        "num_predict": 500  # Max tokens
-                    }
-                },
-                timeout=30  # 30 second timeout
-            )
+            with tracer.span('llm.generate', kind='client', attributes={"llm.model": self.model_name}):
+                response = requests.post(
+                    f"{self.api_endpoint}/api/generate",
+                    json=self._generate_request(prompt),
+                    headers=inject({}),
+                    timeout=30  # 30 second timeout
+                )
             
             if response.status_code == 200:
                 result = response.json()
@@ -171,6 +198,54 @@ Be concise, objective, and focus on the most critical factors. Think step-by-ste
         except Exception as e:
             raise Exception(f"LLM call failed: {str(e)}")
     
+    def _generate_request(self, prompt: str) -> Dict:
+        """Ollama /api/generate request body"""
+        return {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": False,
+            "format": "json",  # Request JSON response
+            "options": {
+                "temperature": 0.3,  # Lower temperature for more consistent analysis
+                "top_p": 0.9,
+                "num_predict": 500  # Max tokens
+            }
+        }
+    
+    async def _call_llm_async(self, prompt: str) -> Dict:
+        """Async _call_llm() on a pooled keep-alive client"""
+        import httpx
+        from common.tracing import tracer, inject
+        
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=30)
+        
+        try:
+            with tracer.span('llm.generate', kind='client', attributes={"llm.model": self.model_name}):
+                response = await self._client.post(
+                    f"{self.api_endpoint}/api/generate",
+                    json=self._generate_request(prompt),
+                    headers=inject({})
+                )
+            
+            if response.status_code == 200:
+                result = response.json()
+                return json.loads(result.get('response', '{}'))
+            else:
+                raise Exception(f"LLM API error: {response.status_code}")
+                
+        except httpx.ConnectError:
+            # LLM service not running - use fallback
+            return self._fallback_validation(prompt)
+        except Exception as e:
+            raise Exception(f"LLM call failed: {str(e)}")
+    
+    async def close(self):
+        """Close the async client's connections (call on shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
     def _fallback_validation(self, prompt: str) -> Dict:
         """
         Fallback validation when LLM is not available
@@ -220,7 +295,7 @@ Be concise, objective, and focus on the most critical factors. Think step-by-ste
             
         except Exception as e:
             # If parsing fails, default to conservative approach
-            print(f"⚠️  Error parsing LLM response: {e}")
+            logger.warning("LLM response parsing failed: %s", e)
             return False, f"Failed to parse LLM response: {str(e)}", 0.0
     
     def get_validation_summary(
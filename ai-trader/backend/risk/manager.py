@@ -3,8 +3,11 @@ from dataclasses import dataclass
 from typing import Dict, Optional, List, Tuple
 from datetime import datetime, timedelta
 from enum import Enum
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 
 class RiskLevel(str, Enum):
     """Risk assessment levels"""
@@ -40,6 +43,12 @@ class RiskConfig:
     # Correlation limits
     max_correlation_exposure: float = 0.7  # Max correlated position exposure
     
+    # Signal confidence below this is rejected
+    min_signal_confidence: float = 0.5
+    
+    # Account equity used for sizing until live account data is wired in
+    account_equity: float = 10000.0
+    
     # Kill switch
     kill_switch_active: bool = False
     
@@ -49,6 +58,8 @@ class RiskConfig:
         self.max_consecutive_losses = int(os.getenv('RISK_CONSECUTIVE_LOSS_LIMIT', self.max_consecutive_losses))
         self.max_position_size_pct = float(os.getenv('RISK_MAX_POSITION_SIZE_PCT', self.max_position_size_pct))
         self.max_total_exposure_pct = float(os.getenv('RISK_MAX_TOTAL_EXPOSURE_PCT', self.max_total_exposure_pct))
+        self.min_signal_confidence = float(os.getenv('RISK_MIN_SIGNAL_CONFIDENCE', self.min_signal_confidence))
+        self.account_equity = float(os.getenv('RISK_ACCOUNT_EQUITY', self.account_equity))
 
 
 @dataclass
@@ -189,12 +200,12 @@ class RiskManager:
                 risk_level = RiskLevel.MEDIUM
         
         # 10. Signal Confidence Check
-        if signal_confidence < 0.6:
-            warnings.append(f"Low signal confidence: {signal_confidence:.2%}")
-            risk_level = max(risk_level, RiskLevel.MEDIUM, key=lambda x: list(RiskLevel).index(x))
-        elif signal_confidence < 0.5:
+        if signal_confidence < self.config.min_signal_confidence:
             approved = False
             reasons.append(f"Signal confidence too low: {signal_confidence:.2%}")
+        elif signal_confidence < 0.6:
+            warnings.append(f"Low signal confidence: {signal_confidence:.2%}")
+            risk_level = max(risk_level, RiskLevel.MEDIUM, key=lambda x: list(RiskLevel).index(x))
         
         # Compile metrics
         metrics = {
@@ -297,12 +308,12 @@ class RiskManager:
     def activate_kill_switch(self, reason: str = "Manual activation"):
         """Activate kill switch to stop all trading"""
         self.config.kill_switch_active = True
-        print(f"🚨 KILL SWITCH ACTIVATED: {reason}")
+        logger.critical("Kill switch activated: %s", reason)
     
     def deactivate_kill_switch(self):
         """Deactivate kill switch"""
         self.config.kill_switch_active = False
-        print(f"✅ Kill switch deactivated")
+        logger.warning("Kill switch deactivated")
     
     def get_risk_metrics(self) -> Dict:
         """Get current risk metrics"""
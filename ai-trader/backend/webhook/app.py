@@ -1,11 +1,14 @@
 # Webhook Service - Main FastAPI Application
-from fastapi import FastAPI, Request, HTTPException, Depends, BackgroundTasks, status
+from fastapi import FastAPI, Request, HTTPException, Depends, Query, status
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field, validator
 from typing import Optional, List
 from datetime import datetime
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 import json
+import logging
 import os
 
 # Load environment variables
@@ -16,14 +19,29 @@ load_dotenv()
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Structured JSON logging through a background writer (before other imports log)
+from common.log import setup_logging, logging_state
+setup_logging('webhook_service')
+logger = logging.getLogger(__name__)
+
 from database import (
-    get_db_session, init_db, check_database_health,
-    Signal, SignalStatus, Trade, TradeStatus, AuditLog
+    get_db_session, get_async_db, get_async_db_session, init_db, get_pool_status,
+    audit_writer, health_monitor, get_trading_stats, rebuild_trading_stats,
+    record_stage_completed, load_checkpoint, mark_enqueued, sweep_incomplete_signals,
+    Signal, SignalStatus, Trade
 )
 from common import (
     WebhookSignatureValidator, verify_jwt_token, rate_limiter,
     manager as ws_manager, Room
 )
+from common.dedup import dedup_key
+from common.query_cache import cache_key
+from common.serialization import FastJSONResponse, dumps, csv_cell
+from common.pipeline import PipelineConfig, PipelineContext, Stage, StagedExecutor, DeadlineExceeded
+from common.timing import latency_registry
+from common import metrics, tracing
+from database.pagination import keyset_page, split_page
+from database.pool import pool_stats
 
 
 # ============================================
@@ -65,6 +83,15 @@ class SignalResponse(BaseModel):
     message: str
 
 
+class BatchSignalResponse(BaseModel):
+    """Response after receiving a batch of signals"""
+    success: bool
+    count: int
+    signal_ids: List[int]
+    status: str
+    message: str
+
+
 class TradeQuery(BaseModel):
     """Query parameters for trades"""
     symbol: Optional[str] = None
@@ -79,7 +106,8 @@ class TradeQuery(BaseModel):
 app = FastAPI(
     title="AI Trading System - Webhook Service",
     description="Receives TradingView alerts and orchestrates AI→Risk→Execution pipeline",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # CORS configuration
@@ -91,6 +119,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency middleware and /metrics (see common.metrics)
+metrics.instrument_app(app)
+
+# One span per request, continuing incoming traceparent headers (see common.tracing)
+tracing.instrument_app(app)
+
 
 # ============================================
 # Background Tasks & Helpers
@@ -132,22 +166,39 @@ def format_prices_data(prices_data: dict) -> list:
             'marketOpen': market_open,
             'isCrypto': is_crypto,
             'timestamp': data.get('timestamp'),
-            'source': data.get('source', 'api')
+            'source': data.get('source', 'api'),
+            'stale': data.get('stale', False),
+            'refreshing': data.get('refreshing', False),
+            'ageMs': data.get('age_ms')
         })
     return formatted_prices
 
 
+async def read_prices() -> dict:
+    """
+    Prices for the dashboard and the broadcast
+    
+    From memory while the background refresher keeps the cache warm,
+    otherwise one concurrent fetch bounded by PRICE_CYCLE_DEADLINE_SECONDS.
+    """
+    from common.price_feed import price_feed
+    from common.price_refresher import price_refresher
+    
+    if price_refresher.running:
+        return price_feed.get_cached_prices()
+    return await price_feed.get_all_prices_async()
+
+
 async def broadcast_prices_task():
     """Background task to broadcast prices via WebSocket"""
     from common import Room
     from common.price_feed import price_feed
     import asyncio
     
-    print("📡 Starting Price Broadcast Task...")
+    logger.info("Price broadcast task started")
     while True:
         try:
-            # Fetch prices (non-blocking)
-            prices_data = await asyncio.to_thread(price_feed.get_all_prices)
+            prices_data = await read_prices()
             
             # Format prices
             formatted_prices = format_prices_data(prices_data)
@@ -158,66 +209,177 @@ async def broadcast_prices_task():
                 "data": formatted_prices
             })
             
-            # Update every 2s (respecting API limits)
-            await asyncio.sleep(2) 
+            # Update every PRICE_BROADCAST_INTERVAL_SECONDS (2s default, respecting API limits)
+            await asyncio.sleep(price_feed.config.BROADCAST_INTERVAL_SECONDS)
             
         except asyncio.CancelledError:
-            print("📡 Price Broadcast Task Cancelled")
+            logger.info("Price broadcast task cancelled")
             break
         except Exception as e:
-            print(f"❌ Error in price broadcast: {e}")
+            logger.error("Price broadcast failed: %s", e)
             await asyncio.sleep(5)
 
 
 # Global task reference
 price_task = None
+recovery_task = None
+
+# Signal ingest queue, pipeline workers and staged executor (created on startup)
+signal_queue = None
+pipeline_workers = None
+pipeline_executor = None
+
+# Stage limits and per-timeframe deadline budgets
+pipeline_config = PipelineConfig()
+
+# Signals currently in this process's pipeline (drops duplicate deliveries)
+active_signals = set()
+
+# Webhook idempotency cache (created on startup)
+dedup_cache = None
+
+# Dashboard query cache (created on startup)
+query_cache = None
+
+async def update_metrics_gauges():
+    """Refresh queue, connection, pool and risk gauges before a /metrics scrape"""
+    from database.db import engine, async_engine
+    from risk.manager import risk_manager
+    
+    if pipeline_executor:
+        metrics.update_pipeline_gauges(pipeline_executor.get_stats())
+    if signal_queue:
+        metrics.update_queue_gauges(await signal_queue.depth())
+    metrics.update_websocket_gauges(ws_manager)
+    metrics.update_db_pool_gauges({"sync": engine, "async": async_engine})
+    metrics.update_risk_gauges(risk_manager.get_risk_metrics())
+
+
+metrics.on_scrape(update_metrics_gauges)
+
+# Pool checkout latency, timeouts and leaks (database/pool.py)
+metrics.instrument_db_pools(pool_stats)
+
+# Maximum signals accepted by /webhook/signals/batch
+BATCH_MAX_SIGNALS = int(os.getenv('WEBHOOK_BATCH_MAX_SIGNALS', '100'))
+
+# Rows fetched per round trip by the streaming exports
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '500'))
+
+# Fast-ack: persist and return without AI inference; the pipeline back-fills
+# win_probability. Disable to compute an initial prediction inline.
+FAST_ACK = os.getenv('WEBHOOK_FAST_ACK', 'true').lower() == 'true'
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
-    print("🚀 Starting Webhook Service...")
+    logger.info("Starting webhook service")
     
-    # Check and run migrations (Add new columns if missing)
+    # Initialize database (creates tables, adds missing columns; see database.migrations)
     try:
-        from database import engine
-        from sqlalchemy import text
-        with engine.connect() as conn:
-            # Check if targets column exists
-            result = conn.execute(text("SELECT column_name FROM information_schema.columns WHERE table_name='signals' AND column_name='targets'"))
-            if not result.fetchone():
-                print("🔄 Running migration: Adding institutional columns to signals table...")
-                conn.execute(text("ALTER TABLE signals ADD COLUMN targets JSON"))
-                conn.execute(text("ALTER TABLE signals ADD COLUMN confidence JSON"))
-                conn.execute(text("ALTER TABLE signals ADD COLUMN volatility VARCHAR(20)"))
-                conn.execute(text("ALTER TABLE signals ADD COLUMN win_probability FLOAT"))
-                conn.commit()
-                print("✅ Migration complete")
+        init_db()
+        logger.info("Database initialized")
     except Exception as e:
-        print(f"⚠️ Migration check failed (might be SQLite or already exists): {e}")
-
-    # Initialize database
+        logger.error("Database initialization failed: %s", e)
+    
+    # Make sure the statistics summary row exists (rebuilt if missing)
     try:
-        init_db()
-        print("✅ Database initialized")
+        async with get_async_db() as db:
+            await get_trading_stats(db)
     except Exception as e:
-        print(f"❌ Database initialization failed: {e}")
+        logger.error("Trading statistics rebuild failed: %s", e)
     
     # Connect WebSocket manager to Redis
     redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
     await ws_manager.connect_redis(redis_url)
     
+    # Webhook dedup cache
+    global dedup_cache
+    from common.dedup import create_dedup_cache
+    dedup_cache = await create_dedup_cache()
+    
+    # Dashboard read-through cache (invalidated by the pipeline stages)
+    global query_cache
+    from common.query_cache import create_query_cache
+    query_cache = await create_query_cache()
+    
+    # Staged executor (per-stage worker pools and bounded queues)
+    global pipeline_executor
+    pipeline_executor = build_pipeline_executor(pipeline_config)
+    await pipeline_executor.start()
+    
+    # Start durable signal queue and the workers feeding the executor
+    global signal_queue, pipeline_workers
+    from common.signal_queue import QueueConfig, create_signal_queue, PipelineWorkerPool
+    queue_config = QueueConfig()
+    signal_queue = await create_signal_queue(queue_config)
+    pipeline_workers = PipelineWorkerPool(
+        signal_queue,
+        process_signal_pipeline,
+        max_in_flight=queue_config.MAX_IN_FLIGHT or pipeline_executor.capacity,
+        claim_idle_ms=queue_config.CLAIM_IDLE_MS,
+        max_deliveries=queue_config.MAX_DELIVERIES,
+        block_ms=queue_config.BLOCK_MS,
+        max_backlog=pipeline_config.MAX_BACKLOG
+    )
+    await pipeline_workers.start()
+    
+    # Resume signals left unfinished by a previous run, then keep sweeping
+    # for signals whose enqueue failed after they were committed
+    global recovery_task
+    import asyncio
+    if pipeline_config.RECOVERY_ENABLED:
+        # A durable queue still holds the messages of signals enqueued before
+        # the restart; only the in-memory queue lost them
+        await recover_incomplete_signals(
+            requeue_after_seconds=pipeline_config.RECOVERY_REQUEUE_AFTER_SECONDS if signal_queue.durable else None
+        )
+        if pipeline_config.RECOVERY_INTERVAL_SECONDS > 0:
+            recovery_task = asyncio.create_task(recovery_sweep_task())
+    
+    # Group-commit audit writer
+    await audit_writer.start()
+    
+    # Background dependency probes (serve /health and /api/status)
+    await health_monitor.start()
+    
+    # Keep the price cache warm, then broadcast from it
+    from common.price_refresher import price_refresher
+    await price_refresher.start()
+    
     # Start Price Broadcast Task
     global price_task
-    import asyncio
     price_task = asyncio.create_task(broadcast_prices_task())
     
-    print("✅ Webhook Service started successfully")
+    logger.info("Webhook service started")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
-    print("🛑 Shutting down Webhook Service...")
+    logger.info("Shutting down webhook service")
+    import asyncio
+    
+    # Let in-flight signals finish; unacked ones are redelivered on restart
+    if recovery_task:
+        recovery_task.cancel()
+    if pipeline_workers:
+        await pipeline_workers.stop()
+    if pipeline_executor:
+        await pipeline_executor.stop()
+    from common.ai_client import ai_client
+    await ai_client.close()
+    if signal_queue:
+        await signal_queue.close()
+    if dedup_cache:
+        await dedup_cache.close()
+    tracing.tracer.shutdown()
+    if query_cache:
+        await query_cache.close()
+    
+    # Flush buffered audit and health records
+    await audit_writer.stop()
+    await health_monitor.stop()
     
     # Cancel background task
     if price_task:
@@ -226,9 +388,15 @@ async def shutdown_event():
             await price_task
         except asyncio.CancelledError:
             pass
+    
+    # Stop price refreshes and close the feed's pooled HTTP connections
+    from common.price_feed import price_feed
+    from common.price_refresher import price_refresher
+    await price_refresher.stop()
+    await price_feed.close()
             
     await ws_manager.close_all()
-    print("✅ Webhook Service stopped")
+    logger.info("Webhook service stopped")
 
 
 # ============================================
@@ -237,14 +405,19 @@ async def shutdown_event():
 
 @app.get("/health")
 async def health_check():
-    """Basic health check"""
-    db_health = check_database_health()
+    """Basic health check (served from the health monitor's last probe)"""
+    database = health_monitor.components["database"]
     
     return {
-        "status": "healthy" if db_health["healthy"] else "unhealthy",
+        "status": "healthy" if health_monitor.is_healthy() else "unhealthy",
         "service": "webhook",
         "timestamp": datetime.utcnow().isoformat(),
-        "database": db_health
+        "database": {
+            "healthy": database.healthy,
+            "latency_ms": round(database.latency_ms, 2) if database.latency_ms is not None else None,
+            "error": database.error,
+            "checked_at": database.checked_at.isoformat() if database.checked_at else None
+        }
     }
 
 
@@ -257,6 +430,7 @@ async def root():
         "status": "running",
         "endpoints": {
             "webhook": "/webhook/signal",
+            "webhook_batch": "/webhook/signals/batch",
             "trades": "/trades",
             "signals": "/signals",
             "health": "/health",
@@ -419,8 +593,7 @@ async def get_current_user_endpoint(
 @app.post("/webhook/signal", response_model=SignalResponse)
 async def receive_signal(
     request: Request,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db_session)
+    db: AsyncSession = Depends(get_async_db_session)
 ):
     """
     Receive signal from TradingView webhook
@@ -433,6 +606,9 @@ async def receive_signal(
             detail="Rate limit exceeded"
         )
     
+    # Shed load while the pipeline is backed up
+    await check_pipeline_backlog()
+    
     # Get raw body for HMAC validation
     raw_body = await request.body()
     body_str = raw_body.decode('utf-8')
@@ -441,42 +617,76 @@ async def receive_signal(
     signature = request.headers.get('X-TradingView-Signature', '')
     
     if signature and not WebhookSignatureValidator.validate_signature(body_str, signature):
-        # Log failed attempt
-        audit = AuditLog(
+        # Log failed attempt (buffered and sampled, no DB round trip)
+        audit_writer.record(
             event_type="webhook_signature_validation_failed",
-            ip_address=client_ip,
             action="receive_signal",
             success=False,
+            ip_address=client_ip,
             error_message="Invalid HMAC signature"
         )
-        db.add(audit)
-        db.commit()
         
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid signature"
         )
     
-    # Parse JSON payload
+    # Idempotency: TradingView retries return the original response
+    idempotency_key = dedup_key(raw_body, request.headers.get('Idempotency-Key'))
+    if not await dedup_cache.reserve(idempotency_key):
+        cached_response = await dedup_cache.get(idempotency_key)
+        if cached_response:
+            return SignalResponse(**cached_response)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Duplicate signal is already being processed"
+        )
+    
     try:
-        payload_dict = json.loads(body_str)
-        payload = SignalPayload(**payload_dict)
-    except Exception as e:
+        # Stores the response itself once the signal is committed
+        return await ingest_signal(body_str, client_ip, db, idempotency_key)
+    except Exception:
+        # Nothing was persisted: let the retry through
+        await dedup_cache.release(idempotency_key)
+        raise
+
+
+async def check_pipeline_backlog():
+    """Reject new signals with 503 while the durable queue backlog is over its limit"""
+    if pipeline_workers and await pipeline_workers.is_overloaded():
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid payload: {str(e)}"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Signal pipeline is overloaded, retry later",
+            headers={"Retry-After": "5"}
         )
+
+
+async def initial_win_probabilities(payloads: List[SignalPayload]) -> List[Optional[float]]:
+    """
+    Win probability shown before the pipeline runs
     
-    # Generate Institutional Data (Simulating AI Analysis)
-    from common.ai_client import ai_client
+    In fast-ack mode this is a placeholder (None) and no inference happens on
+    the request path; otherwise a fast prediction is made per payload.
+    """
+    if FAST_ACK:
+        return [None] * len(payloads)
     
-    # Get fast prediction for initial display
-    ai_pred = await ai_client.get_prediction({
-        'symbol': payload.symbol,
-        'direction': payload.direction,
-        'timeframe': payload.timeframe
-    })
+    import asyncio
+    from common.ai_client import ai_client
     
+    ai_preds = await asyncio.gather(*[
+        ai_client.get_prediction({
+            'symbol': payload.symbol,
+            'direction': payload.direction,
+            'timeframe': payload.timeframe
+        })
+        for payload in payloads
+    ])
+    return [round(ai_pred['confidence'] * 100, 1) for ai_pred in ai_preds]
+
+
+def build_signal(payload: SignalPayload, payload_dict: dict, client_ip: str, win_probability: Optional[float]) -> Signal:
+    """Build the Signal row (with institutional targets) for a validated payload"""
     # Calculate targets based on Risk (Entry - SL)
     risk = abs(payload.entry_price - payload.stop_loss) if payload.entry_price and payload.stop_loss else 0.0010
     targets = []
@@ -496,8 +706,7 @@ async def receive_signal(
     # Round targets
     targets = [round(t, 4) if 'JPY' not in payload.symbol else round(t, 2) for t in targets]
     
-    # Create signal record
-    signal = Signal(
+    return Signal(
         symbol=payload.symbol,
         direction=payload.direction,
         timeframe=payload.timeframe or "H1",
@@ -513,343 +722,888 @@ async def receive_signal(
         targets=targets,
         confidence=["AI Analyzing..."], # Placeholder until pipeline finishes
         volatility='Medium', # Placeholder
-        win_probability=round(ai_pred['confidence'] * 100, 1)
+        win_probability=win_probability
     )
-    
-    db.add(signal)
-    db.commit()
-    db.refresh(signal)
-    
-    # Log audit trail
-    audit = AuditLog(
+
+
+def record_signal_received(signal: Signal, payload_dict: dict, client_ip: str):
+    """Queue the audit trail entry for a persisted signal"""
+    audit_writer.record(
         event_type="signal_received",
+        action="create",
+        success=True,
         ip_address=client_ip,
         entity_type="signal",
         entity_id=signal.id,
-        action="create",
-        details=payload_dict,
-        success=True
+        details=payload_dict
     )
-    db.add(audit)
-    db.commit()
-    
-    # Broadcast to WebSocket clients
-    await ws_manager.broadcast_signal({
+
+
+def signal_event(signal: Signal) -> dict:
+    """WebSocket payload for a newly received signal"""
+    return {
         "signal_id": signal.id,
         "symbol": signal.symbol,
         "direction": signal.direction,
-        "timestamp": signal.timestamp.isoformat(),
-        "status": signal.status.value,
-        "win_probability": signal.win_probability,
+        "timestamp": signal.timestamp,
+        "status": signal.status,
+        # Same key as signal_to_dict; None until a fast-acked signal is inferred
+        "winProbability": signal.win_probability,
         "volatility": signal.volatility
-    })
+    }
+
+
+async def commit_and_invalidate(db: AsyncSession, *tables: str):
+    """
+    Commit and drop cached dashboard queries for the written tables
+    
+    Only the commit raises: once it succeeded, a failed invalidation is
+    logged and the stale entries expire with QUERY_CACHE_TTL_SECONDS.
+    """
+    with tracing.tracer.span('db.commit', attributes={"db.tables": ",".join(tables)}):
+        await db.commit()
+    try:
+        await query_cache.invalidate(*tables)
+    except Exception as e:
+        logger.error("Query cache invalidation failed for %s: %s", ",".join(tables), e)
+
+
+async def store_response(idempotency_key: str, response: dict):
+    """Cache the response of a committed webhook (a release now would let a retry insert the signal again)"""
+    try:
+        await dedup_cache.store(idempotency_key, response)
+    except Exception as e:
+        logger.error("Dedup store failed, a retry may insert the signal again: %s", e)
+
+
+async def enqueue_persisted(signal_ids: List[int]):
+    """
+    Hand committed signals to the pipeline workers via the durable queue
+    
+    Never raises: the signals are persisted, so an enqueue failure leaves
+    them RECEIVED for the periodic recovery sweep instead of failing the
+    webhook (whose retry would insert them a second time).
+    """
+    try:
+        await signal_queue.enqueue_many(signal_ids, tracing.current_traceparent())
+    except Exception as e:
+        logger.error("Enqueue failed, signals %s left for the recovery sweep: %s", signal_ids, e)
+        return
+    await record_enqueued(signal_ids)
+
+
+async def record_enqueued(signal_ids: List[int]):
+    """
+    Mark signals as queued so the periodic recovery sweep leaves them to the workers
+    
+    Never raises: an unmarked signal only costs one duplicate message once
+    it is older than PIPELINE_RECOVERY_MIN_AGE_SECONDS.
+    """
+    try:
+        async with get_async_db() as db:
+            await mark_enqueued(db, signal_ids)
+    except Exception as e:
+        logger.warning("Could not mark signals %s as enqueued: %s", signal_ids, e)
+
+
+async def ingest_signal(body_str: str, client_ip: str, db: AsyncSession, idempotency_key: str) -> SignalResponse:
+    """
+    Parse, persist, broadcast and enqueue a single webhook signal
     
-    # Trigger processing pipeline in background
-    background_tasks.add_task(process_signal_pipeline, signal.id)
+    Raises only before the signal is committed; from then on the response
+    is cached under idempotency_key and later failures are left to recovery.
+    """
+    # Parse JSON payload
+    try:
+        payload_dict = json.loads(body_str)
+        payload = SignalPayload(**payload_dict)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid payload: {str(e)}"
+        )
+    
+    # Placeholder (fast-ack) or fast prediction for initial display
+    win_probability, = await initial_win_probabilities([payload])
+    
+    # Create signal record
+    signal = build_signal(payload, payload_dict, client_ip, win_probability)
+    
+    db.add(signal)
+    await commit_and_invalidate(db, Signal.__tablename__)
     
-    return SignalResponse(
+    response = SignalResponse(
         success=True,
         signal_id=signal.id,
         status=signal.status.value,
         message=f"Signal received and queued for processing"
     )
+    await store_response(idempotency_key, response.model_dump())
+    
+    # Log audit trail (group-committed by the audit writer)
+    record_signal_received(signal, payload_dict, client_ip)
+    
+    # Broadcast to WebSocket clients
+    await ws_manager.broadcast_signal(signal_event(signal))
+    
+    await enqueue_persisted([signal.id])
+    
+    return response
 
 
-async def process_signal_pipeline(signal_id: int):
+@app.post("/webhook/signals/batch", response_model=BatchSignalResponse)
+async def receive_signal_batch(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db_session)
+):
     """
-    Background task to process signal through complete validation pipeline:
-    1. AI Inference Service (LSTM/ML prediction)
-    2. LLM Validation (Reasoning-based confirmation)
-    3. Risk Management Service (Position sizing, circuit breakers)
-    4. Execution Service (MT5 order placement)
+    Receive a basket of signals (JSON array of SignalPayload) under one signature
+    
+    All signals are validated up front, inserted in one transaction together
+    with their audit entries, announced in a single "signals" broadcast and
+    enqueued for the pipeline together.
     """
-    from database import get_db, Prediction, Trade, TradeStatus, TradeDirection
-    from common.ai_client import ai_client
+    # Rate limiting (one slot per batch)
+    client_ip = request.client.host
+    if not rate_limiter.is_allowed(client_ip, max_requests=10, window_seconds=60):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded"
+        )
     
-    print(f"📊 Processing signal {signal_id} through pipeline...")
+    # Shed load while the pipeline is backed up
+    await check_pipeline_backlog()
     
-    with get_db() as db:
-        # Get signal
-        signal = db.query(Signal).filter(Signal.id == signal_id).first()
-        if not signal:
-            print(f"❌ Signal {signal_id} not found")
-            return
+    raw_body = await request.body()
+    body_str = raw_body.decode('utf-8')
+    
+    # Validate HMAC signature once for the whole batch
+    signature = request.headers.get('X-TradingView-Signature', '')
+    
+    if signature and not WebhookSignatureValidator.validate_signature(body_str, signature):
+        audit_writer.record(
+            event_type="webhook_signature_validation_failed",
+            action="receive_signal_batch",
+            success=False,
+            ip_address=client_ip,
+            error_message="Invalid HMAC signature"
+        )
         
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid signature"
+        )
+    
+    idempotency_key = dedup_key(raw_body, request.headers.get('Idempotency-Key'))
+    if not await dedup_cache.reserve(idempotency_key):
+        cached_response = await dedup_cache.get(idempotency_key)
+        if cached_response:
+            return BatchSignalResponse(**cached_response)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Duplicate batch is already being processed"
+        )
+    
+    try:
+        # Parse and validate every payload before writing anything
         try:
-            # === STEP 1: AI Inference ===
-            print(f"🤖 Step 1: Running AI inference...")
-            
-            # Get prediction from AI Client
-            signal_data_for_ai = {
-                'symbol': signal.symbol,
-                'direction': signal.direction.value,
-                'entry_price': signal.entry_price,
-                'timeframe': signal.timeframe
-            }
-            ai_prediction = await ai_client.get_prediction(signal_data_for_ai)
-            
-            # === STEP 2: LLM Validation ===
-            print(f"🧠 Step 2: Running LLM validation...")
-            
-            validation_result = await ai_client.validate_signal(
-                signal_data={
-                    'symbol': signal.symbol,
-                    'direction': signal.direction.value,
-                    'entry_price': signal.entry_price,
-                    'stop_loss': signal.stop_loss,
-                    'take_profit': signal.take_profit,
-                    'timeframe': signal.timeframe,
-                    'strategy_name': signal.strategy_name
-                },
-                prediction=ai_prediction,
-                risk_assessment={'approved': True, 'risk_level': 'medium'}
+            payload_dicts = json.loads(body_str)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid payload: {str(e)}"
             )
-            
-            llm_approved = validation_result['approved']
-            llm_reasoning = validation_result['reasoning']
-            llm_confidence = validation_result['confidence']
-            
-            # Update Signal with AI insights
-            signal.win_probability = round(ai_prediction['confidence'] * 100, 1)
-            
-            # Extract key phrases from reasoning for "confidence factors"
-            # Simple heuristic: split by newlines or commas and take top 3
-            factors = [f.strip() for f in llm_reasoning.split('\n') if f.strip() and not f.startswith('LLM') and len(f) < 50]
-            signal.confidence = factors[:3] if factors else ["AI Approved"]
-            
-            # Store prediction record
-            prediction = Prediction(
-                signal_id=signal_id,
-                model_name=ai_prediction['model_name'],
-                model_version='1.0',
-                prediction=ai_prediction['prediction'],
-                confidence=ai_prediction['confidence'],
-                expected_return=ai_prediction['expected_return'],
-                llm_approved=llm_approved,
-                llm_reasoning=llm_reasoning,
-                llm_confidence=llm_confidence,
-                features=ai_prediction['features'],
-                inference_time_ms=50.0
+        
+        if not isinstance(payload_dicts, list) or not payload_dicts:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid payload: expected a non-empty JSON array of signals"
             )
-            db.add(prediction)
-            db.commit()
-            
-            print(f"{'✅' if llm_approved else '❌'} LLM Decision: {'APPROVED' if llm_approved else 'REJECTED'}")
-            print(f"   Reasoning: {llm_reasoning[:100]}...")
+        
+        if len(payload_dicts) > BATCH_MAX_SIGNALS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Batch too large: {len(payload_dicts)} > {BATCH_MAX_SIGNALS} signals"
+            )
+        
+        payloads = []
+        for index, payload_dict in enumerate(payload_dicts):
+            try:
+                payloads.append(SignalPayload(**payload_dict))
+            except Exception as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid payload at index {index}: {str(e)}"
+                )
+        
+        win_probabilities = await initial_win_probabilities(payloads)
+        
+        signals = [
+            build_signal(payload, payload_dict, client_ip, win_probability)
+            for payload, payload_dict, win_probability in zip(payloads, payload_dicts, win_probabilities)
+        ]
+        
+        # One bulk insert and commit for the signals; audit rows are group-committed
+        db.add_all(signals)
+        await commit_and_invalidate(db, Signal.__tablename__)
+    except Exception:
+        # Nothing was persisted: let the retry through
+        await dedup_cache.release(idempotency_key)
+        raise
+    
+    signal_ids = [signal.id for signal in signals]
+    response = BatchSignalResponse(
+        success=True,
+        count=len(signal_ids),
+        signal_ids=signal_ids,
+        status=SignalStatus.RECEIVED.value,
+        message=f"{len(signal_ids)} signals received and queued for processing"
+    )
+    await store_response(idempotency_key, response.model_dump())
+    
+    for signal, payload_dict in zip(signals, payload_dicts):
+        record_signal_received(signal, payload_dict, client_ip)
+    
+    # One coalesced broadcast for the whole basket
+    await ws_manager.broadcast_signals([signal_event(signal) for signal in signals])
+    
+    await enqueue_persisted(signal_ids)
+    
+    return response
+
+
+def signal_update_event(signal: Signal) -> dict:
+    """WebSocket payload for a signal status change"""
+    return {**signal_event(signal), "confidence": signal.confidence}
+
+
+async def process_signal_pipeline(signal_id: int, traceparent: Optional[str] = None):
+    """
+    Run one signal through the staged pipeline (called by the queue workers):
+    1. AI Inference (LSTM/ML prediction) + Risk Management pre-check, concurrently
+    2. LLM Validation (Reasoning-based confirmation), only for signals risk approved
+    3. Execution Service (MT5 order placement)
+    
+    Each stage has its own worker pool and bounded queue (see common.pipeline).
+    The stages are traced as children of the webhook request that enqueued
+    the signal (traceparent), or of a new trace after recovery.
+    """
+    from sqlalchemy.exc import IntegrityError
+    from common.signal_queue import SignalInProgress
+    
+    if signal_id in active_signals:
+        # Not acked: the delivery already running acks the signal's message
+        raise SignalInProgress(f"Signal {signal_id} is already in the pipeline")
+    
+    logger.info("Processing signal", extra={"signal_id": signal_id})
+    active_signals.add(signal_id)
+    
+    with tracing.tracer.span(
+        'signal.pipeline', kind='consumer', parent=traceparent, attributes={"signal.id": signal_id}
+    ) as span:
+        try:
+            # Resume after the last journaled stage (restart, redelivery)
+            ctx = PipelineContext(signal_id=signal_id, trace=span.context)
+            async with get_async_db() as db:
+                last_stage, outputs = await load_checkpoint(db, signal_id)
+            ctx.restore(outputs)
             
-            # If LLM rejects, stop here
-            if not llm_approved:
-                signal.status = SignalStatus.REJECTED
-                signal.rejection_reason = f"LLM rejected: {llm_reasoning[:50]}..."
-                db.commit()
-                
-                # Broadcast update
-                await ws_manager.broadcast_signal({
-                    "signal_id": signal.id,
-                    "symbol": signal.symbol,
-                    "direction": signal.direction,
-                    "timestamp": signal.timestamp.isoformat(),
-                    "status": signal.status.value,
-                    "win_probability": signal.win_probability,
-                    "volatility": signal.volatility,
-                    "confidence": signal.confidence
-                })
+            start_stage = pipeline_executor.stage_after(last_stage)
+            if start_stage is None:
                 return
+            if last_stage:
+                logger.info("Resuming signal after %s stage", last_stage, extra={"signal_id": signal_id})
+                span.set_attribute("pipeline.resumed_after", last_stage)
+            
+            await pipeline_executor.run(ctx, start_stage)
+        except IntegrityError as e:
+            # Another worker already wrote this stage's prediction/trade
+            logger.info("Signal was processed concurrently elsewhere: %s", e.orig, extra={"signal_id": signal_id})
+        except Exception as e:
+            span.record_exception(e)
+            logger.error("Signal processing failed: %s", e, extra={"signal_id": signal_id})
+            async with get_async_db() as db:
+                signal = await db.get(Signal, signal_id)
+                if signal and signal.status == SignalStatus.RECEIVED:
+                    signal.status = SignalStatus.FAILED
+                    signal.rejection_reason = str(e)
+                    await commit_and_invalidate(db, Signal.__tablename__)
+        finally:
+            active_signals.discard(signal_id)
+
+
+async def recover_incomplete_signals(min_age_seconds: float = 0, requeue_after_seconds: Optional[float] = None):
+    """
+    Recovery sweep: re-enqueue RECEIVED signals (left unfinished by a previous
+    run, or committed but never enqueued)
+    
+    Each resumes after its last journaled stage; signals older than
+    PIPELINE_RECOVERY_MAX_AGE_SECONDS are marked FAILED instead. Signals
+    received less than min_age_seconds ago, enqueued less than
+    requeue_after_seconds ago (still waiting in the queue), or running in
+    this process are skipped.
+    """
+    try:
+        async with get_async_db() as db:
+            signal_ids, expired = await sweep_incomplete_signals(
+                db, pipeline_config.RECOVERY_MAX_AGE_SECONDS,
+                min_age_seconds=min_age_seconds, requeue_after_seconds=requeue_after_seconds
+            )
+        if expired:
+            await query_cache.invalidate(Signal.__tablename__)
+        signal_ids = [signal_id for signal_id in signal_ids if signal_id not in active_signals]
+        if signal_ids:
+            await signal_queue.enqueue_many(signal_ids)
+            await record_enqueued(signal_ids)
+        if signal_ids or expired or not min_age_seconds:
+            logger.info("Recovery sweep: %d signals re-enqueued, %d expired", len(signal_ids), expired)
+    except Exception as e:
+        logger.error("Recovery sweep failed: %s", e)
+
+
+async def recovery_sweep_task():
+    """Background task repeating the recovery sweep every PIPELINE_RECOVERY_INTERVAL_SECONDS"""
+    import asyncio
+    
+    while True:
+        try:
+            await asyncio.sleep(pipeline_config.RECOVERY_INTERVAL_SECONDS)
+            await recover_incomplete_signals(
+                pipeline_config.RECOVERY_MIN_AGE_SECONDS, pipeline_config.RECOVERY_REQUEUE_AFTER_SECONDS
+            )
+        except asyncio.CancelledError:
+            break
+
+
+async def load_pending_signal(db: AsyncSession, ctx: PipelineContext) -> Optional[Signal]:
+    """Signal for a stage, or None if it is missing or already finished"""
+    signal = await db.get(Signal, ctx.signal_id)
+    if not signal:
+        logger.error("Signal not found", extra={"signal_id": ctx.signal_id})
+        return None
+    
+    # Redelivered message for a signal that already finished
+    if signal.status != SignalStatus.RECEIVED:
+        logger.info("Signal already %s, skipping", signal.status.value, extra={"signal_id": ctx.signal_id})
+        return None
+    
+    return signal
+
+
+def stop_loss_points(signal: Signal) -> float:
+    """Stop distance in pips (0 lets the risk manager use its default)"""
+    if not signal.entry_price or not signal.stop_loss:
+        return 0.0
+    # Simplified pip size - in production this should come from MT5 symbol info
+    pip_size = 0.01 if 'JPY' in signal.symbol else 0.0001
+    return abs(signal.entry_price - signal.stop_loss) / pip_size
+
+
+async def load_open_positions(db: AsyncSession) -> List[dict]:
+    """Open trades in the shape RiskManager.assess_trade expects"""
+    from database import Trade
+    from database.stats import OPEN_TRADE_STATUSES
+    
+    result = await db.execute(
+        select(Trade.symbol, Trade.executed_lots, Trade.requested_lots)
+        .where(Trade.status.in_(OPEN_TRADE_STATUSES))
+    )
+    return [
+        {"symbol": symbol, "volume": executed_lots or requested_lots or 0}
+        for symbol, executed_lots, requested_lots in result.all()
+    ]
+
+
+def assess_signal_risk(signal: Signal, positions: List[dict], confidence: float):
+    """Run the risk manager for a signal against the current open positions"""
+    from risk.manager import risk_manager
+    
+    equity = risk_manager.config.account_equity
+    assessment = risk_manager.assess_trade(
+        symbol=signal.symbol,
+        direction=signal.direction.value,
+        account_balance=equity,
+        account_equity=equity,
+        signal_confidence=confidence,
+        stop_loss_points=stop_loss_points(signal),
+        current_positions=positions
+    )
+    metrics.RISK_ASSESSMENTS.labels('approved' if assessment.approved else 'rejected').inc()
+    return assessment
+
+
+async def commit_stage(db: AsyncSession, ctx: PipelineContext, *tables: str):
+    """commit_and_invalidate, timed as db.commit.<stage> (traced by commit_and_invalidate)"""
+    import time
+    
+    start = time.perf_counter()
+    await commit_and_invalidate(db, *tables)
+    ctx.record_timing(f"db.commit.{ctx.stage}", (time.perf_counter() - start) * 1000)
+
+
+async def reject_signal(db: AsyncSession, ctx: PipelineContext, signal: Signal, reason: str):
+    """Mark a signal rejected and push the update"""
+    signal.status = SignalStatus.REJECTED
+    signal.rejection_reason = reason
+    await commit_stage(db, ctx, Signal.__tablename__)
+    await ws_manager.broadcast_signal_update(signal_update_event(signal))
+
+
+def stage_budget(ctx: PipelineContext) -> Optional[float]:
+    """Seconds a stage may wait, keeping the execution reserve (None = unbounded)"""
+    remaining = ctx.remaining()
+    if remaining is None:
+        return None
+    return max(0.0, remaining - pipeline_config.EXECUTION_RESERVE_SECONDS)
+
+
+async def stage_ai_and_risk(ctx: PipelineContext) -> bool:
+    """
+    Stage 1: AI prediction and risk pre-check, run concurrently
+    
+    Signals the risk manager would reject (kill switch, loss/position limits,
+    low model confidence) stop here and never reach the LLM. Without budget
+    for inference a recent cached prediction for the same setup is used.
+    
+    No database connection is held while waiting for inference: the
+    pre-check session is closed first and a short one writes the result.
+    """
+    import asyncio
+    from common.ai_client import ai_client
+    from risk.manager import risk_manager
+    
+    prediction_task = None
+    try:
+        async with get_async_db() as db:
+            signal = await load_pending_signal(db, ctx)
+            if not signal:
+                return False
             
-            # === STEP 3: Risk Management ===
-            print(f"🛡️  Step 3: Running risk assessment...")
-            # Placeholder - would call risk service
-            risk_approved = True
-            position_size = 0.1
+            # The time budget starts when the webhook received the signal
+            ctx.set_deadline(signal.timestamp, pipeline_config.deadline_seconds(signal.timeframe))
+            ctx.check_deadline('ai')
             
-            if not risk_approved:
-                signal.status = SignalStatus.REJECTED
-                signal.rejection_reason = "Risk manager rejected"
-                db.commit()
-                return
+            # Kill switch: no point spending inference on it
+            if risk_manager.config.kill_switch_active:
+                await reject_signal(db, ctx, signal, "Risk pre-check: Kill switch is active")
+                return False
             
-            # === STEP 4: Execution ===
-            print(f"⚡ Step 4: Executing trade...")
-            # Placeholder - would call execution service
-            trade = Trade(
-                signal_id=signal_id,
-                symbol=signal.symbol,
-                direction=TradeDirection.BUY if signal.direction.value == 'buy' else TradeDirection.SELL,
-                requested_lots=position_size,
-                entry_price_requested=signal.entry_price,
-                stop_loss=signal.stop_loss,
-                take_profit=signal.take_profit,
-                status=TradeStatus.PENDING
-            )
-            db.add(trade)
-            signal.status = SignalStatus.EXECUTED
-            db.commit()
+            logger.debug("Running AI inference and risk pre-check", extra={"signal_id": ctx.signal_id})
             
-            print(f"✅ Signal {signal_id} processed successfully")
-            print(f"   Trade ID: {trade.id}")
+            # Get prediction from AI Client while the pre-check loads positions
+            signal_data_for_ai = {
+                'symbol': signal.symbol,
+                'direction': signal.direction.value,
+                'entry_price': signal.entry_price,
+                'timeframe': signal.timeframe
+            }
+            async def timed_prediction():
+                with ctx.measure('ai.inference'):
+                    return await ai_client.get_prediction(signal_data_for_ai)
             
-            # Broadcast update
-            await ws_manager.broadcast_signal({
-                "signal_id": signal.id,
-                "symbol": signal.symbol,
-                "direction": signal.direction,
-                "timestamp": signal.timestamp.isoformat(),
-                "status": signal.status.value,
-                "win_probability": signal.win_probability,
-                "volatility": signal.volatility,
-                "confidence": signal.confidence
-            })
+            prediction_task = asyncio.create_task(timed_prediction())
             
-        except Exception as e:
-            print(f"❌ Error processing signal {signal_id}: {e}")
-            signal.status = SignalStatus.FAILED
-            signal.rejection_reason = str(e)
-            db.commit()
+            with ctx.measure('risk.precheck'):
+                positions = await load_open_positions(db)
+                # Confidence-independent limits (full confidence only affects sizing)
+                precheck = assess_signal_risk(signal, positions, confidence=1.0)
+            if not precheck.approved:
+                prediction_task.cancel()
+                await reject_signal(db, ctx, signal, f"Risk pre-check: {'; '.join(precheck.reasons)}")
+                return False
+        
+        # Session released: inference may take seconds
+        try:
+            ctx.prediction = await asyncio.wait_for(prediction_task, timeout=stage_budget(ctx))
+        except asyncio.TimeoutError:
+            ctx.prediction = ai_client.get_cached_prediction(signal_data_for_ai)
+            if ctx.prediction is None:
+                raise DeadlineExceeded('ai', 0.0)
+            ctx.degrade('ai', "inference over budget, using cached prediction")
+    finally:
+        if prediction_task is not None and not prediction_task.done():
+            prediction_task.cancel()
+    
+    async with get_async_db() as db:
+        signal = await load_pending_signal(db, ctx)
+        if not signal:
+            return False
+        
+        # Back-fill the win probability and push it before the slow LLM step
+        signal.win_probability = round(ctx.prediction['confidence'] * 100, 1)
+        
+        # Final sizing with the model confidence (also rejects low confidence)
+        with ctx.measure('risk.assess'):
+            assessment = assess_signal_risk(signal, positions, confidence=ctx.prediction['confidence'])
+        ctx.risk = {
+            'approved': assessment.approved,
+            'risk_level': assessment.risk_level.value,
+            'position_size_lots': assessment.position_size_lots,
+            'reasons': assessment.reasons,
+            'warnings': assessment.warnings
+        }
+        
+        if not assessment.approved:
+            await reject_signal(db, ctx, signal, f"Risk manager rejected: {'; '.join(assessment.reasons)}")
+            return False
+        
+        record_stage_completed(db, signal, ctx.stage, ctx.checkpoint())
+        await commit_stage(db, ctx, Signal.__tablename__)
+        await ws_manager.broadcast_signal_update(signal_update_event(signal))
+    
+    return True
+
+
+def skipped_validation() -> dict:
+    """Validation result used when the LLM is skipped to meet the deadline"""
+    return {
+        'approved': True,
+        'reasoning': "LLM skipped: deadline budget exhausted",
+        'confidence': None,
+        'skipped': True
+    }
+
+
+async def stage_llm_validation(ctx: PipelineContext) -> bool:
+    """
+    Stage 2: LLM validation; stores the prediction record, rejects on disapproval
+    
+    Skipped (signal continues on the AI and risk decision) when the remaining
+    budget is below PIPELINE_LLM_MIN_BUDGET_SECONDS or the call runs over it.
+    No database connection is held during the LLM call.
+    """
+    import asyncio
+    from database import Prediction
+    from common.ai_client import ai_client
+    
+    async with get_async_db() as db:
+        signal = await load_pending_signal(db, ctx)
+        if not signal:
+            return False
+        signal_data = {
+            'symbol': signal.symbol,
+            'direction': signal.direction.value,
+            'entry_price': signal.entry_price,
+            'stop_loss': signal.stop_loss,
+            'take_profit': signal.take_profit,
+            'timeframe': signal.timeframe,
+            'strategy_name': signal.strategy_name
+        }
+    
+    logger.debug("Running LLM validation", extra={"signal_id": ctx.signal_id})
+    
+    budget = stage_budget(ctx)
+    if budget is not None and budget < pipeline_config.LLM_MIN_BUDGET_SECONDS:
+        ctx.degrade('llm', f"{budget:.1f}s budget left, skipping LLM")
+        ctx.validation = skipped_validation()
+    else:
+        try:
+            with ctx.measure('llm.validation'):
+                ctx.validation = await asyncio.wait_for(
+                    ai_client.validate_signal(
+                        signal_data=signal_data,
+                        prediction=ctx.prediction,
+                        risk_assessment=ctx.risk
+                    ),
+                    timeout=budget
+                )
+        except asyncio.TimeoutError:
+            ctx.degrade('llm', "LLM call over budget")
+            ctx.validation = skipped_validation()
+    
+    async with get_async_db() as db:
+        signal = await load_pending_signal(db, ctx)
+        if not signal:
+            return False
+        
+        llm_approved = ctx.validation['approved']
+        llm_reasoning = ctx.validation['reasoning']
+        llm_confidence = ctx.validation['confidence']
+        
+        # Extract key phrases from reasoning for "confidence factors"
+        # Simple heuristic: split by newlines or commas and take top 3
+        factors = [f.strip() for f in llm_reasoning.split('\n') if f.strip() and not f.startswith('LLM') and len(f) < 50]
+        signal.confidence = factors[:3] if factors else ["AI Approved"]
+        
+        # Store prediction record
+        prediction = Prediction(
+            signal_id=ctx.signal_id,
+            model_name=ctx.prediction['model_name'],
+            model_version='1.0',
+            prediction=ctx.prediction['prediction'],
+            confidence=ctx.prediction['confidence'],
+            expected_return=ctx.prediction['expected_return'],
+            llm_approved=None if ctx.validation.get('skipped') else llm_approved,
+            llm_reasoning=llm_reasoning,
+            llm_confidence=llm_confidence,
+            features=ctx.prediction['features'],
+            # None when a cached prediction was reused
+            inference_time_ms=ctx.timings.get('ai.inference'),
+            # Breakdown up to this stage's commit
+            timings=dict(ctx.timings)
+        )
+        db.add(prediction)
+        
+        logger.info(
+            "LLM %s signal", "approved" if llm_approved else "rejected",
+            extra={"signal_id": ctx.signal_id, "reasoning": llm_reasoning[:100]}
+        )
+        
+        # If LLM rejects, stop here (prediction is committed with the rejection)
+        if not llm_approved:
+            await reject_signal(db, ctx, signal, f"LLM rejected: {llm_reasoning[:50]}...")
+            return False
+        
+        record_stage_completed(db, signal, ctx.stage, ctx.checkpoint())
+        await commit_stage(db, ctx, Signal.__tablename__)
+    
+    return True
+
+
+async def stage_execution(ctx: PipelineContext) -> bool:
+    """Stage 3: Trade execution"""
+    from database import Trade, TradeStatus, TradeDirection
+    
+    async with get_async_db() as db:
+        signal = await load_pending_signal(db, ctx)
+        if not signal:
+            return False
+        
+        logger.debug("Executing trade", extra={"signal_id": ctx.signal_id})
+        # Placeholder - would call execution service
+        trade = Trade(
+            signal_id=ctx.signal_id,
+            symbol=signal.symbol,
+            direction=TradeDirection.BUY if signal.direction.value == 'buy' else TradeDirection.SELL,
+            requested_lots=ctx.risk['position_size_lots'],
+            entry_price_requested=signal.entry_price,
+            stop_loss=signal.stop_loss,
+            take_profit=signal.take_profit,
+            status=TradeStatus.PENDING,
+            # Breakdown up to this stage's commit
+            timings=dict(ctx.timings)
+        )
+        db.add(trade)
+        signal.status = SignalStatus.EXECUTED
+        record_stage_completed(db, signal, ctx.stage)
+        await commit_stage(db, ctx, Signal.__tablename__, Trade.__tablename__)
+        
+        logger.info("Signal executed", extra={"signal_id": ctx.signal_id, "trade_id": trade.id})
+        
+        # Broadcast update
+        await ws_manager.broadcast_signal_update(signal_update_event(signal))
+    
+    return False
+
+
+def build_pipeline_executor(config: PipelineConfig) -> StagedExecutor:
+    """Pipeline stages in order, with their configured limits"""
+    stages = [
+        ('ai', stage_ai_and_risk),
+        ('llm', stage_llm_validation),
+        ('execution', stage_execution)
+    ]
+    return StagedExecutor([
+        Stage(name, handler, *config.stage_limits(name))
+        for name, handler in stages
+    ])
 
 
 # ============================================
 # Query Endpoints (for Dashboard)
 # ============================================
 
+def signal_to_dict(s: Signal) -> dict:
+    """Dashboard representation of a signal (datetimes/enums encoded by orjson)"""
+    return {
+        "id": s.id,
+        "symbol": s.symbol,
+        "direction": s.direction,
+        "timestamp": s.timestamp,
+        "status": s.status,
+        "entry_price": s.entry_price,
+        "stop_loss": s.stop_loss,
+        "take_profit": s.take_profit,
+        
+        # Institutional Data
+        "strategy": s.strategy_name,
+        "timeframe": s.timeframe,
+        "targets": s.targets or [s.take_profit],
+        "confidence": s.confidence or [],
+        "volatility": s.volatility or "Medium",
+        # None while a fast-acked signal awaits inference (shown as pending)
+        "winProbability": s.win_probability
+    }
+
+
+def trade_to_dict(t: Trade) -> dict:
+    """Dashboard representation of a trade (datetimes/enums encoded by orjson)"""
+    return {
+        "id": t.id,
+        "symbol": t.symbol,
+        "direction": t.direction,
+        "timestamp": t.timestamp,
+        "status": t.status,
+        "executed_lots": t.executed_lots,
+        "entry_price_filled": t.entry_price_filled,
+        "net_pnl": t.net_pnl,
+        "mt5_order_id": t.mt5_order_id
+    }
+
+
+def filtered_query(model, symbol: Optional[str], status: Optional[str]):
+    """Base query for the signals/trades endpoints"""
+    query = select(model)
+    
+    if symbol:
+        query = query.where(model.symbol == symbol.upper())
+    
+    if status:
+        query = query.where(model.status == status)
+    
+    return query
+
+
+async def stream_export(query, model, to_dict, export_format: str):
+    """
+    Yield NDJSON lines or CSV rows for a query in constant memory
+    
+    Rows are fetched through a server-side cursor EXPORT_CHUNK_SIZE at a time.
+    """
+    import csv
+    import io
+    
+    query = query.order_by(model.timestamp.desc(), model.id.desc())
+    # One buffer and writer per export, drained after every partition
+    buffer = io.StringIO()
+    writer = None
+    
+    async with get_async_db() as db:
+        result = await db.stream_scalars(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        
+        async for partition in result.partitions():
+            if export_format != 'csv':
+                yield b''.join(dumps(to_dict(row)) + b'\n' for row in partition)
+                continue
+            
+            for row in partition:
+                data = to_dict(row)
+                if writer is None:
+                    writer = csv.DictWriter(buffer, fieldnames=list(data.keys()))
+                    writer.writeheader()
+                writer.writerow({key: csv_cell(value) for key, value in data.items()})
+            
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+
+def export_response(query, model, to_dict, export_format: str, name: str):
+    """Streaming response for /signals/export and /trades/export"""
+    from fastapi.responses import StreamingResponse
+    
+    media_type = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    extension = 'csv' if export_format == 'csv' else 'ndjson'
+    
+    return StreamingResponse(
+        stream_export(query, model, to_dict, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{extension}"'}
+    )
+
+
 @app.get("/signals")
 async def get_signals(
     symbol: Optional[str] = None,
     status: Optional[str] = None,
-    limit: int = 100,
-    db: Session = Depends(get_db_session),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db_session),
     # token_data: dict = Depends(verify_jwt_token)  # Disabled for testing
 ):
-    """Get signals history"""
-    query = db.query(Signal)
-    
-    if symbol:
-        query = query.filter(Signal.symbol == symbol.upper())
-    
-    if status:
-        query = query.filter(Signal.status == status)
+    """Get signals history (pass next_cursor back as cursor for the next page)"""
+    try:
+        query = keyset_page(filtered_query(Signal, symbol, status), Signal, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    signals = query.order_by(Signal.timestamp.desc()).limit(limit).all()
+    async def load():
+        result = await db.execute(query)
+        signals, next_cursor = split_page(result.scalars().all(), limit)
+        return {
+            "count": len(signals),
+            "signals": [signal_to_dict(s) for s in signals],
+            "next_cursor": next_cursor
+        }
     
-    return {
-        "count": len(signals),
-        "signals": [
-            {
-                "id": s.id,
-                "symbol": s.symbol,
-                "direction": s.direction.value,
-                "timestamp": s.timestamp.isoformat(),
-                "status": s.status.value,
-                "entry_price": s.entry_price,
-                "stop_loss": s.stop_loss,
-                "take_profit": s.take_profit,
-                
-                # Institutional Data
-                "strategy": s.strategy_name,
-                "timeframe": s.timeframe,
-                "targets": s.targets or [s.take_profit],
-                "confidence": s.confidence or [],
-                "volatility": s.volatility or "Medium",
-                "winProbability": s.win_probability or 75
-            }
-            for s in signals
-        ]
-    }
+    key = cache_key("/signals", symbol=symbol, status=status, limit=limit, cursor=cursor)
+    return FastJSONResponse(await query_cache.get_or_load(Signal.__tablename__, key, load))
+
+
+@app.get("/signals/export")
+async def export_signals(
+    symbol: Optional[str] = None,
+    status: Optional[str] = None,
+    format: str = Query('ndjson', pattern='^(ndjson|csv)$'),
+    # token_data: dict = Depends(verify_jwt_token)  # Disabled for testing
+):
+    """Stream the full signal history as NDJSON or CSV"""
+    return export_response(filtered_query(Signal, symbol, status), Signal, signal_to_dict, format, "signals")
 
 
 @app.get("/trades")
 async def get_trades(
     symbol: Optional[str] = None,
     status: Optional[str] = None,
-    limit: int = 100,
-    db: Session = Depends(get_db_session),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db_session),
     # token_data: dict = Depends(verify_jwt_token)  # Disabled for testing
 ):
-    """Get trades history"""
+    """Get trades history (pass next_cursor back as cursor for the next page)"""
     try:
-        query = db.query(Trade)
-        
-        if symbol:
-            query = query.filter(Trade.symbol == symbol.upper())
-        
-        if status:
-            query = query.filter(Trade.status == status)
-        
-        trades = query.order_by(Trade.timestamp.desc()).limit(limit).all()
-        
+        query = keyset_page(filtered_query(Trade, symbol, status), Trade, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async def load():
+        result = await db.execute(query)
+        trades, next_cursor = split_page(result.scalars().all(), limit)
         return {
             "count": len(trades),
-            "trades": [
-                {
-                    "id": t.id,
-                    "symbol": t.symbol,
-                    "direction": t.direction.value,
-                    "timestamp": t.timestamp.isoformat(),
-                    "status": t.status.value,
-                    "executed_lots": t.executed_lots,
-                    "entry_price_filled": t.entry_price_filled,
-                    "net_pnl": t.net_pnl,
-                    "mt5_order_id": t.mt5_order_id
-                }
-                for t in trades
-            ]
+            "trades": [trade_to_dict(t) for t in trades],
+            "next_cursor": next_cursor
         }
+    
+    try:
+        key = cache_key("/trades", symbol=symbol, status=status, limit=limit, cursor=cursor)
+        return FastJSONResponse(await query_cache.get_or_load(Trade.__tablename__, key, load))
     except Exception as e:
-        print(f"❌ Error in get_trades: {e}")
-        import traceback
-        traceback.print_exc()
-        return {"count": 0, "trades": []}
+        logger.exception("get_trades failed: %s", e)
+        return {"count": 0, "trades": [], "next_cursor": None}
+
+
+@app.get("/trades/export")
+async def export_trades(
+    symbol: Optional[str] = None,
+    status: Optional[str] = None,
+    format: str = Query('ndjson', pattern='^(ndjson|csv)$'),
+    # token_data: dict = Depends(verify_jwt_token)  # Disabled for testing
+):
+    """Stream the full trade history as NDJSON or CSV"""
+    return export_response(filtered_query(Trade, symbol, status), Trade, trade_to_dict, format, "trades")
 
 
 @app.get("/stats")
 async def get_stats(
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_async_db_session),
     # token_data: dict = Depends(verify_jwt_token)  # Disabled for testing
 ):
-    """Get trading statistics"""
+    """Get trading statistics (incrementally maintained summary row)"""
     try:
-        from sqlalchemy import func
-        
-        # Total signals
-        total_signals = db.query(func.count(Signal.id)).scalar() or 0
-        
-        # Total trades
-        total_trades = db.query(func.count(Trade.id)).scalar() or 0
-        
-        # Open trades
-        open_trades = db.query(func.count(Trade.id)).filter(
-            Trade.status.in_([TradeStatus.PLACED, TradeStatus.FILLED])
-        ).scalar() or 0
-        
-        # Total P&L
-        total_pnl = db.query(func.sum(Trade.net_pnl)).filter(
-            Trade.status == TradeStatus.CLOSED
-        ).scalar() or 0
-        
-        # Win rate
-        winning_trades = db.query(func.count(Trade.id)).filter(
-            Trade.status == TradeStatus.CLOSED,
-            Trade.net_pnl > 0
-        ).scalar() or 0
-        
-        closed_trades = db.query(func.count(Trade.id)).filter(
-            Trade.status == TradeStatus.CLOSED
-        ).scalar() or 0
-        
-        win_rate = (winning_trades / closed_trades * 100) if closed_trades > 0 else 0
-        
-        return {
-            "total_signals": total_signals,
-            "total_trades": total_trades,
-            "open_trades": open_trades,
-            "total_pnl": round(float(total_pnl), 2),
-            "win_rate": round(float(win_rate), 2),
-            "closed_trades": closed_trades,
-            "winning_trades": winning_trades
-        }
+        return await get_trading_stats(db)
     except Exception as e:
-        print(f"❌ Error in get_stats: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("get_stats failed: %s", e)
         # Return default stats instead of crashing
         return {
             "total_signals": 0,
@@ -862,6 +1616,19 @@ async def get_stats(
         }
 
 
+@app.post("/stats/rebuild")
+async def rebuild_stats(
+    db: AsyncSession = Depends(get_async_db_session),
+    token_data: dict = Depends(verify_jwt_token)
+):
+    """Recompute the statistics summary from the signals and trades tables"""
+    await rebuild_trading_stats(db)
+    return {
+        "success": True,
+        "stats": await get_trading_stats(db)
+    }
+
+
 # ============================================
 # Settings Management Endpoints
 # ============================================
@@ -880,7 +1647,7 @@ class SettingsUpdate(BaseModel):
 
 @app.get("/api/settings")
 async def get_user_settings(
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_async_db_session),
     token_data: dict = Depends(verify_jwt_token)
 ):
     """Get current user settings"""
@@ -890,14 +1657,14 @@ async def get_user_settings(
     user_id = token_data.get('sub', 'default_user')
     
     # Get or create settings
-    settings = db.query(UserSettings).filter(UserSettings.user_id == user_id).first()
+    settings = await db.scalar(select(UserSettings).where(UserSettings.user_id == user_id))
     
     if not settings:
         # Create default settings
         settings = UserSettings(user_id=user_id)
         db.add(settings)
-        db.commit()
-        db.refresh(settings)
+        await db.commit()
+        await db.refresh(settings)
     
     # Decrypt MT5 password for display (masked)
     mt5_password_masked = "****" if settings.mt5_password else None
@@ -920,7 +1687,7 @@ async def get_user_settings(
 @app.put("/api/settings")
 async def update_user_settings(
     settings_update: SettingsUpdate,
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_async_db_session),
     token_data: dict = Depends(verify_jwt_token)
 ):
     """Update user settings"""
@@ -930,7 +1697,7 @@ async def update_user_settings(
     user_id = token_data.get('sub', 'default_user')
     
     # Get or create settings
-    settings = db.query(UserSettings).filter(UserSettings.user_id == user_id).first()
+    settings = await db.scalar(select(UserSettings).where(UserSettings.user_id == user_id))
     
     if not settings:
         settings = UserSettings(user_id=user_id)
@@ -962,8 +1729,8 @@ async def update_user_settings(
     if settings_update.theme is not None:
         settings.theme = settings_update.theme
     
-    db.commit()
-    db.refresh(settings)
+    await db.commit()
+    await db.refresh(settings)
     
     return {
         "success": True,
@@ -981,61 +1748,56 @@ async def update_user_settings(
 # System Status Endpoint
 # ============================================
 
+def get_price_feed_status() -> dict:
+    """Price providers (circuit breakers, FX rate tables, replay position) and refresher schedules"""
+    from common.price_feed import price_feed
+    from common.price_refresher import price_refresher
+    
+    return {
+        "providers": price_feed.get_provider_health(),
+        "refresher": price_refresher.get_stats()
+    }
+
+
 @app.get("/api/status")
 async def get_system_status():
-    """Get comprehensive system status"""
+    """
+    Get comprehensive system status
+    
+    Dependency health comes from the background health monitor (probed every
+    HEALTH_CHECK_INTERVAL_SECONDS), so this endpoint does no probing itself.
+    """
     import time
     
-    # Check database
-    db_start = time.time()
-    db_health = check_database_health()
-    db_latency = (time.time() - db_start) * 1000
+    components = health_monitor.get_snapshot()
     
-    # Check Redis (if available)
-    redis_connected = False
-    redis_latency = None
-    try:
-        import redis
-        r = redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
-        redis_start = time.time()
-        r.ping()
-        redis_latency = (time.time() - redis_start) * 1000
-        redis_connected = True
-    except:
-        pass
-    
-    # Check MT5 (if configured)
-    mt5_connected = False
-    try:
-        import MetaTrader5 as mt5
-        if mt5.initialize():
-            mt5_connected = True
-            mt5.shutdown()
-    except:
-        pass
+    # A non-durable fallback queue degrades the service even with healthy dependencies
+    health = health_monitor.get_status()
+    if signal_queue is not None and signal_queue.degraded and health == "healthy":
+        health = "degraded"
     
     return {
         "status": "online",
+        "health": health,
         "timestamp": datetime.utcnow().isoformat(),
         "services": {
             "api": {
                 "status": "healthy",
-                "uptime_seconds": int(time.time())  # Simplified
+                "uptime_seconds": int(time.time() - health_monitor.started_at)
             },
-            "database": {
-                "status": "healthy" if db_health["healthy"] else "unhealthy",
-                "latency_ms": round(db_latency, 2),
-                "connected": db_health["healthy"]
-            },
-            "redis": {
-                "status": "healthy" if redis_connected else "unavailable",
-                "latency_ms": round(redis_latency, 2) if redis_latency else None,
-                "connected": redis_connected
-            },
-            "mt5": {
-                "status": "connected" if mt5_connected else "disconnected",
-                "connected": mt5_connected
-            }
+            "database": components["database"],
+            "redis": components["redis"],
+            "mt5": components["mt5"],
+            "ai_service": components["ai_service"],
+            "database_pool": get_pool_status(),
+            "signal_queue": await pipeline_workers.get_stats() if pipeline_workers else None,
+            "pipeline_stages": pipeline_executor.get_stats() if pipeline_executor else None,
+            "pipeline_latency": latency_registry.summary(),
+            "audit_writer": audit_writer.get_stats(),
+            "logging": logging_state.get_stats(),
+            "health_monitor": health_monitor.get_stats(),
+            "price_feed": get_price_feed_status(),
+            "query_cache": query_cache.get_stats() if query_cache else None
         },
         "version": "1.0.0"
     }
@@ -1045,15 +1807,39 @@ async def get_system_status():
 # Live Prices Endpoint
 # ============================================
 
+@app.get("/api/pipeline/latency")
+async def get_pipeline_latency():
+    """
+    Pipeline latency histograms since startup
+    
+    Per stage (stage.*), queue wait (queue.*), external call (ai.inference,
+    llm.validation), risk check (risk.*) and DB commit (db.commit.*):
+    count, avg and approximate p50/p95/p99 in ms.
+    """
+    return latency_registry.summary()
+
+
+@app.get("/api/traces/signals/{signal_id}")
+async def get_signal_trace(signal_id: int):
+    """
+    Spans of the traces that processed a signal (webhook request, stages,
+    inference, LLM call, DB commits, order), oldest first
+    
+    Served from the in-memory exporter (TRACING_EXPORTER includes 'memory').
+    """
+    if tracing.tracer.memory is None:
+        raise HTTPException(status_code=404, detail="In-memory trace exporter is not enabled")
+    spans = tracing.tracer.memory.get_signal_spans(signal_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail=f"No spans recorded for signal {signal_id}")
+    return {"signal_id": signal_id, "spans": sorted(spans, key=lambda span: span["startTimeUnixNano"])}
+
+
 @app.get("/api/prices/live")
 async def get_live_prices():
     """Get real-time prices for all supported pairs"""
-    from common.price_feed import price_feed
-    import asyncio
-    
     try:
-        # Fetch prices (non-blocking)
-        prices_data = await asyncio.to_thread(price_feed.get_all_prices)
+        prices_data = await read_prices()
         
         # Format using helper
         formatted_prices = format_prices_data(prices_data)
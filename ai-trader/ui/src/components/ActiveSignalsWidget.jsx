@@ -142,9 +142,13 @@ export function ActiveSignalsWidget({ signals = [], livePrices = [] }) {
                 </div>
                 <div style={{ padding: '12px', borderRight: '1px solid #1e293b', textAlign: 'center' }}>
                   <div style={{ fontSize: '11px', color: '#64748b', marginBottom: '4px' }}>Win Prob</div>
-                  <div style={{ fontSize: '14px', fontWeight: '600', color: signal.winProbability >= 70 ? '#10b981' : '#f59e0b' }}>
-                    {signal.winProbability}%
-                  </div>
+                  {signal.winProbability == null ? (
+                    <div style={{ fontSize: '14px', fontWeight: '600', color: '#64748b' }}>Pending</div>
+                  ) : (
+                    <div style={{ fontSize: '14px', fontWeight: '600', color: signal.winProbability >= 70 ? '#10b981' : '#f59e0b' }}>
+                      {signal.winProbability}%
+                    </div>
+                  )}
                 </div>
                 <div style={{ padding: '12px', textAlign: 'center' }}>
                   <div style={{ fontSize: '11px', color: '#64748b', marginBottom: '4px' }}>Volatility</div>
@@ -12,6 +12,9 @@ import { Login } from './pages/Login'
 
 const API_URL = 'http://localhost:8000'
 
+// Loaded signals carry `id`, WebSocket events `signal_id`
+const signalKey = (signal) => signal.signal_id ?? signal.id
+
 // Timezone data
 const TIMEZONES = [
   { value: 'UTC', label: 'UTC'},
@@ -145,11 +148,10 @@ function DashboardContent() {
   useEffect(() => {
     if (signalMessage && signalMessage.type === 'signal') {
       const newSignal = signalMessage.data
-      setSignals(prev => {
-        // Avoid duplicates
-        if (prev.find(s => s.id === newSignal.id)) return prev
-        return [newSignal, ...prev]
-      })
+      // Avoid duplicates
+      if (signals.some(s => signalKey(s) === signalKey(newSignal))) return
+
+      setSignals(prev => [newSignal, ...prev])
       
       // Update stats
       setStats(prev => ({
@@ -157,6 +159,28 @@ function DashboardContent() {
         total_signals: prev.total_signals + 1
       }))
     }
+
+    // Batch of signals from a basket alert
+    if (signalMessage && signalMessage.type === 'signals') {
+      const known = new Set(signals.map(signalKey))
+      const fresh = signalMessage.data.filter(n => !known.has(signalKey(n)))
+      if (fresh.length === 0) return
+
+      setSignals(prev => [...fresh, ...prev])
+
+      setStats(prev => ({
+        ...prev,
+        total_signals: prev.total_signals + fresh.length
+      }))
+    }
+
+    // Pipeline progress of a signal already listed (not counted again)
+    if (signalMessage && signalMessage.type === 'signal_update') {
+      const update = signalMessage.data
+      setSignals(prev => prev.map(s => (
+        signalKey(s) === signalKey(update) ? { ...s, ...update } : s
+      )))
+    }
   }, [signalMessage])
 
   // Initial Data Load
@@ -567,7 +591,7 @@ function SignalsTable({ signals }) {
       </thead>
       <tbody>
         {signals.map((signal) => (
-          <tr key={signal.id} style={{ borderBottom: '1px solid #1e293b' }}>
+          <tr key={signalKey(signal)} style={{ borderBottom: '1px solid #1e293b' }}>
             <td style={{ padding: '12px 8px', fontWeight: '600' }}>{signal.symbol}</td>
             <td style={{ padding: '12px 8px' }}>
               <span style={{